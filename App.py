@@ -1,8 +1,10 @@
 import streamlit as st
-import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-import re
+import os
+import uuid
+
+from novabot.history import ChatHistory, SpillStore, message_html
+from novabot.metrics import METRICS, SlowRequestProfiler, start_metrics_server
+from site_content import CSS, HEADER, NAV_LABELS, PAGE_NAMES, PAGES, render_page
 
 # Page configuration
 st.set_page_config(
@@ -12,277 +14,66 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Custom CSS for styling
-def local_css():
-    st.markdown("""
-    <style>
-        /* Main styling */
-        .main {
-            background-color: #f8f9fa;
-        }
-        
-        /* Header styling */
-        .bank-header {
-            background-color: white;
-            padding: 1rem;
-            border-radius: 10px;
-            box-shadow: 0 2px 5px rgba(0,0,0,0.1);
-            margin-bottom: 1rem;
-        }
-        
-        .bank-logo {
-            font-size: 2rem;
-            font-weight: bold;
-            color: #1E88E5;
-        }
-        
-        .bank-logo span {
-            color: #333;
-        }
-        
-        /* Card styling */
-        .bank-card {
-            background-color: white;
-            padding: 1.5rem;
-            border-radius: 10px;
-            box-shadow: 0 2px 5px rgba(0,0,0,0.1);
-            margin-bottom: 1rem;
-            transition: transform 0.3s;
-        }
-        
-        .bank-card:hover {
-            transform: translateY(-5px);
-        }
-        
-        .card-title {
-            font-size: 1.25rem;
-            font-weight: bold;
-            margin-bottom: 0.5rem;
-            color: #1E88E5;
-        }
-        
-        /* Feature box styling */
-        .feature-box {
-            background-color: #f0f7ff;
-            padding: 1rem;
-            border-radius: 10px;
-            border-left: 4px solid #1E88E5;
-            margin-bottom: 1rem;
-        }
-        
-        /* Button styling */
-        .stButton>button {
-            background-color: #1E88E5;
-            color: white;
-            border: none;
-            border-radius: 5px;
-            padding: 0.5rem 1rem;
-            font-weight: bold;
-        }
-        
-        .stButton>button:hover {
-            background-color: #1565C0;
-        }
-        
-        /* Chat container */
-        .chat-container {
-            position: fixed;
-            bottom: 20px;
-            right: 20px;
-            width: 350px;
-            background-color: white;
-            border-radius: 10px;
-            box-shadow: 0 4px 12px rgba(0,0,0,0.15);
-            z-index: 1000;
-        }
-        
-        .chat-header {
-            background-color: #1E88E5;
-            color: white;
-            padding: 10px 15px;
-            border-top-left-radius: 10px;
-            border-top-right-radius: 10px;
-            font-weight: bold;
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-        }
-        
-        .chat-body {
-            height: 300px;
-            overflow-y: auto;
-            padding: 15px;
-        }
-        
-        .chat-footer {
-            padding: 10px 15px;
-            border-top: 1px solid #eee;
-        }
-        
-        /* Chat toggle button */
-        .chat-toggle {
-            position: fixed;
-            bottom: 20px;
-            right: 20px;
-            width: 60px;
-            height: 60px;
-            background-color: #1E88E5;
-            color: white;
-            border-radius: 50%;
-            display: flex;
-            justify-content: center;
-            align-items: center;
-            box-shadow: 0 4px 12px rgba(0,0,0,0.15);
-            cursor: pointer;
-            z-index: 1001;
-        }
-        
-        /* Hide default Streamlit elements */
-        #MainMenu {visibility: hidden;}
-        footer {visibility: hidden;}
-        .viewerBadge_container__1QSob {display: none;}
-        
-        /* Testimonial styling */
-        .testimonial {
-            background-color: #f8f9fa;
-            padding: 1rem;
-            border-radius: 10px;
-            border-left: 4px solid #4CAF50;
-            margin-bottom: 1rem;
-            font-style: italic;
-        }
-        
-        .testimonial-author {
-            font-weight: bold;
-            text-align: right;
-            margin-top: 0.5rem;
-        }
-        
-        /* Hero section */
-        .hero-section {
-            background: linear-gradient(135deg, #1E88E5 0%, #1565C0 100%);
-            color: white;
-            padding: 2rem;
-            border-radius: 10px;
-            margin-bottom: 1.5rem;
-        }
-        
-        .hero-title {
-            font-size: 2.5rem;
-            font-weight: bold;
-            margin-bottom: 1rem;
-        }
-        
-        .hero-subtitle {
-            font-size: 1.25rem;
-            margin-bottom: 1.5rem;
-            opacity: 0.9;
-        }
-        
-        /* Chat message styling */
-        .user-message {
-            background-color: #1E88E5;
-            color: white;
-            padding: 10px 15px;
-            border-radius: 18px 18px 0 18px;
-            margin-bottom: 10px;
-            max-width: 80%;
-            margin-left: auto;
-            word-wrap: break-word;
-        }
-        
-        .bot-message {
-            background-color: #f0f0f0;
-            color: #333;
-            padding: 10px 15px;
-            border-radius: 18px 18px 18px 0;
-            margin-bottom: 10px;
-            max-width: 80%;
-            word-wrap: break-word;
-        }
-        
-        /* Navigation styling */
-        .nav-button {
-            background-color: transparent;
-            border: none;
-            color: #1E88E5;
-            font-weight: 500;
-            padding: 0.5rem 1rem;
-            border-radius: 5px;
-            cursor: pointer;
-            transition: background-color 0.3s;
-        }
-        
-        .nav-button:hover {
-            background-color: #f0f7ff;
-        }
-        
-        .nav-button.active {
-            background-color: #1E88E5;
-            color: white;
-        }
-        
-        .nav-container {
-            display: flex;
-            justify-content: space-between;
-            background-color: white;
-            padding: 0.5rem;
-            border-radius: 10px;
-            margin-bottom: 1rem;
-            box-shadow: 0 2px 5px rgba(0,0,0,0.1);
-        }
-    </style>
-    """, unsafe_allow_html=True)
-
-# Load and preprocess dataset
-def load_dataset(file_path):
-    try:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            content = file.read().split("\n\n")
-        questions, answers = [], []
-        for pair in content:
-            if "Q:" in pair and "A:" in pair:
-                q = re.search(r"Q: (.+)", pair)
-                a = re.search(r"A: (.+)", pair, re.DOTALL)
-                if q and a:
-                    questions.append(q.group(1).strip())
-                    answers.append(a.group(1).strip())
-        return questions, answers
-    except FileNotFoundError:
-        # If file not found, return some default Q&A pairs
-        return [
-            "What's my current balance?",
-            "How do I apply for a loan?",
-            "What are your interest rates?",
-            "How do I transfer money?",
-            "What credit cards do you offer?"
-        ], [
-            "Your current balance is $5,432.10.",
-            "You can apply for a loan through our online banking portal or by visiting any branch.",
-            "Our interest rates start at 3.99% for personal loans and 2.75% for mortgages.",
-            "You can transfer money using our mobile app, online banking, or by visiting a branch.",
-            "We offer several credit cards including our Rewards Card, Cash Back Card, and Premium Travel Card."
-        ]
-
-def preprocess(text):
-    text = text.lower()
-    text = re.sub(r"[^a-zA-Z0-9\s]", "", text)
-    return text
-
-def get_most_relevant_answer(user_query, questions, answers):
-    all_text = questions + [user_query]
-    all_text = [preprocess(t) for t in all_text]
-    vectorizer = TfidfVectorizer(stop_words='english')
-    tfidf_matrix = vectorizer.fit_transform(all_text)
-    similarity_scores = cosine_similarity(tfidf_matrix[-1], tfidf_matrix[:-1])
-    best_match_index = np.argmax(similarity_scores)
-    return answers[best_match_index]
+# NovaBot runs in-process, built on first chat and shared across sessions (novabot.bot.create_bot);
+# it watches the dataset for changes and caches answers
+# NOVABOT_RETRIEVER: tfidf (default), dense, hybrid, partitioned, segmented or sharded;
+# only tfidf, hybrid and partitioned tolerate typos such as "chek my ballance"
+# NOVABOT_SHARDS: worker processes for the sharded retriever
+# NOVABOT_URL: use a separately scaled `python -m novabot.server` instead
+# NOVABOT_METRICS_PORT: serve stage timings and counters for Prometheus
+# NOVABOT_PROFILE_SLOW_MS: keep cProfile dumps of slower replies in ./profiles
+# `python -m novabot.artifact build` prebuilds the index so the first chat skips fitting it
+# There is no sign-in, so no customer is passed: transaction questions must name one ("Alice's balance")
+@st.cache_resource
+def get_bot(file_path):
+    from novabot.bot import create_bot
+    from novabot.client import RemoteBot
+
+    if os.environ.get("NOVABOT_METRICS_PORT"):
+        start_metrics_server(int(os.environ["NOVABOT_METRICS_PORT"]))
+    if os.environ.get("NOVABOT_URL"):
+        return RemoteBot(os.environ["NOVABOT_URL"])
+    profiler = None
+    if os.environ.get("NOVABOT_PROFILE_SLOW_MS"):
+        profiler = SlowRequestProfiler(float(os.environ["NOVABOT_PROFILE_SLOW_MS"]))
+    shards = int(os.environ["NOVABOT_SHARDS"]) if os.environ.get("NOVABOT_SHARDS") else None
+    return create_bot(file_path, retriever=os.environ.get("NOVABOT_RETRIEVER", "tfidf"), profiler=profiler,
+                      shards=shards)
+
+DATASET = "novabank_dataset.txt"
+
+# Chat history keeps the last NOVABOT_HISTORY_WINDOW turns per session in memory;
+# older turns are spilled to one SQLite file (NOVABOT_HISTORY_DB, default in the
+# temp directory) and paged back in with "Load older messages".
+HISTORY_PAGE = 20
+# Seconds between streamed answer chunks; set NOVABOT_STREAM_DELAY for a typing effect
+STREAM_DELAY = float(os.environ.get("NOVABOT_STREAM_DELAY", "0"))
+
+@st.cache_resource
+def get_history_store():
+    return SpillStore(os.environ.get("NOVABOT_HISTORY_DB"))
 
 # Initialize session state variables
 if 'chat_history' not in st.session_state:
-    st.session_state.chat_history = [
-        {"role": "assistant", "content": "Hi there! I'm NovaBot, your AI banking assistant. How can I help you today?"}
-    ]
+    st.session_state.chat_history = ChatHistory(
+        window=int(os.environ.get("NOVABOT_HISTORY_WINDOW", "50")),
+        store=get_history_store(), session=uuid.uuid4().hex)
+    st.session_state.chat_history.append(
+        "assistant", "Hi there! I'm NovaBot, your AI banking assistant. How can I help you today?")
+
+# Follow-up questions are scored with the last NOVABOT_CONTEXT_TURNS user messages
+# mixed in, each weighted NOVABOT_CONTEXT_DECAY times less than the one after it
+def get_conversation():
+    if 'conversation' not in st.session_state:
+        from novabot.context import ConversationContext
+
+        st.session_state.conversation = ConversationContext(
+            turns=int(os.environ.get("NOVABOT_CONTEXT_TURNS", "3")),
+            decay=float(os.environ.get("NOVABOT_CONTEXT_DECAY", "0.5")))
+    return st.session_state.conversation
+
+if 'older_shown' not in st.session_state:
+    st.session_state.older_shown = 0
 
 if 'chat_visible' not in st.session_state:
     st.session_state.chat_visible = False
@@ -290,448 +81,98 @@ if 'chat_visible' not in st.session_state:
 if 'current_page' not in st.session_state:
     st.session_state.current_page = "Home"
 
-# Load dataset
-questions, answers = load_dataset("novabank_dataset.txt")
-
 # Apply custom CSS
-local_css()
+st.markdown(CSS, unsafe_allow_html=True)
 
 # Header
-st.markdown("""
-<div class="bank-header">
-    <div class="bank-logo">Nova<span>Bank</span></div>
-</div>
-""", unsafe_allow_html=True)
-
-# Navigation using standard Streamlit components
-st.markdown('<div class="nav-container">', unsafe_allow_html=True)
-col1, col2, col3, col4, col5, col6 = st.columns(6)
-
-with col1:
-    home_btn = st.button("🏠 Home")
-    if home_btn:
-        st.session_state.current_page = "Home"
-        st.rerun()  # FIXED: Changed from st.experimental_rerun()
-
-with col2:
-    accounts_btn = st.button("💳 Accounts")
-    if accounts_btn:
-        st.session_state.current_page = "Accounts"
-        st.rerun()  # FIXED: Changed from st.experimental_rerun()
-
-with col3:
-    loans_btn = st.button("💰 Loans")
-    if loans_btn:
-        st.session_state.current_page = "Loans"
-        st.rerun()  # FIXED: Changed from st.experimental_rerun()
-
-with col4:
-    investments_btn = st.button("📈 Investments")
-    if investments_btn:
-        st.session_state.current_page = "Investments"
-        st.rerun()  # FIXED: Changed from st.experimental_rerun()
-
-with col5:
-    services_btn = st.button("⚙️ Services")
-    if services_btn:
-        st.session_state.current_page = "Services"
-        st.rerun()  # FIXED: Changed from st.experimental_rerun()
+st.markdown(HEADER, unsafe_allow_html=True)
 
-with col6:
-    about_btn = st.button("ℹ️ About")
-    if about_btn:
-        st.session_state.current_page = "About"
-        st.rerun()  # FIXED: Changed from st.experimental_rerun()
+# Navigation: the callback sets the page before this rerun, so a click
+# renders the new page without a second st.rerun()
+def go_to(page):
+    st.session_state.current_page = page
 
+st.markdown('<div class="nav-container">', unsafe_allow_html=True)
+for column, page, label in zip(st.columns(len(PAGE_NAMES)), PAGE_NAMES, NAV_LABELS):
+    with column:
+        st.button(label, on_click=go_to, args=(page,))
 st.markdown('</div>', unsafe_allow_html=True)
 
-# Display current page
-selected = st.session_state.current_page
-
-# Home Page
-if selected == "Home":
-    # Hero Section
-    st.markdown("""
-    <div class="hero-section">
-        <div class="hero-title">Banking Reimagined</div>
-        <div class="hero-subtitle">Experience the future of banking with NovaBank's AI-powered solutions.</div>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    # Features Section
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        st.markdown("""
-        <div class="bank-card">
-            <div class="card-title">Smart Banking</div>
-            <p>Experience banking powered by artificial intelligence that learns and adapts to your financial habits.</p>
-            <div class="feature-box">
-                <strong>✓ AI-Powered Insights</strong><br>
-                <strong>✓ Personalized Recommendations</strong><br>
-                <strong>✓ Automated Savings</strong>
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
-        
-    with col2:
-        st.markdown("""
-        <div class="bank-card">
-            <div class="card-title">Secure Transactions</div>
-            <p>Your security is our priority with state-of-the-art encryption and multi-factor authentication.</p>
-            <div class="feature-box">
-                <strong>✓ Biometric Authentication</strong><br>
-                <strong>✓ Real-time Fraud Detection</strong><br>
-                <strong>✓ End-to-End Encryption</strong>
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
-        
-    with col3:
-        st.markdown("""
-        <div class="bank-card">
-            <div class="card-title">24/7 Support</div>
-            <p>Get help anytime with our AI assistant and dedicated support team available around the clock.</p>
-            <div class="feature-box">
-                <strong>✓ AI Chatbot Assistant</strong><br>
-                <strong>✓ Live Video Banking</strong><br>
-                <strong>✓ Dedicated Advisors</strong>
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    # Testimonials
-    st.subheader("What Our Customers Say")
-    
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        st.markdown("""
-        <div class="testimonial">
-            "NovaBank has completely transformed my banking experience. The AI assistant is incredibly helpful and the app is so intuitive!"
-            <div class="testimonial-author">- Alice Johnson</div>
-        </div>
-        """, unsafe_allow_html=True)
-        
-    with col2:
-        st.markdown("""
-        <div class="testimonial">
-            "The loan application process was so smooth. I got approved in minutes and the funds were in my account the same day!"
-            <div class="testimonial-author">- Bob Smith</div>
-        </div>
-        """, unsafe_allow_html=True)
-
-# Accounts Page
-elif selected == "Accounts":
-    st.header("Banking Accounts")
-    
-    tab1, tab2, tab3 = st.tabs(["Checking", "Savings", "Business"])
-    
-    with tab1:
-        st.markdown("""
-        <div class="bank-card">
-            <div class="card-title">NovaCheck Premium</div>
-            <p>Our flagship checking account with premium benefits and AI-powered financial insights.</p>
-            <div class="feature-box">
-                <strong>✓ No monthly fees</strong><br>
-                <strong>✓ Free ATM withdrawals worldwide</strong><br>
-                <strong>✓ AI-powered spending insights</strong><br>
-                <strong>✓ Cashback on everyday purchases</strong>
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
-        
-        st.button("Open Checking Account", key="open_checking")
-        
-    with tab2:
-        st.markdown("""
-        <div class="bank-card">
-            <div class="card-title">NovaGrow Savings</div>
-            <p>Watch your money grow with our high-yield savings account featuring AI-optimized interest rates.</p>
-            <div class="feature-box">
-                <strong>✓ 3.5% APY</strong><br>
-                <strong>✓ No minimum balance</strong><br>
-                <strong>✓ Automated savings goals</strong><br>
-                <strong>✓ Smart round-up feature</strong>
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
-        
-        st.button("Open Savings Account", key="open_savings")
-        
-    with tab3:
-        st.markdown("""
-        <div class="bank-card">
-            <div class="card-title">NovaBiz Account</div>
-            <p>Designed for businesses of all sizes with powerful tools to manage your company finances.</p>
-            <div class="feature-box">
-                <strong>✓ Free business transactions</strong><br>
-                <strong>✓ Integrated invoicing</strong><br>
-                <strong>✓ Employee expense cards</strong><br>
-                <strong>✓ Business financial insights</strong>
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
-        
-        st.button("Open Business Account", key="open_business")
-
-# Loans Page
-elif selected == "Loans":
-    st.header("Loan Products")
-    
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        st.markdown("""
-        <div class="bank-card">
-            <div class="card-title">Personal Loans</div>
-            <p>Flexible personal loans with competitive rates and quick approval.</p>
-            <div class="feature-box">
-                <strong>✓ Borrow up to $50,000</strong><br>
-                <strong>✓ Rates from 4.99% APR</strong><br>
-                <strong>✓ Terms from 12-60 months</strong><br>
-                <strong>✓ No prepayment penalties</strong>
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
-        
-        st.markdown("""
-        <div class="bank-card">
-            <div class="card-title">Auto Loans</div>
-            <p>Drive away in your dream car with our competitive auto financing.</p>
-            <div class="feature-box">
-                <strong>✓ New and used vehicles</strong><br>
-                <strong>✓ Rates from 3.49% APR</strong><br>
-                <strong>✓ Up to 84-month terms</strong><br>
-                <strong>✓ Quick online approval</strong>
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col2:
-        st.markdown("""
-        <div class="bank-card">
-            <div class="card-title">Home Mortgages</div>
-            <p>Find your dream home with our flexible mortgage options.</p>
-            <div class="feature-box">
-                <strong>✓ Fixed and adjustable rates</strong><br>
-                <strong>✓ First-time homebuyer programs</strong><br>
-                <strong>✓ Refinancing options</strong><br>
-                <strong>✓ Digital application process</strong>
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
-        
-        st.markdown("""
-        <div class="bank-card">
-            <div class="card-title">Business Loans</div>
-            <p>Fuel your business growth with our flexible financing solutions.</p>
-            <div class="feature-box">
-                <strong>✓ Working capital loans</strong><br>
-                <strong>✓ Equipment financing</strong><br>
-                <strong>✓ Commercial real estate</strong><br>
-                <strong>✓ SBA loan options</strong>
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    st.button("Apply for a Loan", key="apply_loan")
-
-# Investments Page
-elif selected == "Investments":
-    st.header("Investment Solutions")
-    
-    tab1, tab2, tab3 = st.tabs(["Retirement", "Brokerage", "Wealth Management"])
-    
-    with tab1:
-        st.markdown("""
-        <div class="bank-card">
-            <div class="card-title">NovaRetire IRA</div>
-            <p>Plan for your future with our tax-advantaged retirement accounts.</p>
-            <div class="feature-box">
-                <strong>✓ Traditional and Roth IRAs</strong><br>
-                <strong>✓ AI-powered retirement planning</strong><br>
-                <strong>✓ Automatic contributions</strong><br>
-                <strong>✓ Low-fee investment options</strong>
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
-        
-        st.button("Open Retirement Account", key="open_retirement")
-        
-    with tab2:
-        st.markdown("""
-        <div class="bank-card">
-            <div class="card-title">NovaTrade</div>
-            <p>Invest in stocks, ETFs, and more with our intuitive trading platform.</p>
-            <div class="feature-box">
-                <strong>✓ Commission-free trades</strong><br>
-                <strong>✓ Fractional shares</strong><br>
-                <strong>✓ Advanced research tools</strong><br>
-                <strong>✓ AI-powered investment suggestions</strong>
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
-        
-        st.button("Open Brokerage Account", key="open_brokerage")
-        
-    with tab3:
-        st.markdown("""
-        <div class="bank-card">
-            <div class="card-title">NovaWealth</div>
-            <p>Comprehensive wealth management with personalized guidance.</p>
-            <div class="feature-box">
-                <strong>✓ Dedicated wealth advisor</strong><br>
-                <strong>✓ Custom investment strategies</strong><br>
-                <strong>✓ Tax optimization</strong><br>
-                <strong>✓ Estate planning</strong>
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
-        
-        st.button("Schedule Consultation", key="schedule_consultation")
-
-# Services Page
-elif selected == "Services":
-    st.header("Banking Services")
-    
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        st.markdown("""
-        <div class="bank-card">
-            <div class="card-title">Online & Mobile Banking</div>
-            <p>Manage your finances anytime, anywhere with our digital banking solutions.</p>
-            <div class="feature-box">
-                <strong>✓ 24/7 account access</strong><br>
-                <strong>✓ Mobile check deposit</strong><br>
-                <strong>✓ Bill pay & transfers</strong><br>
-                <strong>✓ Financial insights dashboard</strong>
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
-        
-        st.markdown("""
-        <div class="bank-card">
-            <div class="card-title">International Services</div>
-            <p>Global banking solutions for travelers and international customers.</p>
-            <div class="feature-box">
-                <strong>✓ Multi-currency accounts</strong><br>
-                <strong>✓ International wire transfers</strong><br>
-                <strong>✓ No foreign transaction fees</strong><br>
-                <strong>✓ Global ATM access</strong>
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col2:
-        st.markdown("""
-        <div class="bank-card">
-            <div class="card-title">Insurance Products</div>
-            <p>Protect what matters most with our comprehensive insurance offerings.</p>
-            <div class="feature-box">
-                <strong>✓ Life insurance</strong><br>
-                <strong>✓ Home & auto insurance</strong><br>
-                <strong>✓ Health insurance</strong><br>
-                <strong>✓ Business insurance</strong>
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
-        
-        st.markdown("""
-        <div class="bank-card">
-            <div class="card-title">Financial Planning</div>
-            <p>Plan for your future with our AI-powered financial planning tools.</p>
-            <div class="feature-box">
-                <strong>✓ Retirement planning</strong><br>
-                <strong>✓ College savings</strong><br>
-                <strong>✓ Budget optimization</strong><br>
-                <strong>✓ Goal-based planning</strong>
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
-
-# About Page
-elif selected == "About":
-    st.header("About NovaBank")
-    
-    st.markdown("""
-    <div class="bank-card">
-        <div class="card-title">Our Story</div>
-        <p>NovaBank was founded in 2020 with a mission to revolutionize banking through artificial intelligence and cutting-edge technology. We believe that banking should be simple, transparent, and personalized to each customer's unique financial journey.</p>
-        <p>As a 100% digital bank, we've eliminated the overhead costs of traditional brick-and-mortar branches, allowing us to offer better rates, lower fees, and innovative features that traditional banks simply can't match.</p>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        st.markdown("""
-        <div class="bank-card">
-            <div class="card-title">Our Mission</div>
-            <p>To empower people to achieve financial wellness through AI-driven insights, personalized guidance, and innovative banking solutions.</p>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col2:
-        st.markdown("""
-        <div class="bank-card">
-            <div class="card-title">Our Vision</div>
-            <p>To become the world's leading AI-powered financial institution, setting new standards for how people interact with their money.</p>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    st.markdown("""
-    <div class="bank-card">
-        <div class="card-title">NovaBot AI Assistant</div>
-        <p>At the heart of our banking experience is NovaBot, our advanced AI assistant. NovaBot can answer questions about your accounts, help you make transactions, provide financial insights, and much more.</p>
-        <p>Powered by natural language processing and machine learning, NovaBot understands your questions and provides personalized responses based on your financial situation and history.</p>
-    </div>
-    """, unsafe_allow_html=True)
-
-# Chat toggle button (using Streamlit components)
-chat_col = st.sidebar.container()
-
-with chat_col:
+# Display current page from its prebuilt layout
+render_page(PAGES[st.session_state.current_page])
+
+# Chat sidebar. It is a fragment: its widgets rerun only this function, not
+# the page above, and their callbacks update the state before that rerun.
+def show_chat(visible):
+    st.session_state.chat_visible = visible
+
+def show_older():
+    st.session_state.older_shown += HISTORY_PAGE
+
+# Retrieval starts here, in the background, and the answer is streamed below
+# the history once the fragment has rendered the user's message
+def send_message():
+    user_input = st.session_state.chat_input
+    if not user_input:
+        return
+    with METRICS.span("chat_handler"):
+        st.session_state.chat_history.append("user", user_input)
+        st.session_state.pending_answer = get_bot(DATASET).stream(
+            user_input, page=st.session_state.current_page, delay=STREAM_DELAY,
+            context=get_conversation(), session=st.session_state.chat_history.session)
+
+@st.fragment
+def chat_sidebar():
     # Only show the chat toggle if chat is not visible
     if not st.session_state.chat_visible:
-        if st.button("💬 Chat with NovaBot", key="chat_toggle"):
-            st.session_state.chat_visible = True
-            st.rerun()  # FIXED: Changed from st.experimental_rerun()
+        st.button("💬 Chat with NovaBot", key="chat_toggle", on_click=show_chat, args=(True,))
+        return
+
+    st.markdown("### 🤖 NovaBot Assistant")
+
+    # Load dataset, retrieval index and answer cache on first open
+    bot = get_bot(DATASET)
+
+    # Display chat messages as one pre-built HTML block
+    with METRICS.span("render_history"):
+        history = st.session_state.chat_history
+        if st.session_state.older_shown < history.spilled and history.store is not None:
+            st.button("⬆️ Load older messages", key="load_older", on_click=show_older)
+        history_slot = st.empty()
+        history_slot.markdown(history.older_html(st.session_state.older_shown) + history.html(),
+                              unsafe_allow_html=True)
+
+    # Stream a pending answer below the history, then move it into the history
+    if st.session_state.get("pending_answer") is not None:
+        stream = st.session_state.pending_answer
+        st.session_state.pending_answer = None
+        # Written chunk by chunk into one slot: st.write_stream would import
+        # pandas on the first answer just to check the stream's type
+        answer_slot = st.empty()
+        text = ""
+        for chunk in stream:
+            text += chunk
+            answer_slot.markdown(message_html("assistant", text), unsafe_allow_html=True)
+        history.append("assistant", stream.text)
+        answer_slot.empty()
+        history_slot.markdown(history.older_html(st.session_state.older_shown) + history.html(),
+                              unsafe_allow_html=True)
 
-# Chat interface
-if st.session_state.chat_visible:
-    st.sidebar.markdown("### 🤖 NovaBot Assistant")
-    
-    # Display chat messages
-    for message in st.session_state.chat_history:
-        if message["role"] == "user":
-            st.sidebar.markdown(f"<div class='user-message'>{message['content']}</div>", unsafe_allow_html=True)
-        else:
-            st.sidebar.markdown(f"<div class='bot-message'>{message['content']}</div>", unsafe_allow_html=True)
-    
     # Chat input
-    with st.sidebar.form(key="chat_form", clear_on_submit=True):
-        user_input = st.text_input("Type your message:", placeholder="Ask me anything about banking...")
-        submit_button = st.form_submit_button("Send")
-        
-        if submit_button and user_input:
-            # Add user message to chat history
-            st.session_state.chat_history.append({"role": "user", "content": user_input})
-            
-            # Get bot response
-            bot_response = get_most_relevant_answer(user_input, questions, answers)
-            
-            # Add bot response to chat history
-            st.session_state.chat_history.append({"role": "assistant", "content": bot_response})
-            
-            # Force a rerun to update the chat display
-            st.rerun()  # FIXED: Changed from st.experimental_rerun()
-    
+    with st.form(key="chat_form", clear_on_submit=True):
+        st.text_input("Type your message:", placeholder="Ask me anything about banking...", key="chat_input")
+        st.form_submit_button("Send", on_click=send_message)
+
     # Close chat button
-    if st.sidebar.button("Close Chat", key="close_chat"):
-        st.session_state.chat_visible = False
-        st.rerun()  # FIXED: Changed from st.experimental_rerun()
+    st.button("Close Chat", key="close_chat", on_click=show_chat, args=(False,))
+
+    # Assistant diagnostics, shown with ?debug=1
+    if st.query_params.get("debug") == "1":
+        with st.expander("NovaBot diagnostics"):
+            st.json(bot.stats())
+
+with st.sidebar:
+    chat_sidebar()
 
 # Run the main function
 if __name__ == "__main__":
@@ -0,0 +1,45 @@
+"""Throughput of TfidfIndex.answer_batch vs. answering queries one at a time.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_batch --size 100000 --queries 5000 --k 5
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.corpus import load_corpus, sample_queries
+from novabot.retrieval import TfidfIndex
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=5000)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--batch-sizes", default="1,64,512,4096")
+    args = parser.parse_args()
+
+    questions, answers = load_corpus(args.size)
+    queries = sample_queries(questions, args.queries)
+    index = TfidfIndex(questions, answers)
+
+    start = time.perf_counter()
+    singles = [index.best_match(q)[1] for q in queries]
+    elapsed = time.perf_counter() - start
+    print("%-22s %10.0f queries/s" % ("best_match loop", len(queries) / elapsed))
+
+    for batch_size in [int(b) for b in args.batch_sizes.split(",")]:
+        start = time.perf_counter()
+        scores = [index.answer_batch(queries[i:i + batch_size], args.k)[1]
+                  for i in range(0, len(queries), batch_size)]
+        elapsed = time.perf_counter() - start
+        # Compare scores rather than indices: tied questions may be returned in any order
+        agree = np.mean(np.isclose(np.vstack(scores)[:, 0], singles))
+        print("%-22s %10.0f queries/s   top-1 score agreement %.3f" % (
+            "answer_batch (b=%d)" % batch_size, len(queries) / elapsed, agree))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Multi-turn accuracy and per-turn cost of conversation context.
+
+Conversations run over every FAQ template x banking subject question
+("How do I check my savings account?"), padded with ``--size`` synthetic
+questions. After an opening question each turn is one of:
+
+- ``subject``: the same question about another subject ("what about my ira?")
+- ``action``: another question about the same subject ("can I cancel it online?")
+- ``new``: a full, unrelated question, which context should not spoil
+
+Top-1 accuracy per kind is reported without context and for each decay,
+with the time per turn, and the cost of re-vectorizing the whole history
+every turn for comparison.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_context --size 100000 --decays 0.3,0.5,0.7
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.corpus import _SUBJECTS, _TEMPLATES, synthetic_questions
+from novabot.context import ConversationContext
+from novabot.retrieval import TfidfIndex, preprocess
+
+_FOLLOW_ACTION = [
+    "how do I check it?", "can I update it?", "what's the fee?", "can I cancel it online?",
+    "where do I find it in the app?", "why was it declined?", "how long does it take to process?",
+    "is there a limit?", "can I set one up for my family?", "what documents do I need?",
+]
+_FOLLOW_SUBJECT = ["what about my {s}?", "and for a {s}?", "same for {s}?"]
+KINDS = ("subject", "action", "new")
+
+
+def grid_question(t, s):
+    return _TEMPLATES[t].format(s=_SUBJECTS[s], m="family")
+
+
+def conversations(n, turns, seed=0):
+    """``n`` conversations as lists of ``(query, (t, s), kind)``."""
+    rng = np.random.default_rng(seed)
+    result = []
+    for _ in range(n):
+        t, s = int(rng.integers(len(_TEMPLATES))), int(rng.integers(len(_SUBJECTS)))
+        conversation = [(grid_question(t, s), (t, s), "open")]
+        for _ in range(turns - 1):
+            kind = KINDS[int(rng.integers(len(KINDS)))]
+            if kind == "subject":
+                s = int(rng.integers(len(_SUBJECTS)))
+                query = _FOLLOW_SUBJECT[int(rng.integers(len(_FOLLOW_SUBJECT)))].format(s=_SUBJECTS[s])
+            elif kind == "action":
+                t = int(rng.integers(len(_TEMPLATES)))
+                query = _FOLLOW_ACTION[t]
+            else:
+                t, s = int(rng.integers(len(_TEMPLATES))), int(rng.integers(len(_SUBJECTS)))
+                query = grid_question(t, s)
+            conversation.append((query, (t, s), kind))
+        result.append(conversation)
+    return result
+
+
+def run(index, dialogues, make_context):
+    correct = {kind: [] for kind in KINDS}
+    timings = []
+    for dialogue in dialogues:
+        context = make_context()
+        for query, (t, s), kind in dialogue:
+            start = time.perf_counter()
+            best, _ = index.best_match(query, context=context)
+            timings.append(time.perf_counter() - start)
+            if kind in correct:
+                correct[kind].append(index.questions[best] == grid_question(t, s))
+    return {kind: np.mean(hits) for kind, hits in correct.items()}, np.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=10000)
+    parser.add_argument("--conversations", type=int, default=300)
+    parser.add_argument("--turns", type=int, default=4)
+    parser.add_argument("--window", type=int, default=3)
+    parser.add_argument("--decays", default="0.3,0.5,0.7")
+    args = parser.parse_args()
+
+    questions = [grid_question(t, s) for t in range(len(_TEMPLATES)) for s in range(len(_SUBJECTS))]
+    answers = ["Answer about %s" % q for q in questions]
+    extra_q, extra_a = synthetic_questions(args.size)
+    index = TfidfIndex(questions + extra_q, answers + extra_a)
+    dialogues = conversations(args.conversations, args.turns)
+
+    print("%-14s %9s %9s %9s %12s" % ("context", "subject", "action", "new", "ms / turn"))
+    accuracy, ms = run(index, dialogues, lambda: None)
+    print("%-14s %9.3f %9.3f %9.3f %12.3f" % ("none", accuracy["subject"], accuracy["action"], accuracy["new"], ms))
+    for decay in [float(d) for d in args.decays.split(",")]:
+        accuracy, ms = run(index, dialogues, lambda: ConversationContext(args.window, decay))
+        print("%-14s %9.3f %9.3f %9.3f %12.3f" % (
+            "decay %.2f" % decay, accuracy["subject"], accuracy["action"], accuracy["new"], ms))
+
+    # Context vector cost alone: incremental vs re-vectorizing the kept turns every turn
+    texts = [preprocess(query) for dialogue in dialogues for query, _, _ in dialogue]
+    costs = []
+    for revectorize in (False, True):
+        context = ConversationContext(args.window, 0.5)
+        start = time.perf_counter()
+        for text in texts:
+            if revectorize:
+                context._vectorizer = None
+            context.vector(index.vectorizer, text)
+        costs.append((time.perf_counter() - start) / len(texts) * 1000)
+    print("context vector: %.3f ms incremental, %.3f ms re-vectorizing the last %d turns" % (
+        costs[0], costs[1], args.window))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Dataset load time: regex block parser vs. streaming parser vs. binary cache.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_dataset --sizes 10000,1000000
+"""
+import argparse
+import os
+import re
+import tempfile
+import time
+
+from benchmarks.corpus import write_dataset
+from novabot.dataset import load_corpus
+
+
+def regex_blocks(file_path):
+    # The original load_dataset parser, kept here as the baseline
+    with open(file_path, 'r', encoding='utf-8') as file:
+        content = file.read().split("\n\n")
+    questions, answers = [], []
+    for pair in content:
+        if "Q:" in pair and "A:" in pair:
+            q = re.search(r"Q: (.+)", pair)
+            a = re.search(r"A: (.+)", pair, re.DOTALL)
+            if q and a:
+                questions.append(q.group(1).strip())
+                answers.append(a.group(1).strip())
+    return questions, answers
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10000,1000000")
+    args = parser.parse_args()
+
+    print("%10s %8s %12s %12s %12s %12s" % ("pairs", "MB", "regex s", "stream s", "cached s", "questions s"))
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in [int(s) for s in args.sizes.split(",")]:
+            path = os.path.join(tmp, "faq_%d.txt" % size)
+            write_dataset(path, size)
+            regex, _ = timed(lambda: regex_blocks(path))
+            stream, _ = timed(lambda: load_corpus(path, use_cache=False))
+            load_corpus(path)  # writes the cache
+            cached, corpus = timed(lambda: load_corpus(path))
+            questions, _ = timed(lambda: list(corpus.questions))
+            print("%10d %8.1f %12.3f %12.3f %12.4f %12.3f" % (
+                size, os.path.getsize(path) / 1e6, regex, stream, cached, questions))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Dense retrieval: recall@k vs. latency vs. RAM for exact, IVF and int8 indexes.
+
+Recall is measured against exact float32 search over the same LSA
+embeddings. Synthetic questions often tie, so a returned row counts as a
+hit when its exact score reaches the exact k-th best score. Run from the repository root::
+
+    python -m benchmarks.bench_dense --size 100000 --k 10
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.corpus import load_corpus, sample_queries
+from novabot.dense import DenseIndex, LsaEmbedder
+from novabot.retrieval import TfidfIndex
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--nprobe", default="1,4,16,64")
+    args = parser.parse_args()
+
+    questions, answers = load_corpus(args.size)
+    start = time.perf_counter()
+    embedder = LsaEmbedder(TfidfIndex(questions, answers, pruning=False), dim=args.dim)
+    print("LSA fit (%d dims): %.1f s" % (embedder.svd.n_components, time.perf_counter() - start))
+    query_vectors = embedder.embed(sample_queries(questions, args.queries, keep_ref=True))
+
+    exact = DenseIndex(embedder, questions, answers, vectors=embedder.question_vectors, nlist=None)
+    # Exact k-th best score per query (ids are the identity without IVF)
+    kth = [exact.top_k_vector(v, args.k)[1][-1] for v in query_vectors]
+
+    print("%-24s %10s %10s %10s %10s" % ("index", "recall@k", "p50 ms", "p99 ms", "RAM MB"))
+
+    def report(name, index):
+        timings, recall = [], []
+        for vector, threshold in zip(query_vectors, kth):
+            start = time.perf_counter()
+            rows, _ = index.top_k_vector(vector, args.k)
+            timings.append(time.perf_counter() - start)
+            recall.append(np.mean(exact.vectors[rows] @ vector >= threshold - 1e-6))
+        timings = np.array(timings) * 1000
+        print("%-24s %10.3f %10.3f %10.3f %10.1f" % (
+            name, np.mean(recall), np.percentile(timings, 50), np.percentile(timings, 99), index.nbytes / 1e6))
+
+    report("exact float32", exact)
+    report("exact int8", DenseIndex(embedder, questions, answers, vectors=embedder.question_vectors,
+                                    nlist=None, quantize=True))
+    nlist = int(np.sqrt(len(questions)))
+    for quantize in (False, True):
+        ivf = DenseIndex(embedder, questions, answers, vectors=embedder.question_vectors,
+                         nlist=nlist, quantize=quantize)
+        for nprobe in [int(n) for n in args.nprobe.split(",")]:
+            ivf.nprobe = nprobe
+            report("ivf%d %s nprobe=%d" % (nlist, "int8" if quantize else "f32", nprobe), ivf)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Sidebar rerun time against conversation length with the bounded history.
+
+Each run fills a session's ChatHistory with ``length`` turns and times full
+reruns of App.py through Streamlit's AppTest. With the ring buffer the time
+stays flat; only ``window`` turns are rendered, as one markdown block.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_history --lengths 10,100,1000,10000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lengths", default="10,100,1000,10000")
+    parser.add_argument("--reruns", type=int, default=10)
+    args = parser.parse_args()
+
+    from streamlit.testing.v1 import AppTest
+
+    from novabot.history import ChatHistory, SpillStore
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SpillStore(os.path.join(tmp, "history.sqlite"))
+        print("%8s %10s %12s %12s" % ("turns", "in memory", "rerun ms", "render ms"))
+        for length in [int(n) for n in args.lengths.split(",")]:
+            history = ChatHistory(window=50, store=store, session="bench%d" % length)
+            for i in range(length):
+                history.append("user" if i % 2 else "assistant", "Message %d about my balance." % i)
+            at = AppTest.from_file(os.path.abspath("App.py"), default_timeout=60)
+            at.session_state.chat_history = history
+            at.session_state.chat_visible = True
+            at.run()
+            timings = []
+            for _ in range(args.reruns):
+                start = time.perf_counter()
+                at.run()
+                timings.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            history.html()
+            render = time.perf_counter() - start
+            print("%8d %10d %12.1f %12.4f" % (length, len(history.messages()),
+                                                np.median(timings) * 1000, render * 1000))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Accuracy vs. latency of TF-IDF alone and TF-IDF + BM25 reranking with RRF.
+
+Queries are corpus questions with typos and without the \"(ref ...)\" tag;
+a hit is a top-1 question equal to the source question. Run from the
+repository root::
+
+    python -m benchmarks.bench_hybrid --size 100000 --candidates 10,50,200
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.corpus import add_typos, load_corpus
+from novabot.hybrid import BM25Scorer, HybridRetriever
+from novabot.retrieval import TfidfIndex, preprocess
+
+
+def evaluate(retriever, queries, targets, questions):
+    timings, hits = [], 0
+    for query, target in zip(queries, targets):
+        start = time.perf_counter()
+        best, _ = retriever.best_match(query)
+        timings.append(time.perf_counter() - start)
+        hits += questions[best] == questions[target]
+    timings = np.array(timings) * 1000
+    return hits / len(queries), np.percentile(timings, 50), np.percentile(timings, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--candidates", default="10,50,200")
+    parser.add_argument("--rerank-budget-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    questions, answers = load_corpus(args.size)
+    rng = np.random.default_rng(11)
+    targets = rng.integers(len(questions), size=args.queries)
+    queries = [add_typos(preprocess(questions[i]), rng, 0.3) for i in targets]
+
+    first_stage = TfidfIndex(questions, answers, fuzzy=True)
+    reranker = BM25Scorer(questions, answers)
+
+    print("%-22s %8s %10s %10s %14s %14s" % ("pipeline", "top-1", "p50 ms", "p99 ms", "stage1 mean", "rerank mean"))
+    accuracy, p50, p99 = evaluate(first_stage, queries, targets, questions)
+    print("%-22s %8.3f %10.3f %10.3f" % ("tfidf only", accuracy, p50, p99))
+    for candidates in [int(c) for c in args.candidates.split(",")]:
+        hybrid = HybridRetriever(first_stage, reranker, candidates=candidates,
+                                 rerank_budget_ms=args.rerank_budget_ms)
+        accuracy, p50, p99 = evaluate(hybrid, queries, targets, questions)
+        stats = hybrid.stats()
+        print("%-22s %8.3f %10.3f %10.3f %11.3f ms %11.3f ms" % (
+            "hybrid N=%d" % candidates, accuracy, p50, p99,
+            stats["first_stage"]["mean_ms"], stats["rerank"]["mean_ms"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Changeset apply cost vs. a full refit, and query cost with delta segments.
+
+Each changeset mixes new questions, answer edits and deletions. The last
+column checks that after compaction the segmented index scores exactly like
+a TfidfIndex fitted from scratch on the same entries. Run from the
+repository root::
+
+    python -m benchmarks.bench_incremental --size 100000 --changes 10,100,1000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.corpus import load_corpus, sample_queries, synthetic_questions
+from novabot.retrieval import TfidfIndex
+from novabot.segments import SegmentedIndex
+
+
+def changeset(index, size, rng, seed):
+    questions = list(index.keys)
+    picks = rng.choice(len(questions), size=2 * (size // 3), replace=False)
+    new_questions, new_answers = synthetic_questions(size - len(picks), seed=seed)
+    changes = [{"op": "upsert", "question": "%s (new %d)" % (q, seed), "answer": a}
+               for q, a in zip(new_questions, new_answers)]
+    changes += [{"op": "update", "question": questions[i], "answer": "Edited answer %d." % i}
+                for i in picks[:len(picks) // 2]]
+    changes += [{"op": "delete", "question": questions[i]} for i in picks[len(picks) // 2:]]
+    return changes
+
+
+def query_ms(index, queries):
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        index.best_match(query)
+        timings.append(time.perf_counter() - start)
+    return np.percentile(np.array(timings) * 1000, 50)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--changes", default="10,100,1000")
+    parser.add_argument("--queries", type=int, default=300)
+    args = parser.parse_args()
+
+    questions, answers = load_corpus(args.size)
+    entries = dict(zip(questions, answers))
+    index = SegmentedIndex(list(entries), list(entries.values()), max_segments=64)
+    queries = sample_queries(list(entries), args.queries)
+    rng = np.random.default_rng(3)
+    base_ms = query_ms(index, queries)
+
+    print("%8s %12s %12s %10s %14s %14s" % ("changes", "apply ms", "refit ms", "segments", "query p50 ms",
+                                            "compact diff"))
+    for seed, size in enumerate(int(c) for c in args.changes.split(",")):
+        changes = changeset(index, size, rng, seed + 1)
+        start = time.perf_counter()
+        index.apply(changes)
+        apply_ms = (time.perf_counter() - start) * 1000
+        segments = len(index._view[0])
+        delta_ms = query_ms(index, queries)
+
+        live = list(index.keys)
+        live_answers = [index.answers[index.keys[q]] for q in live]
+        start = time.perf_counter()
+        refit = TfidfIndex(live, live_answers, pruning=False)
+        refit_ms = (time.perf_counter() - start) * 1000
+        index.compact()
+        _, ours = index.answer_batch(queries, 5)
+        _, theirs = refit.answer_batch(queries, 5)
+        print("%8d %12.1f %12.1f %10d %14.3f %14.2e" % (
+            len(changes), apply_ms, refit_ms, segments, delta_ms, np.abs(ours - theirs).max()))
+    print("query p50 before any change: %.3f ms" % base_ms)
+
+
+if __name__ == "__main__":
+    main()
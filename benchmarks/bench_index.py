@@ -0,0 +1,77 @@
+"""Per-query latency: refitting TF-IDF per message vs. the persistent index.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_index --sizes 29,10000,1000000
+"""
+import argparse
+import re
+import time
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+
+from benchmarks.corpus import load_corpus, sample_queries
+from novabot.retrieval import TfidfIndex
+
+
+def baseline_preprocess(text):
+    text = text.lower()
+    text = re.sub(r"[^a-zA-Z0-9\s]", "", text)
+    return text
+
+
+def refit_per_query(user_query, questions, answers):
+    # The original App.py implementation, kept here as the baseline
+    all_text = questions + [user_query]
+    all_text = [baseline_preprocess(t) for t in all_text]
+    vectorizer = TfidfVectorizer(stop_words='english')
+    tfidf_matrix = vectorizer.fit_transform(all_text)
+    similarity_scores = cosine_similarity(tfidf_matrix[-1], tfidf_matrix[:-1])
+    best_match_index = np.argmax(similarity_scores)
+    return answers[best_match_index]
+
+
+def time_calls(fn, queries):
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        fn(query)
+        timings.append(time.perf_counter() - start)
+    return np.array(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="29,10000,1000000")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--baseline-budget", type=float, default=30.0,
+                        help="seconds of refit baseline to run per corpus size")
+    args = parser.parse_args()
+
+    print("%10s %10s %14s %14s %10s" % ("questions", "build s", "refit ms/q", "index ms/q", "speedup"))
+    for size in [int(s) for s in args.sizes.split(",")]:
+        questions, answers = load_corpus(size)
+        queries = sample_queries(questions, args.queries)
+
+        start = time.perf_counter()
+        index = TfidfIndex(questions, answers)
+        build = time.perf_counter() - start
+        indexed = time_calls(index.answer, queries)
+
+        # The refit path is O(corpus) per query, so cap it by wall time
+        start = time.perf_counter()
+        refit = []
+        for query in queries:
+            refit.extend(time_calls(lambda q: refit_per_query(q, questions, answers), [query]))
+            if time.perf_counter() - start > args.baseline_budget:
+                break
+        refit = np.array(refit)
+
+        print("%10d %10.2f %14.3f %14.3f %9.0fx" % (
+            size, build, np.median(refit), np.median(indexed), np.median(refit) / np.median(indexed)))
+
+
+if __name__ == "__main__":
+    main()
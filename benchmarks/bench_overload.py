@@ -0,0 +1,130 @@
+"""Tail latency under overload, with and without admission control and rate limits.
+
+Builds a bot over ``--size`` synthetic pairs and measures how many
+uncached messages a second it answers one at a time. Then an open-loop
+generator replays chat traffic for ``--duration`` seconds: chat sessions
+sending ``--session-rps`` messages a second each, enough of them to offer
+``--load`` times that capacity, plus ``--hammers`` sessions pressing Send
+``--hammer-rps`` times a second. Each message is submitted to a pool of
+``--threads`` threads at its arrival time, as the app's streaming executor
+does, and its latency runs from arrival to reply.
+
+Configurations: no bounds; admission control only (novabot.admission,
+``--max-active`` slots, ``--max-queued`` waiting up to
+``--queue-timeout-ms``); admission control plus the per-session rate
+limit. Without bounds the backlog and the latency grow for as long as the
+overload lasts; with them, excess messages get cached or "busy" replies
+and the tail stays under the queue timeout.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_overload --size 100000 --load 3
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from benchmarks.corpus import query_log, write_dataset
+from novabot.admission import AdmissionControl, RateLimiter
+from novabot.bot import create_bot
+
+
+def arrivals(rng, sessions, rps, duration, first_session=0):
+    """``(time, session)`` pairs with exponential gaps, ``rps`` per session."""
+    result = []
+    for session in range(first_session, first_session + sessions):
+        t = rng.exponential(1 / rps)
+        while t < duration:
+            result.append((t, "session-%d" % session))
+            t += rng.exponential(1 / rps)
+    return result
+
+
+def replay(bot, schedule, queries, threads):
+    latencies = [0.0] * len(schedule)
+    sources = [None] * len(schedule)
+    done = threading.Event()
+    remaining = [len(schedule)]
+    lock = threading.Lock()
+
+    def handle(i, arrived, session):
+        sources[i] = bot.reply(queries[i % len(queries)], session=session).source
+        latencies[i] = time.perf_counter() - arrived
+        with lock:
+            remaining[0] -= 1
+            if not remaining[0]:
+                done.set()
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        start = time.perf_counter()
+        for i, (offset, session) in enumerate(schedule):
+            delay = start + offset - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            executor.submit(handle, i, start + offset, session)
+        done.wait()
+    return np.array(latencies) * 1000, Counter(sources)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--load", type=float, default=3.0, help="offered load as a multiple of capacity")
+    parser.add_argument("--session-rps", type=float, default=0.5)
+    parser.add_argument("--hammers", type=int, default=2)
+    parser.add_argument("--hammer-rps", type=float, default=50.0)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--max-active", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--max-queued", type=int, default=8)
+    parser.add_argument("--queue-timeout-ms", type=float, default=250.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "dataset.txt")
+        write_dataset(path, args.size)
+        bot = create_bot(path, watch=False, session_rate=None)
+        questions = list(bot.index_manager.current.questions)
+        queries = [entry["query"] for entry in query_log(questions, 200000)]
+
+        sample = queries[-200:]
+        start = time.perf_counter()
+        for query in sample:
+            bot.reply(query)
+        capacity = len(sample) / (time.perf_counter() - start)
+
+        rng = np.random.default_rng(0)
+        sessions = max(1, int(round(args.load * capacity / args.session_rps)))
+        schedule = arrivals(rng, sessions, args.session_rps, args.duration)
+        schedule += arrivals(rng, args.hammers, args.hammer_rps, args.duration, first_session=sessions)
+        schedule.sort()
+        print("capacity %.0f messages/s; offering %.0f/s from %d sessions and %d hammering ones for %.0f s" % (
+            capacity, len(schedule) / args.duration, sessions, args.hammers, args.duration))
+
+        configs = [("no bounds", None, None),
+                   ("admission", None, (args.max_active, args.max_queued, args.queue_timeout_ms / 1000)),
+                   ("admission + rate", (1.0, 5), (args.max_active, args.max_queued, args.queue_timeout_ms / 1000))]
+        print("%-18s %9s %9s %9s %9s %10s %10s %10s" % (
+            "config", "answered", "cache", "limited", "shed", "p50 ms", "p99 ms", "max ms"))
+        for name, limit, admission in configs:
+            bot.cache.clear()
+            bot.limiter = RateLimiter(*limit) if limit else None
+            bot.admission = AdmissionControl(*admission) if admission else None
+            latencies, sources = replay(bot, schedule, queries, args.threads)
+            total = len(latencies)
+            answered = sum(n for source, n in sources.items() if source not in ("cache", "rate_limited", "overloaded"))
+            print("%-18s %8.1f%% %8.1f%% %8.1f%% %8.1f%% %10.1f %10.1f %10.1f" % (
+                name, 100 * answered / total, 100 * sources["cache"] / total,
+                100 * sources["rate_limited"] / total, 100 * sources["overloaded"] / total,
+                *np.percentile(latencies, [50, 99]), latencies.max()))
+        print("admission wait: %s" % {k: round(v, 2) for k, v in bot.stats()["stages"]["admission_wait"].items()})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Rows scored and latency: flat TF-IDF index vs. per-section partitions.
+
+The corpus keeps the real FAQ sections and files synthetic questions under
+their subject. Queries are corpus questions without the "(ref ...)" tag.
+Recall is the share of queries whose routed top-1 score reaches the flat
+index's top-1 score. Run from the repository root::
+
+    python -m benchmarks.bench_partitioned --size 100000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.corpus import sample_queries, sectioned_corpus
+from novabot.partitioned import PartitionedIndex
+from novabot.retrieval import TfidfIndex
+
+
+def timed(function, queries):
+    results, timings = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(function(query))
+        timings.append(time.perf_counter() - start)
+    return results, np.array(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--max-partitions", type=int, default=2)
+    parser.add_argument("--fuzzy", action="store_true")
+    args = parser.parse_args()
+
+    corpus = sectioned_corpus(args.size)
+    queries = sample_queries(corpus.questions, args.queries)
+    flat = TfidfIndex(corpus.questions, corpus.answers, fuzzy=args.fuzzy)
+    partitioned = PartitionedIndex(corpus, max_partitions=args.max_partitions, fuzzy=args.fuzzy)
+    print("%d questions in %d partitions" % (len(corpus), len(partitioned.partitions)))
+
+    flat_results, flat_ms = timed(flat.best_match, queries)
+    routed_results, routed_ms = timed(partitioned.best_match, queries)
+    rows_scored = [partitioned.sizes[partitioned.route(q)].sum() for q in queries]
+    recall = np.mean([routed[1] >= best[1] - 1e-6 for routed, best in zip(routed_results, flat_results)])
+
+    start = time.perf_counter()
+    flat.answer_batch(queries)
+    flat_batch = time.perf_counter() - start
+    start = time.perf_counter()
+    partitioned.answer_batch(queries)
+    routed_batch = time.perf_counter() - start
+
+    print("%-12s %12s %8s %10s %10s %12s" % ("index", "rows/query", "recall", "p50 ms", "p99 ms", "batch q/s"))
+    print("%-12s %12d %8.3f %10.3f %10.3f %12.0f" % (
+        "flat", len(corpus), 1.0, *np.percentile(flat_ms, [50, 99]), len(queries) / flat_batch))
+    print("%-12s %12.0f %8.3f %10.3f %10.3f %12.0f" % (
+        "partitioned", np.mean(rows_scored), recall, *np.percentile(routed_ms, [50, 99]),
+        len(queries) / routed_batch))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Inverted-index MaxScore pruning vs. exact scoring of every question.
+
+Checks that the pruned top-k scores match the exact matrix product and
+reports per-query latency and rows scored for the pruned path alone and
+for TfidfIndex.top_k, which falls back to the matrix product for queries
+made only of very common terms. Indexes are word-only: fuzzy indexes take
+the matrix product for every query (see bench_fuzzy). The same parity is asserted by
+tests/test_inverted.py. Run from the repository root::
+
+    python -m benchmarks.bench_pruning --sizes 10000,100000,500000 --k 5
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.corpus import load_corpus, sample_queries
+from novabot.retrieval import TfidfIndex
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10000,100000,500000")
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--k", type=int, default=1)
+    args = parser.parse_args()
+
+    print("%10s %9s %12s %12s %12s %14s %10s" % (
+        "questions", "queries", "exact ms/q", "pruned ms/q", "top_k ms/q", "rows scored", "mismatches"))
+    for size in [int(s) for s in args.sizes.split(",")]:
+        questions, answers = load_corpus(size)
+        index = TfidfIndex(questions, answers)
+        for kind in ("generic", "specific"):
+            queries = sample_queries(questions, args.queries, keep_ref=kind == "specific")
+            report(index, queries, args.k, size, kind)
+
+
+def report(index, queries, k, size, kind):
+
+    exact, pruned, auto, scored, mismatches = [], [], [], [], 0
+    for query in queries:
+        start = time.perf_counter()
+        _, exact_scores = index.top_k(query, k, exact=True)
+        exact.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        vector = index.transform(query)
+        _, pruned_scores, rows = index.inverted.top_k(vector, k)
+        pruned.append(time.perf_counter() - start)
+        scored.append(rows)
+
+        start = time.perf_counter()
+        index.top_k(query, k)
+        auto.append(time.perf_counter() - start)
+
+        # Exact is the oracle; rows with no shared term score 0 and are not returned
+        expected = exact_scores[exact_scores > 0]
+        if len(pruned_scores) != len(expected) or not np.allclose(pruned_scores, expected):
+            mismatches += 1
+
+    print("%10d %9s %12.3f %12.3f %12.3f %14.0f %10d" % (
+        size, kind, np.mean(exact) * 1000, np.mean(pruned) * 1000, np.mean(auto) * 1000,
+        np.mean(scored), mismatches))
+
+
+if __name__ == "__main__":
+    main()
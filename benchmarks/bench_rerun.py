@@ -0,0 +1,76 @@
+"""Server-side Streamlit rerun time for page navigation and chat messages.
+
+Drives App.py through Streamlit's AppTest and times each interaction's
+script run(s): visiting every page, then sending chat messages. With
+``--baseline REV`` the App.py of that git revision is measured too, from a
+temporary copy in the repository root.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_rerun --baseline HEAD~1
+"""
+import argparse
+import os
+import subprocess
+import time
+
+import numpy as np
+
+PAGE_LABELS = ["💳 Accounts", "💰 Loans", "📈 Investments", "⚙️ Services", "ℹ️ About", "🏠 Home"]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+def measure(path, rounds, messages):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.abspath(path), default_timeout=60)
+    at.run()
+    navigate = []
+    for _ in range(rounds):
+        for label in PAGE_LABELS:
+            button = next(b for b in at.main.button if b.label == label)
+            navigate.append(timed(button.click().run))
+    at.button(key="chat_toggle").click().run()
+    chat = []
+    for i in range(messages):
+        at.sidebar.text_input[0].input("how do I check my balance %d" % i)
+        send = next(b for b in at.sidebar.button if b.label == "Send")
+        chat.append(timed(send.click().run))
+    assert not at.exception, at.exception
+    return np.array(navigate), np.array(chat)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--baseline", help="git revision of App.py to compare against")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--messages", type=int, default=20)
+    args = parser.parse_args()
+
+    apps = [("current", "App.py")]
+    if args.baseline:
+        baseline = "_App_%s.py" % args.baseline.replace("~", "_").replace("/", "_")
+        with open(baseline, "w", encoding="utf-8") as out:
+            out.write(subprocess.run(["git", "show", "%s:App.py" % args.baseline], capture_output=True,
+                                     text=True, check=True).stdout)
+        apps.insert(0, (args.baseline, baseline))
+    print("%-10s %14s %14s %14s %14s" % (
+        "app", "nav p50 ms", "nav p95 ms", "chat p50 ms", "chat p95 ms"))
+    try:
+        for name, path in apps:
+            navigate, chat = measure(path, args.rounds, args.messages)
+            print("%-10s %14.2f %14.2f %14.2f %14.2f" % (
+                name, np.percentile(navigate, 50), np.percentile(navigate, 95),
+                np.percentile(chat, 50), np.percentile(chat, 95)))
+    finally:
+        if args.baseline:
+            os.remove(apps[0][1])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Throughput of sharded multi-process retrieval from 1 to N worker processes.
+
+Writes a synthetic FAQ in the ``novabank_dataset.txt`` format, loads it with
+``load_dataset`` and compares the single-process TfidfIndex (exact sparse
+product, no pruning) with ShardedIndex at each shard count: queries per
+second one at a time and in batches, and whether the top-1 scores agree.
+Throughput only scales up to the number of cores.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_sharded --size 1000000 --shards 1,2,4,8
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.corpus import sample_queries, write_dataset
+from novabot.dataset import load_dataset
+from novabot.retrieval import TfidfIndex
+from novabot.sharded import ShardedIndex
+
+
+def throughput(index, queries, batch):
+    start = time.perf_counter()
+    for query in queries[:200]:
+        index.top_k(query, 1)
+    single = min(len(queries), 200) / (time.perf_counter() - start)
+    start = time.perf_counter()
+    scores = []
+    for i in range(0, len(queries), batch):
+        scores.append(index.answer_batch(queries[i:i + batch], 1)[1][:, 0])
+    batched = len(queries) / (time.perf_counter() - start)
+    return single, batched, np.concatenate(scores)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=1000000)
+    parser.add_argument("--shards", default=",".join(str(2 ** i) for i in range(4)))
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=256)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "faq.txt")
+        write_dataset(path, args.size)
+        questions, answers = load_dataset(path)
+    queries = sample_queries(questions, args.queries, keep_ref=True)
+    print("%d questions, %d cores" % (len(questions), os.cpu_count()))
+
+    print("%-12s %10s %12s %12s %10s" % ("index", "build s", "single q/s", "batch q/s", "top-1 ok"))
+    start = time.perf_counter()
+    baseline = TfidfIndex(questions, answers, pruning=False)
+    build = time.perf_counter() - start
+    single, batched, expected = throughput(baseline, queries, args.batch)
+    print("%-12s %10.2f %12.0f %12.0f %10s" % ("1 process", build, single, batched, "-"))
+    for shards in [int(n) for n in args.shards.split(",")]:
+        start = time.perf_counter()
+        index = ShardedIndex(questions, answers, shards=shards)
+        build = time.perf_counter() - start
+        try:
+            single, batched, scores = throughput(index, queries, args.batch)
+        finally:
+            index.close()
+        agree = np.mean(np.abs(scores - expected) < 1e-9)
+        print("%-12s %10.2f %12.0f %12.0f %10.3f" % ("%d shards" % shards, build, single, batched, agree))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Cold start: import time and time to the first answer, fitted vs prebuilt index.
+
+Every measurement runs in a fresh interpreter, in a temporary directory
+holding a copy of App.py and the dataset (the app's own, or a synthetic one
+of ``--size`` pairs), once without and once with a prebuilt artifact
+(novabot.artifact):
+
+- ``bot``: importing novabot.bot, then ``create_bot`` plus one answer
+- ``app``: App.py's first page load through AppTest, opening the chat and
+  the first answer
+
+Each figure is the median of ``--runs`` processes. The last column says
+whether scikit-learn had been imported: after the first answer for ``bot``,
+after the first page load for ``app``.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_startup --size 100000
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+DATASET = "novabank_dataset.txt"
+QUERY = "how do I check my balance"
+
+
+def child_bot():
+    start = time.perf_counter()
+    from novabot.bot import create_bot
+
+    imported = time.perf_counter()
+    bot = create_bot(DATASET, watch=False)
+    bot.answer(QUERY)
+    return {"import_s": imported - start, "first_answer_s": time.perf_counter() - imported,
+            "sklearn": "sklearn" in sys.modules}
+
+
+def child_app():
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.abspath("App.py"), default_timeout=600)
+    start = time.perf_counter()
+    at.run()
+    page = time.perf_counter()
+    sklearn = "sklearn" in sys.modules
+    at.button(key="chat_toggle").click().run()
+    opened = time.perf_counter()
+    at.sidebar.text_input[0].input(QUERY)
+    next(b for b in at.sidebar.button if b.label == "Send").click().run()
+    assert not at.exception, at.exception
+    return {"page_s": page - start, "chat_open_s": opened - page, "first_answer_s": time.perf_counter() - opened,
+            "sklearn": sklearn}
+
+
+def run_child(kind, workdir, runs):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=root, NOVABOT_STREAM_DELAY="0",
+               NOVABOT_HISTORY_DB=os.path.join(workdir, "history.sqlite"))
+    results = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-m", "benchmarks.bench_startup", "--child", kind], cwd=workdir,
+                                env=env, capture_output=True, text=True, check=True).stdout
+        results.append(json.loads(output.splitlines()[-1]))
+    summary = {key: statistics.median(r[key] for r in results) for key in results[0] if key != "sklearn"}
+    summary["sklearn"] = any(r["sklearn"] for r in results)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, help="synthetic pairs (default: the app's dataset)")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--child", choices=["bot", "app"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        print(json.dumps(child_bot() if args.child == "bot" else child_app()))
+        return
+
+    from novabot.artifact import build_artifact
+
+    workdir = tempfile.mkdtemp(prefix="novabot-startup-")
+    try:
+        shutil.copy("App.py", workdir)
+        dataset = os.path.join(workdir, DATASET)
+        if args.size:
+            from benchmarks.corpus import write_dataset
+
+            write_dataset(dataset, args.size)
+        else:
+            shutil.copy(DATASET, dataset)
+        print("%-10s %-5s %12s %12s %12s %16s %8s" % (
+            "index", "run", "import s", "page s", "chat open s", "first answer s", "sklearn"))
+        for mode in ("fit", "artifact"):
+            if mode == "artifact":
+                start = time.perf_counter()
+                path = build_artifact(dataset)
+                print("artifact built in %.2f s, %.1f MB" % (
+                    time.perf_counter() - start, os.path.getsize(path) / 2 ** 20))
+            bot = run_child("bot", workdir, args.runs)
+            print("%-10s %-5s %12.3f %12s %12s %16.3f %8s" % (
+                mode, "bot", bot["import_s"], "-", "-", bot["first_answer_s"], bot["sklearn"]))
+            app = run_child("app", workdir, args.runs)
+            print("%-10s %-5s %12s %12.3f %12.3f %16.3f %8s" % (
+                mode, "app", "-", app["page_s"], app["chat_open_s"], app["first_answer_s"], app["sklearn"]))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Latency of personalized answers: slot values per message vs. cached and batched.
+
+Replays ``--messages`` chat messages from ``--customers`` signed-in
+customers against the app's dataset, ``--templated`` of them asking
+questions whose answers have slots (novabot.templates). Slot values come
+from a LocalProvider that sleeps ``--latency-ms`` per call, standing in for
+a backend round-trip. Modes:
+
+- ``per message``: values are never reused (TTL 0), one provider call for
+  every templated answer
+- ``ttl cache``: values kept per customer for ``--ttl`` seconds
+- the same two through ``reply_batch`` in batches of ``--batch``, where
+  the customers a batch is missing are fetched with one call
+
+Latency percentiles are per ``reply`` or per ``reply_batch`` call. The
+last line compares rendering a compiled template with parsing it again
+for every answer.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_templates --messages 5000 --customers 1000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from novabot.bot import create_bot
+from novabot.templates import AnswerTemplates, LocalProvider, Template
+
+DATASET = "novabank_dataset.txt"
+
+
+def replay(bot, queries, customers, batch):
+    timings = []
+    start = time.perf_counter()
+    for i in range(0, len(queries), batch):
+        began = time.perf_counter()
+        if batch == 1:
+            bot.reply(queries[i], customer=customers[i])
+        else:
+            bot.reply_batch(queries[i:i + batch], customers=customers[i:i + batch])
+        timings.append(time.perf_counter() - began)
+    return time.perf_counter() - start, np.percentile(np.array(timings) * 1000, [50, 99])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--customers", type=int, default=1000)
+    parser.add_argument("--templated", type=float, default=0.5, help="share of messages with slotted answers")
+    parser.add_argument("--latency-ms", type=float, default=2.0)
+    parser.add_argument("--ttl", type=float, default=300.0)
+    parser.add_argument("--batch", type=int, default=64)
+    args = parser.parse_args()
+
+    bot = create_bot(DATASET, watch=False)
+    index = bot.index_manager.current
+    slotted = [q for q, a in zip(index.questions, index.answers) if bot.templates.compile(a) is not None]
+    plain = [q for q, a in zip(index.questions, index.answers) if bot.templates.compile(a) is None]
+    rng = np.random.default_rng(0)
+    queries = [slotted[rng.integers(len(slotted))] if rng.random() < args.templated else plain[rng.integers(len(plain))]
+               for _ in range(args.messages)]
+    customers = ["customer%d" % c for c in rng.integers(args.customers, size=args.messages)]
+    # Answers themselves come from the answer cache in every mode
+    bot.reply_batch(queries)
+    print("%d messages, %d customers, %d slotted answers, provider latency %.1f ms" % (
+        args.messages, args.customers, len(slotted), args.latency_ms))
+
+    print("%-24s %10s %12s %10s %10s" % ("mode", "calls", "messages/s", "p50 ms", "p99 ms"))
+    for name, ttl, batch in [("per message", 0.0, 1), ("ttl cache", args.ttl, 1),
+                             ("per batch %d" % args.batch, 0.0, args.batch),
+                             ("ttl cache, batch %d" % args.batch, args.ttl, args.batch)]:
+        provider = LocalProvider(bot.intents.store, latency=args.latency_ms / 1000)
+        bot.templates = AnswerTemplates(provider, ttl=ttl)
+        elapsed, (p50, p99) = replay(bot, queries, customers, batch)
+        print("%-24s %10d %12.0f %10.3f %10.3f" % (name, provider.calls, len(queries) / elapsed, p50, p99))
+
+    templates = AnswerTemplates(LocalProvider(bot.intents.store))
+    answers = [a for a in index.answers if templates.compile(a) is not None] * 2000
+    values = templates.values.get_many([None])[None]
+    start = time.perf_counter()
+    for answer in answers:
+        templates.compile(answer).render(values)
+    compiled = time.perf_counter() - start
+    start = time.perf_counter()
+    for answer in answers:
+        Template(answer).render(values)
+    parsed = time.perf_counter() - start
+    print("render: compiled %.2f us, parsed per answer %.2f us" % (
+        compiled / len(answers) * 1e6, parsed / len(answers) * 1e6))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Query normalization and tokenization throughput, old path vs. novabot.text.
+
+The old path is the one TfidfIndex used before novabot.text: ``lower`` plus
+a regex strip per text, then scikit-learn's ``TfidfVectorizer.transform``,
+which lowercases and tokenizes again and filters stop words. The new path
+is :func:`novabot.text.fold` plus :meth:`WordVectorizer.transform`, which
+maps tokens straight to vocabulary ids. Both vectorizers are fitted on the
+same synthetic questions and replay the same query log, one query per
+call (the chat path) and in batches (log replays). A share of the queries
+gets accented words and prices, which take fold's Unicode branch.
+
+Throughput is in tokens per second, counting the tokens novabot.text finds
+in each query, so both paths are divided by the same number.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_tokenize --size 100000 --queries 100000
+"""
+import argparse
+import re
+import time
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from benchmarks.corpus import query_log, synthetic_questions
+from novabot.text import Tokenizer, WordVectorizer, fold
+
+_NON_ALNUM = re.compile(r"[^a-zA-Z0-9\s]")
+_EXTRAS = [" for my café account", " — costs €22.98?", " ¿qué pasó?", " at $22.98 (naïve)"]
+
+
+def old_preprocess(text):
+    text = text.lower()
+    text = _NON_ALNUM.sub("", text)
+    return text
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=100000)
+    parser.add_argument("--batch", type=int, default=4096)
+    parser.add_argument("--non-ascii", type=float, default=0.1, help="share of queries with accents or prices")
+    args = parser.parse_args()
+
+    questions, _ = synthetic_questions(args.size)
+    rng = np.random.default_rng(3)
+    queries = [entry["query"] for entry in query_log(questions, args.queries)]
+    for i in np.flatnonzero(rng.random(len(queries)) < args.non_ascii):
+        queries[i] += _EXTRAS[i % len(_EXTRAS)]
+
+    old = TfidfVectorizer(stop_words="english").fit([old_preprocess(q) for q in questions])
+    new = WordVectorizer().fit([fold(q) for q in questions])
+    tokenizer = Tokenizer(stop_words=())
+    tokens = sum(len(tokenizer(fold(q))) for q in queries)
+    singles = queries[:max(args.queries // 10, 1)]
+    single_tokens = sum(len(tokenizer(fold(q))) for q in singles)
+    batches = [queries[i:i + args.batch] for i in range(0, len(queries), args.batch)]
+    print("%d queries, %d tokens, %.1f%% non-ASCII" % (
+        len(queries), tokens, 100 * np.mean([not q.isascii() for q in queries])))
+
+    rows = [
+        ("normalize", lambda: [old_preprocess(q) for q in queries], lambda: [fold(q) for q in queries], tokens),
+        ("per query", lambda: [old.transform([old_preprocess(q)]) for q in singles],
+         lambda: [new.transform([fold(q)]) for q in singles], single_tokens),
+        ("batch %d" % args.batch, lambda: [old.transform([old_preprocess(q) for q in b]) for b in batches],
+         lambda: [new.transform([fold(q) for q in b]) for b in batches], tokens),
+    ]
+    print("%-12s %16s %16s %8s" % ("stage", "old tokens/s", "new tokens/s", "speedup"))
+    for name, old_run, new_run, count in rows:
+        old_s = min(timed(old_run) for _ in range(3))
+        new_s = min(timed(new_run) for _ in range(3))
+        print("%-12s %16.0f %16.0f %7.2fx" % (name, count / old_s, count / new_s, old_s / new_s))
+
+
+if __name__ == "__main__":
+    main()
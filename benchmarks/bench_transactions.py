@@ -0,0 +1,94 @@
+"""Transaction questions at scale: indexed column store vs. full scans.
+
+Generates ``--size`` synthetic transactions, saves and memory-maps the
+store, then times per-customer intent questions ("how much did customer42
+spend at Netflix last month") and a cross-customer merchant total, each
+against a boolean-mask scan of the whole columns. Run from the repository
+root::
+
+    python -m benchmarks.bench_transactions --size 10000000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.corpus import synthetic_transactions
+from novabot.intents import TransactionIntents, _PERIOD, period_days
+from novabot.transactions import NO_DATE, TransactionStore
+
+
+def percentiles(timings):
+    return np.percentile(np.array(timings) * 1000, [50, 99])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=10000000)
+    parser.add_argument("--customers", type=int, default=1000000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--scans", type=int, default=20)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    built = synthetic_transactions(args.size, customers=args.customers)
+    print("generated and indexed %d transactions in %.1f s" % (len(built), time.perf_counter() - start))
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "transactions")
+        start = time.perf_counter()
+        built.save(path)
+        saved = time.perf_counter() - start
+        start = time.perf_counter()
+        store = TransactionStore.load(path)
+        print("saved %.0f MB in %.2f s, memory-mapped in %.3f s" % (
+            os.path.getsize(path) / 2 ** 20, saved, time.perf_counter() - start))
+        del built
+
+        intents = TransactionIntents(store)
+        rng = np.random.default_rng(1)
+        customers = rng.integers(args.customers, size=args.queries)
+        merchants = np.minimum(rng.zipf(1.3, size=args.queries) - 1, len(store.merchants) - 1)
+        questions = ["How much did customer%d spend at %s last month?" % (c, store.merchants[m])
+                     for c, m in zip(customers, merchants)]
+
+        timings = []
+        for question in questions:
+            start = time.perf_counter()
+            intents.handle(question)
+            timings.append(time.perf_counter() - start)
+        print("%-34s p50 %8.3f ms  p99 %8.3f ms" % ("intent, indexed", *percentiles(timings)))
+
+        first, last = period_days(_PERIOD.search("last month"), intents.today())
+        indexed, scanned = [], []
+        for c, m in zip(customers[:args.scans], merchants[:args.scans]):
+            start = time.perf_counter()
+            fast = store.total(store.rows(c, 0, m, first, last))
+            indexed.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            mask = ((store.customer == c) & (store.type == 0) & (store.merchant == m)
+                    & (store.day >= first) & (store.day <= last) & (store.day != NO_DATE))
+            slow = int(store.amount[mask].sum())
+            scanned.append(time.perf_counter() - start)
+            assert fast == slow
+        print("%-34s p50 %8.3f ms  p99 %8.3f ms" % ("customer total, indexed", *percentiles(indexed)))
+        print("%-34s p50 %8.3f ms  p99 %8.3f ms" % ("customer total, full scan", *percentiles(scanned)))
+
+        indexed, scanned = [], []
+        for m in rng.integers(len(store.merchants), size=args.scans):
+            start = time.perf_counter()
+            fast = store.total(store.merchant_rows(m, first, last))
+            indexed.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            mask = (store.merchant == m) & (store.day >= first) & (store.day <= last)
+            slow = int(store.amount[mask].sum())
+            scanned.append(time.perf_counter() - start)
+            assert fast == slow
+        print("%-34s p50 %8.3f ms  p99 %8.3f ms" % ("merchant total, indexed", *percentiles(indexed)))
+        print("%-34s p50 %8.3f ms  p99 %8.3f ms" % ("merchant total, full scan", *percentiles(scanned)))
+        del store, intents
+
+
+if __name__ == "__main__":
+    main()
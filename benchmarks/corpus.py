@@ -0,0 +1,193 @@
+import datetime
+import re
+
+import numpy as np
+
+from novabot.dataset import Corpus, load_dataset, parse_dataset
+from novabot.retrieval import preprocess
+
+DATASET = "novabank_dataset.txt"
+
+_SUBJECTS = [
+    "balance", "account", "checking account", "savings account", "joint account",
+    "business account", "student account", "debit card", "credit card", "credit limit",
+    "deposit", "withdrawal", "transfer", "wire transfer", "recurring payment", "bill pay",
+    "statement", "tax form", "fraud report", "dispute", "personal loan", "mortgage",
+    "auto loan", "student loan", "interest rate", "password", "pin", "contact information",
+    "mobile app", "overdraft", "atm", "zelle payment", "direct deposit", "paycheck",
+    "investment account", "ira", "brokerage account", "insurance", "routing number",
+]
+_TEMPLATES = [
+    "How do I check my {s}?",
+    "How can I update my {s}?",
+    "What is the fee for a {s}?",
+    "Can I cancel my {s} online?",
+    "Where do I find my {s} in the app?",
+    "Why was my {s} declined?",
+    "How long does a {s} take to process?",
+    "Is there a limit on my {s}?",
+    "Can I set up a {s} for my {m}?",
+    "What documents do I need for a {s}?",
+]
+_MODIFIERS = [
+    "family", "business", "partner", "child", "landlord", "employer", "travel",
+    "savings goal", "vacation", "emergency fund", "small business", "retirement",
+]
+
+
+def synthetic_questions(n, seed=0):
+    """Return ``n`` distinct FAQ-style questions and matching answers.
+
+    Each question is a template filled with a banking subject, plus a numeric
+    tag so the vocabulary keeps growing with the corpus like a real
+    knowledge base does.
+    """
+    rng = np.random.default_rng(seed)
+    templates = rng.integers(len(_TEMPLATES), size=n)
+    subjects = rng.integers(len(_SUBJECTS), size=n)
+    modifiers = rng.integers(len(_MODIFIERS), size=n)
+    tags = rng.integers(max(n // 4, 1), size=n)
+    questions, answers = [], []
+    for i in range(n):
+        subject = _SUBJECTS[subjects[i]]
+        question = _TEMPLATES[templates[i]].format(s=subject, m=_MODIFIERS[modifiers[i]])
+        questions.append("%s (ref %s%d)" % (question, subject.split()[0], tags[i]))
+        answers.append("Answer %d about %s." % (i, subject))
+    return questions, answers
+
+
+def sample_queries(questions, n, seed=1, keep_ref=False):
+    """Queries drawn from the corpus; without ``keep_ref`` the rare
+    "(ref ...)" tag is dropped, so each query matches many questions."""
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(len(questions), size=n)
+    if keep_ref:
+        return [preprocess(questions[i]) for i in picks]
+    return [preprocess(questions[i]).rsplit(" ref ", 1)[0] for i in picks]
+
+
+def load_corpus(size):
+    """The real FAQ at its natural size, padded with synthetic questions."""
+    questions, answers = load_dataset(DATASET)
+    if size <= len(questions):
+        return questions[:size], answers[:size]
+    extra_q, extra_a = synthetic_questions(size - len(questions))
+    return questions + extra_q, answers + extra_a
+
+
+def sectioned_corpus(size):
+    """:func:`load_corpus` as a Corpus with sections: the real FAQ keeps its
+    headers and each synthetic pair is filed under its banking subject."""
+    with open(DATASET, encoding="utf-8") as file:
+        entries = list(parse_dataset(file))[:size]
+    questions, answers = synthetic_questions(max(size - len(entries), 0))
+    for question, answer in zip(questions, answers):
+        subject = answer.rsplit(" about ", 1)[1].rstrip(".")
+        entries.append((question, answer, "📁 " + subject.upper()))
+    return Corpus.from_entries(entries)
+
+
+def write_dataset(path, size, section_every=1000):
+    """Write ``size`` synthetic pairs in the ``novabank_dataset.txt`` format."""
+    questions, answers = synthetic_questions(size)
+    with open(path, "w", encoding="utf-8") as out:
+        for i, (question, answer) in enumerate(zip(questions, answers)):
+            if i % section_every == 0:
+                out.write("\n\n📄 SECTION %d\n" % (i // section_every))
+            out.write("Q: %s\nA: %s\n\n" % (question, answer))
+
+
+_MERCHANTS = ["Uber", "Netflix", "Walmart", "Starbucks", "Apple Store", "Amazon", "Target", "Costco",
+              "Shell", "Spotify", "Whole Foods", "Home Depot", "Lyft", "Airbnb", "Chipotle"]
+
+
+def synthetic_transactions(n, customers=1000000, merchants=2000, days=365, today=None, seed=0):
+    """A TransactionStore of ``n`` random transactions over the last ``days``.
+
+    Customers are named ``customer<i>``; purchases go to the real merchant
+    names first, then ``Merchant <i>``. Generated column-wise, so 10M rows
+    take a few seconds.
+    """
+    from novabot.transactions import TransactionStore, day_number
+
+    rng = np.random.default_rng(seed)
+    today = day_number(today or datetime.date.today())
+    kind = rng.choice(5, size=n, p=[0.55, 0.15, 0.12, 0.1, 0.08]).astype(np.int8)
+    # A few popular merchants take most purchases
+    merchant = np.minimum(rng.zipf(1.3, size=n) - 1, merchants - 1).astype(np.int32)
+    merchant[kind != 0] = -1
+    amount = np.round(rng.lognormal(3.5, 1.0, size=n) * 100).astype(np.int64)
+    names = (_MERCHANTS + ["Merchant %d" % i for i in range(merchants)])[:merchants]
+    return TransactionStore.from_columns(
+        rng.integers(customers, size=n), kind, merchant, amount, today - rng.integers(days, size=n),
+        ["customer%d" % i for i in range(customers)], names)
+
+
+def add_typos(text, rng, rate=0.5):
+    """Misspell roughly ``rate`` of the words longer than three letters."""
+    words = text.split()
+    for i, word in enumerate(words):
+        if len(word) <= 3 or rng.random() >= rate:
+            continue
+        pos = int(rng.integers(1, len(word) - 1))
+        edit = rng.integers(4)
+        if edit == 0:  # drop a letter
+            word = word[:pos] + word[pos + 1:]
+        elif edit == 1:  # swap neighbours
+            word = word[:pos] + word[pos + 1] + word[pos] + word[pos + 2:]
+        elif edit == 2:  # double a letter
+            word = word[:pos] + word[pos] + word[pos:]
+        else:  # wrong letter
+            word = word[:pos] + chr(int(rng.integers(97, 123))) + word[pos + 1:]
+        words[i] = word
+    return " ".join(words)
+
+
+_PARAPHRASES = [
+    (r"\bhow do i\b", ["how can i", "how would i", "what's the way to"]),
+    (r"\bhow can i\b", ["how do i", "is there a way to"]),
+    (r"\bcheck\b", ["see", "view", "look up"]),
+    (r"\bupdate\b", ["change", "edit"]),
+    (r"\bcancel\b", ["stop", "close"]),
+    (r"\bfind\b", ["locate", "see"]),
+    (r"\bfee\b", ["charge", "cost"]),
+    (r"\bdocuments\b", ["paperwork", "papers"]),
+    (r"\blimit\b", ["cap", "maximum"]),
+    (r"\bdeclined\b", ["rejected", "denied"]),
+    (r"\bset up\b", ["create", "start"]),
+    (r"\bin the app\b", ["on my phone", "in the mobile app"]),
+    (r"\bonline\b", ["on the website", "over the internet"]),
+    (r"\btake to process\b", ["need to go through", "take to clear"]),
+    (r"\bwhat is\b", ["what's", "tell me"]),
+]
+_PREFIXES = ["", "", "hi, ", "quick question: ", "please tell me ", "hey "]
+
+
+def paraphrase(text, rng, rate=0.6):
+    """Reword ``text`` with banking synonyms, each applied with probability ``rate``."""
+    text = text.lower()
+    for pattern, options in _PARAPHRASES:
+        if rng.random() < rate:
+            text = re.sub(pattern, options[int(rng.integers(len(options)))], text, count=1)
+    return _PREFIXES[int(rng.integers(len(_PREFIXES)))] + text
+
+
+QUERY_KINDS = ("exact", "paraphrase", "typo", "paraphrase_typo")
+
+
+def query_log(questions, n, seed=2):
+    """A replayable query log: ``n`` dicts with ``query``, ``target`` (the
+    question index it asks about) and ``kind``, one of :data:`QUERY_KINDS`
+    in turn. The "(ref ...)" tag is kept as plain words so each query has a
+    single right answer."""
+    rng = np.random.default_rng(seed)
+    log = []
+    for i, target in enumerate(rng.integers(len(questions), size=n)):
+        kind = QUERY_KINDS[i % len(QUERY_KINDS)]
+        text = questions[target].replace("(", "").replace(")", "")
+        if kind.startswith("paraphrase"):
+            text = paraphrase(text, rng)
+        if kind.endswith("typo"):
+            text = add_typos(text, rng, rate=0.3)
+        log.append({"query": text, "target": int(target), "kind": kind})
+    return log
@@ -0,0 +1,113 @@
+"""Closed-loop load test for the NovaBot HTTP service: QPS and tail latency.
+
+Starts ``python -m novabot.server`` on a free port unless ``--url`` is given,
+then runs ``--concurrency`` keep-alive clients for ``--duration`` seconds.
+Run from the repository root::
+
+    python -m benchmarks.loadtest --concurrency 1,8,32 --duration 10
+"""
+import argparse
+import asyncio
+import json
+import socket
+import subprocess
+import sys
+import time
+from urllib.parse import urlsplit
+from urllib.request import urlopen
+
+import numpy as np
+
+from benchmarks.corpus import add_typos
+from novabot.dataset import load_dataset
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_ready(url, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urlopen(url + "/health", timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("service at %s did not come up" % url)
+
+
+async def client(host, port, queries, deadline, latencies, rng):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            body = json.dumps({"query": queries[rng.integers(len(queries))]}).encode("utf-8")
+            start = time.perf_counter()
+            writer.write(b"POST /answer HTTP/1.1\r\nHost: %s\r\nContent-Type: application/json\r\n"
+                         b"Content-Length: %d\r\n\r\n%s" % (host.encode(), len(body), body))
+            await writer.drain()
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":")[1])
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+    finally:
+        writer.close()
+
+
+async def run(url, queries, concurrency, duration):
+    parts = urlsplit(url)
+    latencies = []
+    deadline = time.perf_counter() + duration
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        client(parts.hostname, parts.port, queries, deadline, latencies, np.random.default_rng(i))
+        for i in range(concurrency)])
+    return latencies, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url")
+    parser.add_argument("--dataset", default="novabank_dataset.txt")
+    parser.add_argument("--concurrency", default="1,8,32")
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    # Logged traffic is repetitive but not identical: mix exact questions and typos
+    rng = np.random.default_rng(0)
+    questions, _ = load_dataset(args.dataset)
+    queries = questions + [add_typos(q.lower(), rng) for q in questions for _ in range(20)]
+
+    process = None
+    url = args.url
+    if url is None:
+        port = free_port()
+        url = "http://127.0.0.1:%d" % port
+        process = subprocess.Popen([sys.executable, "-m", "novabot.server", "--dataset", args.dataset,
+                                    "--port", str(port), "--workers", str(args.workers)])
+    try:
+        wait_ready(url)
+        print("%12s %10s %10s %10s %10s" % ("concurrency", "QPS", "p50 ms", "p95 ms", "p99 ms"))
+        for concurrency in [int(c) for c in args.concurrency.split(",")]:
+            latencies, elapsed = asyncio.run(run(url, queries, concurrency, args.duration))
+            latencies = np.array(latencies) * 1000
+            print("%12d %10.0f %10.2f %10.2f %10.2f" % (
+                concurrency, len(latencies) / elapsed, *np.percentile(latencies, [50, 95, 99])))
+        with urlopen(url + "/stats") as response:
+            print(json.loads(response.read()))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == "__main__":
+    main()
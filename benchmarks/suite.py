@@ -0,0 +1,280 @@
+"""Reproducible benchmark suite with JSON results and regression gating.
+
+For each scale the suite writes a synthetic FAQ in the
+``novabank_dataset.txt`` Q:/A: format and a query log of exact questions,
+paraphrases and typos (both seeded, so reruns replay the same inputs and
+are reused from ``--workdir``). Each scale is measured in a fresh
+subprocess so peak memory is its own:
+
+- ``load_cold_s``: ``load_dataset`` parsing the text file, ``load_warm_s``:
+  ``load_dataset`` from the binary cache (each the best of ``--repeat`` runs)
+- ``build_s``: building the TfidfIndex the app uses (fuzzy unless
+  ``--no-fuzzy``)
+- ``peak_rss_mb``: peak resident memory above the interpreter's baseline
+- ``p50_ms`` ... ``max_ms``, ``qps``: ``get_most_relevant_answer`` per query
+- ``top1``, ``top1_<kind>``: share of queries answered from their question
+
+Run from the repository root::
+
+    python -m benchmarks.suite run --scales 1000,10000,100000,1000000 --out results.json
+    python -m benchmarks.suite compare baseline.json results.json --tolerance 0.2
+
+``compare`` prints every metric side by side and exits with status 1 if any
+got worse than the tolerance: timings and memory by a relative margin (and
+by more than a small absolute noise floor), accuracy by
+``--accuracy-tolerance`` absolute points.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.corpus import QUERY_KINDS, query_log, write_dataset
+
+# metric -> True if higher is better
+HIGHER_IS_BETTER = {"qps": True, "top1": True}
+HIGHER_IS_BETTER.update({"top1_" + kind: True for kind in QUERY_KINDS})
+# Changes smaller than this, by metric suffix, are noise rather than regressions
+NOISE_FLOOR = {"_s": 0.005, "_ms": 0.05, "_mb": 2.0}
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def _best_of(fn, repeat, budget=2.0, setup=None):
+    """Fastest of up to ``repeat`` runs, stopping early once ``budget``
+    seconds are spent, so large scales run only once."""
+    best, spent = None, 0.0
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+        spent += elapsed
+        if spent >= budget:
+            break
+    return best, result
+
+
+def prepare(workdir, size, queries, seed):
+    """Paths of the dataset and query log for one scale, written if missing."""
+    os.makedirs(workdir, exist_ok=True)
+    dataset = os.path.join(workdir, "faq_%d.txt" % size)
+    log_path = os.path.join(workdir, "queries_%d_%d_%d.jsonl" % (size, queries, seed))
+    if not os.path.exists(dataset):
+        write_dataset(dataset + ".tmp", size)
+        os.replace(dataset + ".tmp", dataset)
+    if not os.path.exists(log_path):
+        from novabot.dataset import load_corpus
+
+        questions = list(load_corpus(dataset, use_cache=False).questions)
+        with open(log_path + ".tmp", "w", encoding="utf-8") as out:
+            for entry in query_log(questions, queries, seed):
+                out.write(json.dumps(entry) + "\n")
+        os.replace(log_path + ".tmp", log_path)
+    return dataset, log_path
+
+
+def measure(dataset, log_path, fuzzy=True, repeat=3, warmup=20):
+    """All metrics for one scale, measured in this process; latencies are
+    each query's fastest of ``repeat`` passes over the log."""
+    from novabot.dataset import CACHE_SUFFIX, load_dataset
+    from novabot.retrieval import TfidfIndex, get_most_relevant_answer
+
+    # A tiny build first, so lazily imported modules are loaded outside the timings
+    TfidfIndex(["warm up question"], ["warm up answer"], fuzzy=fuzzy)
+    baseline_mb = _peak_rss_mb()
+    with open(log_path, encoding="utf-8") as file:
+        log = [json.loads(line) for line in file]
+
+    def drop_cache():
+        if os.path.exists(dataset + CACHE_SUFFIX):
+            os.remove(dataset + CACHE_SUFFIX)
+
+    load_cold, _ = _best_of(lambda: load_dataset(dataset), repeat, setup=drop_cache)
+    load_warm, (questions, answers) = _best_of(lambda: load_dataset(dataset), repeat)
+    build, index = _best_of(lambda: TfidfIndex(questions, answers, fuzzy=fuzzy), repeat)
+
+    for entry in log[:warmup]:
+        get_most_relevant_answer(entry["query"], index)
+    timings = np.full(len(log), np.inf)
+    correct = np.zeros(len(log), dtype=bool)
+    # Synthetic questions can repeat; any answer to the same question counts
+    answer_question = {}
+    for question, answer in zip(questions, answers):
+        answer_question.setdefault(answer, question)
+    for _ in range(repeat):
+        for i, entry in enumerate(log):
+            start = time.perf_counter()
+            answer = get_most_relevant_answer(entry["query"], index)
+            timings[i] = min(timings[i], time.perf_counter() - start)
+            correct[i] = answer_question.get(answer) == questions[entry["target"]]
+
+    timings *= 1000
+    result = {
+        "pairs": len(questions),
+        "queries": len(log),
+        "load_cold_s": load_cold,
+        "load_warm_s": load_warm,
+        "build_s": build,
+        "peak_rss_mb": _peak_rss_mb() - baseline_mb,
+        "mean_ms": float(timings.mean()),
+        "p50_ms": float(np.percentile(timings, 50)),
+        "p90_ms": float(np.percentile(timings, 90)),
+        "p99_ms": float(np.percentile(timings, 99)),
+        "max_ms": float(timings.max()),
+        "qps": len(log) / (timings.sum() / 1000),
+        "top1": float(correct.mean()),
+    }
+    kinds = np.array([entry["kind"] for entry in log])
+    for kind in QUERY_KINDS:
+        if (kinds == kind).any():
+            result["top1_" + kind] = float(correct[kinds == kind].mean())
+    return result
+
+
+def _environment():
+    import scipy
+    import sklearn
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "scipy": scipy.__version__,
+        "sklearn": sklearn.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def run(args):
+    results = {"environment": _environment(),
+               "settings": {"queries": args.queries, "seed": args.seed, "repeat": args.repeat,
+                            "fuzzy": not args.no_fuzzy},
+               "scales": {}}
+    print("%9s %9s %9s %9s %9s %9s %9s %9s %7s" % (
+        "pairs", "cold s", "warm s", "build s", "rss MB", "p50 ms", "p99 ms", "qps", "top-1"))
+    for size in [int(s) for s in args.scales.split(",")]:
+        dataset, log_path = prepare(args.workdir, size, args.queries, args.seed)
+        command = [sys.executable, "-m", "benchmarks.suite", "measure", dataset, log_path,
+                   "--repeat", str(args.repeat)]
+        if args.no_fuzzy:
+            command.append("--no-fuzzy")
+        scale = json.loads(subprocess.run(command, capture_output=True, text=True, check=True).stdout)
+        results["scales"][str(size)] = scale
+        print("%9d %9.3f %9.4f %9.2f %9.1f %9.3f %9.3f %9.0f %7.3f" % (
+            size, scale["load_cold_s"], scale["load_warm_s"], scale["build_s"], scale["peak_rss_mb"],
+            scale["p50_ms"], scale["p99_ms"], scale["qps"], scale["top1"]))
+    with open(args.out, "w", encoding="utf-8") as out:
+        json.dump(results, out, indent=2)
+    print("results written to %s" % args.out)
+
+
+def _worse(metric, old, new, tolerance):
+    if metric == "qps":
+        # Compared as milliseconds per query so the noise floor applies
+        metric, old, new = "per_query_ms", 1000 / old, 1000 / new
+    elif HIGHER_IS_BETTER.get(metric):
+        return new < old * (1 - tolerance)
+    floor = next((v for suffix, v in NOISE_FLOOR.items() if metric.endswith(suffix)), 0.0)
+    return new > old * (1 + tolerance) and new - old > floor
+
+
+def regressions(baseline, current, tolerance=0.2, accuracy_tolerance=0.01):
+    """Yield ``(scale, metric, old, new, regressed)`` for metrics in both runs."""
+    for scale, old_metrics in baseline["scales"].items():
+        new_metrics = current["scales"].get(scale)
+        if new_metrics is None:
+            continue
+        for metric, old in old_metrics.items():
+            new = new_metrics.get(metric)
+            if new is None or metric in ("pairs", "queries"):
+                continue
+            if metric.startswith("top1"):
+                regressed = new < old - accuracy_tolerance
+            else:
+                regressed = _worse(metric, old, new, tolerance)
+            yield scale, metric, old, new, regressed
+
+
+def compare(args):
+    with open(args.baseline, encoding="utf-8") as file:
+        baseline = json.load(file)
+    with open(args.current, encoding="utf-8") as file:
+        current = json.load(file)
+    for name, results in (("baseline", baseline), ("current", current)):
+        env = results["environment"]
+        print("%-8s %s on %s, python %s" % (name, env["commit"], env["machine"], env["python"]))
+    if baseline["settings"] != current["settings"]:
+        print("warning: settings differ: %s vs %s" % (baseline["settings"], current["settings"]))
+
+    failed = 0
+    print("%9s %-20s %12s %12s %8s" % ("pairs", "metric", "baseline", "current", "change"))
+    for scale, metric, old, new, regressed in regressions(
+            baseline, current, args.tolerance, args.accuracy_tolerance):
+        change = (new - old) / old * 100 if old else 0.0
+        print("%9s %-20s %12.4f %12.4f %+7.1f%%%s" % (
+            scale, metric, old, new, change, "  REGRESSION" if regressed else ""))
+        failed += regressed
+    print("%d regression(s)" % failed)
+    return 1 if failed else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="measure every scale and write a JSON file")
+    run_parser.add_argument("--scales", default="1000,10000,100000")
+    run_parser.add_argument("--queries", type=int, default=2000)
+    run_parser.add_argument("--seed", type=int, default=2)
+    run_parser.add_argument("--repeat", type=int, default=3)
+    run_parser.add_argument("--no-fuzzy", action="store_true")
+    run_parser.add_argument("--workdir", default=".bench")
+    run_parser.add_argument("--out", default="benchmark_results.json")
+
+    compare_parser = commands.add_parser("compare", help="flag regressions between two JSON files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--tolerance", type=float, default=0.2,
+                                help="allowed relative slowdown or memory growth")
+    compare_parser.add_argument("--accuracy-tolerance", type=float, default=0.01,
+                                help="allowed drop in top-1 accuracy")
+
+    measure_parser = commands.add_parser("measure", help=argparse.SUPPRESS)
+    measure_parser.add_argument("dataset")
+    measure_parser.add_argument("log")
+    measure_parser.add_argument("--repeat", type=int, default=3)
+    measure_parser.add_argument("--no-fuzzy", action="store_true")
+
+    args = parser.parse_args()
+    if args.command == "run":
+        run(args)
+    elif args.command == "compare":
+        sys.exit(compare(args))
+    else:
+        json.dump(measure(args.dataset, args.log, not args.no_fuzzy, args.repeat), sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
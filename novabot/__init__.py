@@ -0,0 +1 @@
+"""NovaBot retrieval engine used by the NovaBank Streamlit app."""
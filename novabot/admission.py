@@ -0,0 +1,119 @@
+"""Bounds on the retrieval work chat messages can trigger.
+
+:class:`RateLimiter` gives every chat session a token bucket: ``rate``
+messages a second on average, in bursts of up to ``burst``.
+:class:`AdmissionControl` caps how many retrievals run at once; a request
+over the cap waits in a queue of at most ``max_queued`` requests for at
+most ``timeout`` seconds. NovaBot consults both only when a message needs
+retrieval, since cached answers and transaction questions cost next to
+nothing. A message turned away is answered from the cache when it can be
+and with a short "busy" reply otherwise, so a burst degrades a few answers
+instead of everyone's latency.
+
+Time spent waiting for a slot is recorded as the ``admission_wait`` stage
+of :data:`novabot.metrics.METRICS`.
+"""
+import contextlib
+import threading
+import time
+from collections import OrderedDict
+
+from novabot.metrics import METRICS
+
+
+class RateLimiter:
+    """Token buckets per session; the ``max_sessions`` least recently seen
+    are kept, and a session seen again after eviction starts full."""
+
+    def __init__(self, rate=1.0, burst=5, max_sessions=100000, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.max_sessions = max_sessions
+        self.clock = clock
+        self.limited = 0
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def allow(self, session):
+        """Take a token from ``session``'s bucket; False if it is empty."""
+        now = self.clock()
+        with self._lock:
+            bucket = self._buckets.pop(session, None)
+            tokens = self.burst if bucket is None else min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            else:
+                self.limited += 1
+            self._buckets[session] = (tokens, now)
+            if len(self._buckets) > self.max_sessions:
+                self._buckets.popitem(last=False)
+        return allowed
+
+    def stats(self):
+        return {"sessions": len(self._buckets), "limited": self.limited}
+
+
+class AdmissionControl:
+    """At most ``max_active`` holders at a time, ``max_queued`` waiting.
+
+    Keep ``max_active + max_queued`` well under the number of threads
+    calling in: a caller waiting here holds its thread, and once every
+    thread waits, the backlog moves to the pool's own unbounded queue.
+    """
+
+    def __init__(self, max_active=4, max_queued=8, timeout=0.5, registry=METRICS):
+        self.max_active = max_active
+        self.max_queued = max_queued
+        self.timeout = timeout
+        self.registry = registry
+        self.active = self.queued = 0
+        self.admitted = self.rejected = self.timed_out = 0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        """True once a slot is held; False straight away when the queue is
+        full, or after ``timeout`` seconds without a free slot."""
+        start = time.perf_counter()
+        with self._condition:
+            if self.active >= self.max_active or self.queued:
+                if self.queued >= self.max_queued:
+                    self.rejected += 1
+                    return False
+                self.queued += 1
+                try:
+                    deadline = start + self.timeout
+                    while self.active >= self.max_active:
+                        remaining = deadline - time.perf_counter()
+                        if remaining <= 0:
+                            self.timed_out += 1
+                            break
+                        self._condition.wait(remaining)
+                finally:
+                    self.queued -= 1
+                if self.active >= self.max_active:
+                    self.registry.observe("admission_wait", time.perf_counter() - start)
+                    return False
+            self.active += 1
+            self.admitted += 1
+        self.registry.observe("admission_wait", time.perf_counter() - start)
+        return True
+
+    def release(self):
+        with self._condition:
+            self.active -= 1
+            self._condition.notify()
+
+    @contextlib.contextmanager
+    def slot(self):
+        """Context manager yielding whether a slot was acquired."""
+        admitted = self.acquire()
+        try:
+            yield admitted
+        finally:
+            if admitted:
+                self.release()
+
+    def stats(self):
+        return {"active": self.active, "queued": self.queued, "admitted": self.admitted,
+                "rejected": self.rejected, "timed_out": self.timed_out}
@@ -0,0 +1,79 @@
+"""Single-file container for named numpy arrays that can be memory-mapped.
+
+Layout: an 8-byte magic, a little-endian uint64 header length, a JSON header
+describing each array (dtype, shape, byte offset) plus free-form metadata,
+then the raw array buffers aligned to 64 bytes. Files are written to a
+temporary name and renamed into place, so readers never see a partial file.
+"""
+import json
+import os
+import struct
+import tempfile
+
+import numpy as np
+
+MAGIC = b"NOVAARR1"
+_ALIGN = 64
+
+
+def _aligned(offset):
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def write_arrays(path, arrays, meta=None):
+    arrays = {name: np.ascontiguousarray(value) for name, value in arrays.items()}
+    layout = {}
+    offset = 0
+    for name, value in arrays.items():
+        layout[name] = {"dtype": value.dtype.str, "shape": list(value.shape), "offset": offset}
+        offset = _aligned(offset + value.nbytes)
+    header = json.dumps({"meta": meta or {}, "arrays": layout}).encode("utf-8")
+    data_start = _aligned(len(MAGIC) + 8 + len(header))
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=os.path.basename(path))
+    try:
+        with os.fdopen(fd, "wb") as out:
+            out.write(MAGIC)
+            out.write(struct.pack("<Q", len(header)))
+            out.write(header)
+            for name, value in arrays.items():
+                out.seek(data_start + layout[name]["offset"])
+                out.write(value.tobytes())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def _read_header(f):
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError("%s is not a NovaBot array file" % f.name)
+    (length,) = struct.unpack("<Q", f.read(8))
+    header = json.loads(f.read(length).decode("utf-8"))
+    return header, _aligned(len(MAGIC) + 8 + length)
+
+
+def read_meta(path):
+    with open(path, "rb") as f:
+        return _read_header(f)[0]["meta"]
+
+
+def read_arrays(path, mmap=True):
+    """Return ``(meta, arrays)``; arrays are read-only memmaps when ``mmap``."""
+    arrays = {}
+    with open(path, "rb") as f:
+        header, data_start = _read_header(f)
+        for name, spec in header["arrays"].items():
+            dtype = np.dtype(spec["dtype"])
+            shape = tuple(spec["shape"])
+            offset = data_start + spec["offset"]
+            if int(np.prod(shape)) == 0:
+                arrays[name] = np.empty(shape, dtype=dtype)
+            elif mmap:
+                arrays[name] = np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=shape)
+            else:
+                f.seek(offset)
+                arrays[name] = np.fromfile(f, dtype=dtype, count=int(np.prod(shape))).reshape(shape)
+    return header["meta"], arrays
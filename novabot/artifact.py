@@ -0,0 +1,224 @@
+"""Prebuilt TF-IDF index: fit once offline, load without scikit-learn.
+
+Fitting the vectorizer means importing scikit-learn (well over a second)
+and tokenizing every question, on every process start. Instead::
+
+    python -m novabot.artifact build novabank_dataset.txt
+
+fits the index once and writes the vocabulary, IDF weights and the
+L2-normalized question matrix (word level, plus character n-grams unless
+``--no-fuzzy``) with the questions and answers to one
+:mod:`novabot.arrayfile` next to the dataset, ``<dataset>.index``. The file
+is versioned and records the dataset's content hash; the ``tfidf`` builder
+in :mod:`novabot.reloader` memory-maps it when both match and falls back to
+fitting otherwise. Words are weighted by
+:class:`novabot.text.WordVectorizer` either way; character n-grams, fitted
+by scikit-learn, are applied at query time by :class:`PrebuiltVectorizer`,
+which needs only numpy and scipy and returns what the fitted
+``TfidfVectorizer.transform`` would.
+"""
+import argparse
+import re
+
+import numpy as np
+from scipy import sparse
+
+from novabot.arrayfile import read_arrays, read_meta, write_arrays
+from novabot.dataset import TextColumn, file_digest, load_corpus
+from novabot.fuzzy import CharNgramIndex
+from novabot.retrieval import TfidfIndex
+from novabot.text import WordVectorizer, l2_normalize
+
+ARTIFACT_SUFFIX = ".index"
+ARTIFACT_VERSION = 2
+_WHITE_SPACES = re.compile(r"\s\s+")
+
+
+def _char_wb_ngrams(text, min_n, max_n):
+    # scikit-learn's char_wb analyzer: n-grams inside space-padded words
+    ngrams = []
+    for word in _WHITE_SPACES.sub(" ", text).split():
+        word = " " + word + " "
+        for n in range(min_n, max_n + 1):
+            ngrams.extend(word[i:i + n] for i in range(max(len(word) - n, 0) + 1))
+            if len(word) <= n:
+                break
+    return ngrams
+
+
+class PrebuiltVectorizer:
+    """``transform`` of a fitted TfidfVectorizer, from its vocabulary and IDF.
+
+    Covers word unigrams minus stop words and ``char_wb`` n-grams with
+    sublinear tf, the configuration of TfidfIndex's character index; input
+    is lowercased and rows are L2-normalized, as there.
+    """
+
+    def __init__(self, terms, idf, analyzer="word", token_pattern=r"(?u)\b\w\w+\b", stop_words=(),
+                 ngram_range=(1, 1), sublinear_tf=False, dtype="float64"):
+        self.vocabulary_ = {term: column for column, term in enumerate(terms)}
+        self.idf_ = np.asarray(idf)
+        self.analyzer = analyzer
+        self.token_pattern = token_pattern
+        self.stop_words = frozenset(stop_words)
+        self.ngram_range = tuple(ngram_range)
+        self.sublinear_tf = sublinear_tf
+        self.dtype = np.dtype(dtype)
+        if analyzer == "word":
+            tokens = re.compile(token_pattern).findall
+            stop_words = self.stop_words
+            self._analyze = lambda text: [token for token in tokens(text.lower()) if token not in stop_words]
+        else:
+            min_n, max_n = self.ngram_range
+            self._analyze = lambda text: _char_wb_ngrams(text.lower(), min_n, max_n)
+
+    @classmethod
+    def from_sklearn(cls, vectorizer):
+        """Copy a fitted ``TfidfVectorizer``; raise ValueError for settings
+        this class does not reproduce."""
+        word = vectorizer.analyzer == "word" and vectorizer.ngram_range == (1, 1)
+        if (not (word or vectorizer.analyzer == "char_wb") or not vectorizer.lowercase
+                or vectorizer.strip_accents or vectorizer.tokenizer or vectorizer.preprocessor
+                or vectorizer.binary or vectorizer.norm != "l2" or not vectorizer.use_idf):
+            raise ValueError("unsupported TfidfVectorizer settings: %r" % vectorizer)
+        return cls(vectorizer.get_feature_names_out().tolist(), vectorizer.idf_, vectorizer.analyzer,
+                   vectorizer.token_pattern, sorted(vectorizer.get_stop_words() or ()),
+                   vectorizer.ngram_range, vectorizer.sublinear_tf, np.dtype(vectorizer.dtype).name)
+
+    def settings(self):
+        return {"analyzer": self.analyzer, "token_pattern": self.token_pattern,
+                "stop_words": sorted(self.stop_words), "ngram_range": list(self.ngram_range),
+                "sublinear_tf": self.sublinear_tf, "dtype": self.dtype.name}
+
+    def build_analyzer(self):
+        return self._analyze
+
+    def transform(self, texts):
+        vocabulary = self.vocabulary_
+        indices, counts, indptr = [], [], [0]
+        for text in texts:
+            row = {}
+            for token in self._analyze(text):
+                column = vocabulary.get(token)
+                if column is not None:
+                    row[column] = row.get(column, 0) + 1
+            columns = sorted(row)
+            indices.extend(columns)
+            counts.extend(row[column] for column in columns)
+            indptr.append(len(indices))
+        indices = np.array(indices, dtype=np.int32)
+        data = np.array(counts, dtype=self.dtype)
+        if self.sublinear_tf:
+            np.log(data, data)
+            data += 1
+        data *= self.idf_[indices]
+        return l2_normalize(sparse.csr_matrix((data, indices, np.array(indptr, dtype=np.int32)),
+                                              shape=(len(indptr) - 1, len(vocabulary))))
+
+
+def _prebuilt(vectorizer):
+    if isinstance(vectorizer, (PrebuiltVectorizer, WordVectorizer)):
+        return vectorizer
+    return PrebuiltVectorizer.from_sklearn(vectorizer)
+
+
+def _part_arrays(prefix, vectorizer, matrix_t):
+    terms = TextColumn.from_strings(sorted(vectorizer.vocabulary_, key=vectorizer.vocabulary_.get))
+    matrix_t = matrix_t.tocsr()
+    matrix_t.sort_indices()
+    return {prefix + "term_blob": terms.blob, prefix + "term_offsets": terms.offsets,
+            prefix + "idf": np.asarray(vectorizer.idf_), prefix + "data": matrix_t.data,
+            prefix + "indices": matrix_t.indices, prefix + "indptr": matrix_t.indptr}
+
+
+def _part(prefix, arrays, settings, shape):
+    terms = list(TextColumn(arrays[prefix + "term_blob"], arrays[prefix + "term_offsets"]))
+    if settings["analyzer"] == "tokens":
+        vectorizer = WordVectorizer(terms, arrays[prefix + "idf"], settings["stop_words"])
+    else:
+        vectorizer = PrebuiltVectorizer(terms, arrays[prefix + "idf"], **settings)
+    matrix_t = sparse.csr_matrix((arrays[prefix + "data"], arrays[prefix + "indices"], arrays[prefix + "indptr"]),
+                                 shape=tuple(shape), copy=False)
+    return vectorizer, matrix_t
+
+
+def save_index(index, path, source=None):
+    """Write a TfidfIndex to ``path``; ``source`` is the dataset's sha256."""
+    questions = TextColumn.from_strings(index.questions)
+    answers = TextColumn.from_strings(index.answers)
+    arrays = {"question_blob": questions.blob, "question_offsets": questions.offsets,
+              "answer_blob": answers.blob, "answer_offsets": answers.offsets}
+    word = _prebuilt(index.vectorizer)
+    arrays.update(_part_arrays("word_", word, index.matrix_t))
+    meta = {"kind": "tfidf_index", "version": ARTIFACT_VERSION, "source": source,
+            "word": word.settings(), "word_shape": list(index.matrix_t.shape), "char": None}
+    if index.fuzzy is not None:
+        char = _prebuilt(index.fuzzy.vectorizer)
+        arrays.update(_part_arrays("char_", char, index.fuzzy.matrix_t))
+        meta.update(char=char.settings(), char_shape=list(index.fuzzy.matrix_t.shape))
+    write_arrays(path, arrays, meta)
+
+
+def load_index(path, pruning=True, fuzzy=True, fuzzy_weight=0.3):
+    """TfidfIndex from an artifact, memory-mapped; ``fuzzy`` uses its
+    character n-grams if it has them."""
+    meta, arrays = read_arrays(path)
+    if meta.get("kind") != "tfidf_index" or meta.get("version") != ARTIFACT_VERSION:
+        raise ValueError("%s is not a version %d index artifact" % (path, ARTIFACT_VERSION))
+    vectorizer, matrix_t = _part("word_", arrays, meta["word"], meta["word_shape"])
+    char_index = None
+    if fuzzy and meta["char"] is not None:
+        char_index = CharNgramIndex.from_fitted(*_part("char_", arrays, meta["char"], meta["char_shape"]))
+    questions = TextColumn(arrays["question_blob"], arrays["question_offsets"])
+    answers = TextColumn(arrays["answer_blob"], arrays["answer_offsets"])
+    return TfidfIndex.from_fitted(questions, answers, vectorizer, matrix_t, pruning, char_index, fuzzy_weight)
+
+
+def load_prebuilt(file_path, fuzzy=False, **options):
+    """The index in ``file_path``'s artifact, or None unless there is one of
+    this version, built from the file's current content (with character
+    n-grams if ``fuzzy``)."""
+    path = file_path + ARTIFACT_SUFFIX
+    try:
+        meta = read_meta(path)
+        if (meta.get("version") != ARTIFACT_VERSION or (fuzzy and meta.get("char") is None)
+                or meta.get("source") != file_digest(file_path)):
+            return None
+    except (OSError, ValueError):
+        return None
+    return load_index(path, fuzzy=fuzzy, **options)
+
+
+def build_artifact(file_path, path=None, fuzzy=True):
+    """Fit the index for ``file_path`` and write its artifact; return the path."""
+    corpus = load_corpus(file_path)
+    index = TfidfIndex(corpus.questions, corpus.answers, pruning=False, fuzzy=fuzzy)
+    path = path or file_path + ARTIFACT_SUFFIX
+    save_index(index, path, source=file_digest(file_path))
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or inspect prebuilt NovaBot index artifacts.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_parser = commands.add_parser("build", help="fit the index for a dataset and write its artifact")
+    build_parser.add_argument("dataset", nargs="?", default="novabank_dataset.txt")
+    build_parser.add_argument("--out", help="artifact path (default: <dataset>%s)" % ARTIFACT_SUFFIX)
+    build_parser.add_argument("--no-fuzzy", action="store_true", help="leave out the character n-grams")
+    info_parser = commands.add_parser("info", help="print an artifact's metadata")
+    info_parser.add_argument("artifact")
+    args = parser.parse_args()
+    if args.command == "build":
+        path = build_artifact(args.dataset, args.out, not args.no_fuzzy)
+        print("wrote %s" % path)
+    else:
+        meta = read_meta(args.artifact)
+        for part in ("word", "char"):
+            if meta.get(part):
+                meta[part]["stop_words"] = len(meta[part]["stop_words"])
+        for key, value in meta.items():
+            print("%s: %s" % (key, value))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,359 @@
+import contextlib
+import logging
+import os
+import threading
+from collections import Counter, namedtuple
+from functools import partial
+
+from novabot.admission import AdmissionControl, RateLimiter
+from novabot.cache import AnswerCache, normalize_query
+from novabot.intents import TransactionIntents
+from novabot.metrics import METRICS
+from novabot.reloader import BUILDERS, IndexManager
+from novabot.retrieval import preprocess
+from novabot.streaming import stream_answer
+from novabot.templates import AnswerTemplates, LocalProvider
+from novabot.transactions import TransactionStore, load_transactions
+
+logger = logging.getLogger(__name__)
+
+# Retrievers that add character n-gram scores for misspelled queries
+FUZZY_RETRIEVERS = ("tfidf", "hybrid", "partitioned")
+
+DEFAULT_FALLBACK = ("I'm not sure I understood that. Would you like me to connect you "
+                    "to one of our support agents?")
+DEFAULT_BUSY = "I'm handling a lot of messages right now. Please try again in a moment."
+
+# source: "index" (retrieved), "cache" (repeat question), "no_match" (no known
+# term, answered without scoring), "low_score" (best score under min_score) or
+# "intent" (transaction question answered from the transaction store); a
+# message turned away before retrieval gets "rate_limited" (its session is
+# over its rate) or "overloaded" (no retrieval slot)
+Reply = namedtuple("Reply", "text score source")
+
+
+class NovaBot:
+    """Chat entry point: answer cache in front of the live retrieval index.
+
+    Replies scoring under ``min_score`` get ``fallback`` instead of a weak
+    guess; queries without any known term get it straight away, before the
+    query is vectorized or scored. With ``intents``
+    (:class:`novabot.intents.TransactionIntents`) transaction questions are
+    answered from the transaction store first; those answers are per
+    customer and are not cached. Answers are cached with their slots
+    unfilled and rendered per customer by ``templates``
+    (:class:`novabot.templates.AnswerTemplates`).
+
+    Retrieval is bounded by an optional per-session ``limiter``
+    (:class:`novabot.admission.RateLimiter`) and ``admission``
+    (:class:`novabot.admission.AdmissionControl`); a message turned away
+    by either is answered from the cache if possible and with ``busy``
+    otherwise. Stages are timed into
+    :data:`novabot.metrics.METRICS`; an optional ``profiler``
+    (:class:`novabot.metrics.SlowRequestProfiler`) keeps profiles of slow
+    replies.
+    """
+
+    def __init__(self, index_manager, cache=None, min_score=0.15, fallback=DEFAULT_FALLBACK, intents=None,
+                 profiler=None, templates=None, limiter=None, admission=None, busy=DEFAULT_BUSY):
+        self.index_manager = index_manager
+        self.intents = intents
+        self.profiler = profiler
+        self.templates = templates if templates is not None else AnswerTemplates()
+        self.cache = cache if cache is not None else AnswerCache()
+        self.min_score = min_score
+        self.fallback = fallback
+        self.limiter = limiter
+        self.admission = admission
+        self.busy = busy
+        self.counters = Counter()
+        self._lock = threading.Lock()
+        # A rebuilt index can rank differently, so drop every cached answer
+        index_manager.add_listener(self._index_replaced)
+
+    def _index_replaced(self, index):
+        self.cache.clear()
+        self.templates.clear()
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def _scored_reply(self, index, best, score):
+        if score < self.min_score:
+            return Reply(self.fallback, score, "low_score")
+        return Reply(index.answers[best], score, "index")
+
+    def cache_key(self, query, page=None, index=None):
+        """Key ``query`` shares with the queries answered the same way, or
+        None if it has none (nothing but stop words) and must not share."""
+        index = self.index_manager.current if index is None else index
+        key = normalize_query(query, getattr(index, "fuzzy", None) is not None)
+        if not key:
+            return None
+        # Page hints can change the answer, so they are part of the cache key
+        return key if page is None else "%s\x00%s" % (page, key)
+
+    def _intent_reply(self, query, customer=None):
+        if self.intents is None:
+            return None
+        with METRICS.span("intent"):
+            text = self.intents.handle(query, customer)
+        return None if text is None else Reply(text, 1.0, "intent")
+
+    def _render(self, replies, customers):
+        with METRICS.span("render"):
+            texts = self.templates.render_many([reply.text for reply in replies], customers)
+        return [reply if text is reply.text else reply._replace(text=text) for reply, text in zip(replies, texts)]
+
+    def _admitted(self):
+        return self.admission.slot() if self.admission is not None else contextlib.nullcontext(True)
+
+    def _shed(self, cached, source):
+        if cached is not None:
+            self._count("cache")
+            return cached._replace(source="cache")
+        self._count(source)
+        return Reply(self.busy, 0.0, source)
+
+    def _retrieve(self, index, query, page, context=None):
+        options = {} if context is None else {"context": context}
+        match = index.match(query, **options) if page is None else index.match(query, page, **options)
+        if match is None:
+            return Reply(self.fallback, 0.0, "no_match")
+        return self._scored_reply(index, *match)
+
+    def _profile(self, name):
+        return self.profiler.profile(name) if self.profiler is not None else contextlib.nullcontext()
+
+    def reply(self, query, page=None, customer=None, context=None, session=None):
+        """Answer one query; ``page`` is the app page the user is on, used as
+        a routing hint by indexes that accept one, ``customer`` the
+        signed-in customer's name for transaction questions and ``context``
+        the session's :class:`novabot.context.ConversationContext`, which
+        lets follow-up questions borrow terms from earlier turns: a message
+        scoring under ``min_score`` on its own is scored again with them.
+        ``session`` identifies the chat session for the rate limiter."""
+        with self._profile("reply"), METRICS.span("reply"):
+            return self._render([self._reply(query, page, customer, context, session)], [customer])[0]
+
+    def _reply(self, query, page, customer, context=None, session=None):
+        self._count("queries")
+        intent = self._intent_reply(query, customer)
+        if intent is not None:
+            self._count("intent")
+            return intent
+        generation = self.cache.generation
+        index = self.index_manager.current
+        if not getattr(index, "accepts_page", False):
+            page = None
+        if not getattr(index, "accepts_context", False):
+            context = None
+        # Answers are cached for the message alone; earlier turns are mixed in
+        # only when it scores under min_score on its own
+        following = context is not None and len(context) > 0
+        with METRICS.span("cache_lookup"):
+            key = self.cache_key(query, page, index)
+            cached = self.cache.get(key) if key is not None else None
+        if cached is not None and not (following and cached.source == "low_score"):
+            self._count("cache")
+            if context is not None:
+                context.vector(index.vectorizer, preprocess(query))
+            return cached._replace(source="cache")
+
+        if self.limiter is not None and session is not None and not self.limiter.allow(session):
+            return self._shed(cached, "rate_limited")
+        with self._admitted() as admitted:
+            if not admitted:
+                return self._shed(cached, "overloaded")
+            with METRICS.span("retrieve"):
+                reply = alone = cached if cached is not None else self._retrieve(index, query, page)
+                if following and alone.source == "low_score":
+                    reply = self._retrieve(index, query, page, context)
+                elif context is not None and alone.source != "no_match":
+                    context.vector(index.vectorizer, preprocess(query))
+        self._count(reply.source)
+        if key is not None and cached is None:
+            self.cache.put(key, alone, generation)
+        return reply
+
+    def reply_batch(self, queries, pages=None, customers=None):
+        """:meth:`reply` for many queries; cache misses are scored together
+        and the slot values of all ``customers`` are fetched together."""
+        customers = [None] * len(queries) if customers is None else customers
+        with self._profile("reply_batch"), METRICS.span("reply_batch"):
+            return self._render(self._reply_batch(queries, pages, customers), customers)
+
+    def _reply_batch(self, queries, pages, customers):
+        generation = self.cache.generation
+        index = self.index_manager.current
+        if not getattr(index, "accepts_page", False):
+            pages = None
+        keys = [self.cache_key(query, None if pages is None else pages[i], index) for i, query in enumerate(queries)]
+        replies = [None] * len(queries)
+        pending = []
+        for i, (query, key) in enumerate(zip(queries, keys)):
+            intent = self._intent_reply(query, customers[i])
+            if intent is not None:
+                replies[i] = intent
+                continue
+            cached = self.cache.get(key) if key is not None else None
+            if cached is not None:
+                replies[i] = cached._replace(source="cache")
+            elif not index.has_known_terms(query):
+                replies[i] = Reply(self.fallback, 0.0, "no_match")
+            else:
+                pending.append(i)
+        if pending:
+            with self._admitted() as admitted:
+                if admitted:
+                    if pages is None:
+                        best, scores = index.answer_batch([queries[i] for i in pending], 1)
+                    else:
+                        best, scores = index.answer_batch([queries[i] for i in pending], 1,
+                                                          [pages[i] for i in pending])
+                    for i, row, score in zip(pending, best[:, 0], scores[:, 0]):
+                        replies[i] = self._scored_reply(index, int(row), float(score))
+                else:
+                    for i in pending:
+                        replies[i] = Reply(self.busy, 0.0, "overloaded")
+        with self._lock:
+            self.counters["queries"] += len(queries)
+            for reply in replies:
+                self.counters[reply.source] += 1
+        for key, reply in zip(keys, replies):
+            if key is not None and reply.source not in ("cache", "intent", "overloaded"):
+                self.cache.put(key, reply, generation)
+        return replies
+
+    def apply_changeset(self, lines):
+        """Apply a changeset to an index that supports them (novabot.segments).
+
+        Raises ValueError for a malformed changeset; nothing is applied then.
+        """
+        from novabot.segments import read_changeset
+
+        changes = read_changeset(lines)
+        applied = self.index_manager.current.apply(changes)
+        self.cache.clear()
+        return applied
+
+    def answer(self, query, page=None, customer=None, context=None, session=None):
+        return self.reply(query, page, customer, context, session).text
+
+    def stream(self, query, page=None, customer=None, delay=0.0, context=None, session=None):
+        """:meth:`answer` started in the background, as an iterable of text
+        chunks (see novabot.streaming)."""
+        return stream_answer(self.answer, query, page, customer, context, session, delay=delay)
+
+    def stats(self):
+        stats = {"replies": dict(self.counters), "cache": self.cache.stats(), "slots": self.templates.stats(),
+                 "stages": METRICS.stats()}
+        if self.limiter is not None:
+            stats["rate_limiter"] = self.limiter.stats()
+        if self.admission is not None:
+            stats["admission"] = self.admission.stats()
+        index = self.index_manager.current
+        if hasattr(index, "stats"):
+            stats["index"] = index.stats()
+        return stats
+
+    def collect_metrics(self):
+        """Counters for :meth:`novabot.metrics.Registry.add_collector`."""
+        with self._lock:
+            counters = dict(self.counters)
+        cache = self.cache.stats()
+        slots = self.templates.values.stats()
+        replies = [({"source": source}, n) for source, n in sorted(counters.items()) if source != "queries"]
+        fallbacks = counters.get("no_match", 0) + counters.get("low_score", 0)
+        return [
+            ("novabot_queries_total", "counter", "Queries answered.", [({}, counters.get("queries", 0))]),
+            ("novabot_replies_total", "counter", "Replies by source.", replies),
+            ("novabot_fallbacks_total", "counter", "Replies that fell back to the support hand-off.",
+             [({}, fallbacks)]),
+            ("novabot_cache_hits_total", "counter", "Answer cache hits.", [({}, cache["hits"])]),
+            ("novabot_cache_misses_total", "counter", "Answer cache misses.", [({}, cache["misses"])]),
+            ("novabot_cache_evictions_total", "counter", "Answer cache evictions.", [({}, cache["evictions"])]),
+            ("novabot_cache_entries", "gauge", "Answers currently cached.", [({}, cache["entries"])]),
+            ("novabot_slot_cache_hits_total", "counter", "Customers whose slot values were cached.",
+             [({}, slots["hits"])]),
+            ("novabot_slot_fetches_total", "counter", "Slot provider calls.", [({}, slots["fetches"])]),
+            ("novabot_index_questions", "gauge", "Questions in the live index.",
+             [({}, len(self.index_manager.current))]),
+        ] + self._admission_metrics()
+
+    def _admission_metrics(self):
+        metrics = []
+        if self.limiter is not None:
+            metrics.append(("novabot_rate_limited_total", "counter", "Messages over their session's rate.",
+                            [({}, self.limiter.limited)]))
+        if self.admission is not None:
+            admission = self.admission.stats()
+            metrics += [
+                ("novabot_admission_active", "gauge", "Retrievals running.", [({}, admission["active"])]),
+                ("novabot_admission_queue_depth", "gauge", "Retrievals waiting for a slot.",
+                 [({}, admission["queued"])]),
+                ("novabot_admission_rejected_total", "counter", "Retrievals turned away, by reason.",
+                 [({"reason": "queue_full"}, admission["rejected"]),
+                  ({"reason": "timeout"}, admission["timed_out"])]),
+            ]
+        return metrics
+
+
+def create_bot(file_path, watch=True, retriever="tfidf", fuzzy=True, min_score=0.15,
+               cache_entries=10000, cache_ttl=3600, cache_bytes=16 * 1024 * 1024, transactions=None,
+               profiler=None, shards=None, provider=None, slot_ttl=300, session_rate=1.0, session_burst=5,
+               max_active=None, max_queued=8, queue_timeout=0.5):
+    """The NovaBot configuration shared by the Streamlit app and the HTTP service.
+
+    ``retriever`` picks the index: "tfidf" (lexical, with optional ``fuzzy``
+    character matching, loaded from a prebuilt artifact when the dataset has
+    a current one, see novabot.artifact), "dense" (LSA embeddings, see novabot.dense),
+    "hybrid" (TF-IDF candidates reranked with BM25, see novabot.hybrid),
+    "partitioned" (one index per dataset section, see novabot.partitioned),
+    "segmented" (updated in place from changesets, see novabot.segments)
+    or "sharded" (scored by ``shards`` worker processes, one per core by
+    default, see novabot.sharded). ``fuzzy`` applies to tfidf, hybrid and
+    partitioned only; dense, segmented and sharded match words alone, so a
+    misspelled query such as "chek my ballance" gets the fallback, and a
+    warning is logged when ``fuzzy`` is asked of them.
+
+    ``transactions`` is a saved TransactionStore file; without it the
+    transactions listed in the dataset's customer answers are used and
+    re-parsed whenever the dataset is reloaded.
+
+    ``provider`` supplies the values of answer slots (see
+    novabot.templates), cached per customer for ``slot_ttl`` seconds; by
+    default a :class:`novabot.templates.LocalProvider` over the transaction
+    store.
+
+    Each chat session may send ``session_rate`` messages a second that need
+    retrieval, in bursts of ``session_burst`` (``session_rate=None`` turns
+    the limit off). At most ``max_active`` retrievals run at once (one per
+    core by default) and ``max_queued`` wait up to ``queue_timeout``
+    seconds for a slot (see novabot.admission). The bot's counters are
+    registered with :data:`novabot.metrics.METRICS`.
+    """
+    options = {"fuzzy": fuzzy} if retriever in FUZZY_RETRIEVERS else {}
+    if fuzzy and retriever not in FUZZY_RETRIEVERS:
+        logger.warning("The %s retriever has no typo tolerance; fuzzy matching is off", retriever)
+    if retriever == "sharded":
+        options["shards"] = shards
+    manager = IndexManager(file_path, build=partial(BUILDERS[retriever], **options))
+    if watch:
+        manager.start()
+    if transactions is not None:
+        intents = TransactionIntents(TransactionStore.load(transactions))
+    else:
+        intents = TransactionIntents(load_transactions(file_path))
+        manager.add_listener(lambda index: intents.update(load_transactions(file_path)))
+    if provider is None:
+        provider = LocalProvider(intents.store)
+        manager.add_listener(lambda index: provider.update(intents.store))
+    cache = AnswerCache(max_entries=cache_entries, ttl=cache_ttl, max_bytes=cache_bytes)
+    limiter = RateLimiter(session_rate, session_burst) if session_rate is not None else None
+    admission = AdmissionControl(max_active or os.cpu_count() or 4, max_queued, queue_timeout)
+    bot = NovaBot(manager, cache, min_score=min_score, intents=intents, profiler=profiler,
+                  templates=AnswerTemplates(provider, ttl=slot_ttl), limiter=limiter, admission=admission)
+    METRICS.add_collector("bot", bot.collect_metrics)
+    return bot
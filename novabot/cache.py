@@ -0,0 +1,109 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from novabot.retrieval import preprocess
+from novabot.text import Tokenizer
+
+_TOKENIZER = Tokenizer()
+
+
+def normalize_query(text, fuzzy=False):
+    """Cache key for a query: the tokens the word vectorizer sees.
+
+    Spellings that differ only in case, accents, punctuation, spacing or
+    stop words vectorize identically, so they can share one cached answer.
+    With ``fuzzy`` the character n-grams see every word, so stop words and
+    single letters stay in the key and only the folding and spacing are
+    ignored. A query with nothing left gets ``""``, which callers should
+    not cache under.
+    """
+    text = preprocess(text)
+    return " ".join(text.split() if fuzzy else _TOKENIZER(text))
+
+
+def _entry_size(key, value):
+    # getsizeof of a Reply is its tuple alone; the answer text is what takes memory
+    text = getattr(value, "text", None)
+    if text is None:
+        return sys.getsizeof(key) + sys.getsizeof(value)
+    return sys.getsizeof(key) + len(text.encode("utf-8")) + len(value.source)
+
+
+class AnswerCache:
+    """Thread-safe LRU cache with a TTL and an approximate memory cap.
+
+    ``generation`` is bumped by :meth:`clear`; pass the value read before a
+    lookup to :meth:`put` so an answer computed against an index that has
+    since been replaced is dropped instead of cached.
+    """
+
+    def __init__(self, max_entries=10000, ttl=3600.0, max_bytes=16 * 1024 * 1024, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self.generation = 0
+        self.hits = self.misses = self.evictions = self.expirations = self.invalidations = 0
+        self.nbytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires, size = entry
+            if expires is not None and expires <= self.clock():
+                del self._entries[key]
+                self.nbytes -= size
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value, generation=None):
+        size = _entry_size(key, value)
+        if size > self.max_bytes:
+            return
+        expires = self.clock() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.nbytes -= old[2]
+            self._entries[key] = (value, expires, size)
+            self.nbytes += size
+            while len(self._entries) > self.max_entries or self.nbytes > self.max_bytes:
+                _, (_, _, evicted) = self._entries.popitem(last=False)
+                self.nbytes -= evicted
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+            self.generation += 1
+            self.invalidations += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.nbytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
@@ -0,0 +1,75 @@
+import json
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from novabot.bot import Reply
+from novabot.streaming import stream_answer
+
+
+class RemoteBot:
+    """NovaBot interface backed by a ``novabot.server`` instance over HTTP.
+
+    ``admin_token`` is the server's admin token, needed for
+    :meth:`apply_changeset`.
+    """
+
+    def __init__(self, url, timeout=5.0, admin_token=None):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.admin_token = admin_token
+
+    def _call(self, path, payload=None, data=None, headers=None):
+        if payload is not None:
+            data = json.dumps(payload).encode("utf-8")
+        headers = dict({"Content-Type": "application/json"}, **(headers or {}))
+        request = Request(self.url + path, data=data, headers=headers)
+        with urlopen(request, timeout=self.timeout) as response:
+            return json.loads(response.read().decode("utf-8"))
+
+    def reply(self, query, page=None, customer=None, context=None, session=None):
+        """``context`` is accepted for interface compatibility; the service
+        answers each message on its own."""
+        payload = {"query": query}
+        if page is not None:
+            payload["page"] = page
+        if customer is not None:
+            payload["customer"] = customer
+        if session is not None:
+            payload["session"] = session
+        result = self._call("/answer", payload)
+        return Reply(result["answer"], result["score"], result["source"])
+
+    def reply_batch(self, queries, pages=None, customers=None):
+        payload = {"queries": list(queries)}
+        if pages is not None:
+            payload["pages"] = list(pages)
+        if customers is not None:
+            payload["customers"] = list(customers)
+        results = self._call("/answer_batch", payload)["results"]
+        return [Reply(r["answer"], r["score"], r["source"]) for r in results]
+
+    def answer(self, query, page=None, customer=None, context=None, session=None):
+        return self.reply(query, page, customer, session=session).text
+
+    def stream(self, query, page=None, customer=None, delay=0.0, context=None, session=None):
+        """:meth:`answer` started in the background, as an iterable of text
+        chunks (see novabot.streaming)."""
+        return stream_answer(self.answer, query, page, customer, session=session, delay=delay)
+
+    def stats(self):
+        return self._call("/stats")
+
+    def apply_changeset(self, lines):
+        """Send changeset lines to ``/admin/changeset``, as
+        :meth:`NovaBot.apply_changeset` applies them locally.
+
+        Raises ValueError for a malformed changeset; nothing is applied then.
+        """
+        data = "\n".join(line.rstrip("\n") for line in lines).encode("utf-8")
+        try:
+            result = self._call("/admin/changeset", data=data, headers={"X-Admin-Token": self.admin_token or ""})
+        except HTTPError as exc:
+            if exc.code != 400:
+                raise
+            raise ValueError(json.loads(exc.read().decode("utf-8"))["error"]) from None
+        return result["applied"]
@@ -0,0 +1,61 @@
+"""Conversation context for follow-up questions.
+
+A follow-up such as "what about for joint accounts?" only makes sense next
+to the question before it. :class:`ConversationContext` keeps the TF-IDF
+vectors of a conversation's last few user messages and builds the
+retrieval vector for a new one as its own vector plus each earlier turn's,
+scaled by ``decay`` per turn of age and L2-normalized, so the new message
+dominates and older turns fade out.
+
+One context per chat session is kept in Streamlit's session state; each
+message costs one ``transform`` of its own text, since earlier turns keep
+their vectors. Indexes that take a context (``accepts_context = True``)
+use it for word scores only; fuzzy scores still come from the new message.
+:class:`novabot.bot.NovaBot` uses it only for a message that scores under
+its ``min_score`` alone, so repeat questions are still answered from the
+answer cache.
+"""
+from collections import deque
+
+import numpy as np
+from scipy import sparse
+
+
+class ConversationContext:
+    """The last ``turns`` user messages of one conversation, as vectors."""
+
+    def __init__(self, turns=3, decay=0.5):
+        self.turns = turns
+        self.decay = decay
+        self._texts = deque(maxlen=turns)
+        self._vectors = deque(maxlen=turns)
+        self._vectorizer = None
+
+    def __len__(self):
+        return len(self._texts)
+
+    def clear(self):
+        self._texts.clear()
+        self._vectors.clear()
+
+    def vector(self, vectorizer, text):
+        """Retrieval vector for ``text`` (already preprocessed); records the turn."""
+        if vectorizer is not self._vectorizer:
+            # The index was rebuilt on a new vocabulary: vectorize the kept turns once
+            matrix = vectorizer.transform(list(self._texts)) if self._texts else None
+            self._vectors = deque((matrix[i] for i in range(len(self._texts))), maxlen=self.turns)
+            self._vectorizer = vectorizer
+        vector = vectorizer.transform([text])
+        # One sparse sum over the turns' entries instead of a matrix add per turn
+        parts = [vector] + list(reversed(self._vectors))
+        weights = self.decay ** np.arange(len(parts))
+        indices = np.concatenate([part.indices for part in parts])
+        data = np.concatenate([weight * part.data for weight, part in zip(weights, parts)])
+        combined = sparse.csr_matrix((data, indices, [0, len(indices)]), shape=vector.shape)
+        combined.sum_duplicates()
+        norm = np.linalg.norm(combined.data)
+        if norm:
+            combined.data /= norm
+        self._texts.append(text)
+        self._vectors.append(vector)
+        return combined
@@ -0,0 +1,212 @@
+import hashlib
+import os
+import re
+import unicodedata
+
+import numpy as np
+
+from novabot.arrayfile import read_arrays, write_arrays
+from novabot.metrics import METRICS
+
+_QUESTION = re.compile(r"Q:\s*(.*\S)")
+_ANSWER = re.compile(r"A:\s*(.*\S)")
+
+CACHE_SUFFIX = ".corpus"
+CACHE_VERSION = 1
+
+
+def _is_header(line):
+    # Section headers start with an emoji, e.g. "💳 DEPOSITS, WITHDRAWALS, TRANSFERS"
+    return unicodedata.category(line[0]) == "So"
+
+
+def parse_dataset(lines):
+    """Yield ``(question, answer, category)`` from an iterable of lines.
+
+    Answers run from the ``A:`` line to the next blank line, question or
+    section header, so multi-line answers such as transaction lists are
+    kept while the following section is not swallowed into them.
+    """
+    category = None
+    question = None
+    answer = None
+    for line in lines:
+        line = line.strip()
+        if not line:
+            if answer is not None:
+                yield question, "\n".join(answer), category
+            question = answer = None
+            continue
+        match = _QUESTION.match(line)
+        if match:
+            if answer is not None:
+                yield question, "\n".join(answer), category
+            question, answer = match.group(1), None
+            continue
+        if _is_header(line):
+            if answer is not None:
+                yield question, "\n".join(answer), category
+            question = answer = None
+            category = line
+            continue
+        if answer is None:
+            match = _ANSWER.match(line)
+            if match and question is not None:
+                answer = [match.group(1)]
+        else:
+            answer.append(line)
+    if answer is not None:
+        yield question, "\n".join(answer), category
+
+
+class TextColumn:
+    """Read-only sequence of strings stored as one UTF-8 blob plus offsets."""
+
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        start, stop = int(self.offsets[i]), int(self.offsets[i + 1])
+        return bytes(self.blob[start:stop]).decode("utf-8")
+
+    def __iter__(self):
+        data = bytes(self.blob)
+        offsets = self.offsets.tolist()
+        if data.isascii():
+            # Byte offsets are character offsets: decode once and slice
+            data = data.decode("ascii")
+            for start, stop in zip(offsets, offsets[1:]):
+                yield data[start:stop]
+        else:
+            for start, stop in zip(offsets, offsets[1:]):
+                yield data[start:stop].decode("utf-8")
+
+    @classmethod
+    def from_strings(cls, strings):
+        encoded = [s.encode("utf-8") for s in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        return cls(np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets)
+
+
+class Corpus:
+    """Questions, answers and the section header each pair was listed under."""
+
+    def __init__(self, questions, answers, category_ids, category_names):
+        self.questions = questions
+        self.answers = answers
+        self.category_ids = category_ids
+        self.category_names = list(category_names)
+
+    def __len__(self):
+        return len(self.questions)
+
+    @classmethod
+    def from_entries(cls, entries):
+        questions, answers, category_ids, names = [], [], [], {}
+        for question, answer, category in entries:
+            questions.append(question)
+            answers.append(answer)
+            category_ids.append(-1 if category is None else names.setdefault(category, len(names)))
+        return cls(questions, answers, np.array(category_ids, dtype=np.int32), list(names))
+
+
+def file_digest(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _save_cache(cache_path, corpus, source):
+    questions = TextColumn.from_strings(corpus.questions)
+    answers = TextColumn.from_strings(corpus.answers)
+    write_arrays(cache_path, {
+        "question_blob": questions.blob,
+        "question_offsets": questions.offsets,
+        "answer_blob": answers.blob,
+        "answer_offsets": answers.offsets,
+        "category_ids": corpus.category_ids,
+    }, meta={"version": CACHE_VERSION, "source": source, "categories": corpus.category_names})
+
+
+def _load_cache(cache_path):
+    """Return ``(corpus, source)`` from the cache file, or ``(None, None)``."""
+    try:
+        meta, arrays = read_arrays(cache_path)
+    except (OSError, ValueError):
+        return None, None
+    if meta.get("version") != CACHE_VERSION:
+        return None, None
+    corpus = Corpus(
+        TextColumn(arrays["question_blob"], arrays["question_offsets"]),
+        TextColumn(arrays["answer_blob"], arrays["answer_offsets"]),
+        arrays["category_ids"],
+        meta["categories"],
+    )
+    return corpus, meta["source"]
+
+
+def load_corpus(file_path, use_cache=True):
+    """Parse ``file_path`` into a :class:`Corpus`, reusing the binary cache.
+
+    The cache lives next to the source as ``<file>.corpus`` and is trusted
+    when the source size and mtime match; otherwise the content hash
+    decides. A cache that cannot be written (read-only checkout) is skipped.
+    """
+    stat = os.stat(file_path)
+    cache_path = file_path + CACHE_SUFFIX
+    source = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    if use_cache:
+        corpus, cached = _load_cache(cache_path)
+        if corpus is not None:
+            if cached["size"] == source["size"] and cached["mtime_ns"] == source["mtime_ns"]:
+                return corpus
+            source["sha256"] = file_digest(file_path)
+            if cached.get("sha256") == source["sha256"]:
+                # Touched but unchanged: refresh the recorded mtime
+                try:
+                    _save_cache(cache_path, corpus, source)
+                except OSError:
+                    pass
+                return corpus
+
+    with METRICS.span("load_dataset"), open(file_path, "r", encoding="utf-8") as file:
+        corpus = Corpus.from_entries(parse_dataset(file))
+    if use_cache:
+        source.setdefault("sha256", file_digest(file_path))
+        try:
+            _save_cache(cache_path, corpus, source)
+        except OSError:
+            pass
+    return corpus
+
+
+def load_dataset(file_path):
+    try:
+        corpus = load_corpus(file_path)
+        return list(corpus.questions), list(corpus.answers)
+    except FileNotFoundError:
+        # If file not found, return some default Q&A pairs
+        return [
+            "What's my current balance?",
+            "How do I apply for a loan?",
+            "What are your interest rates?",
+            "How do I transfer money?",
+            "What credit cards do you offer?"
+        ], [
+            "Your current balance is {balance|shown in the NovaBank app}.",
+            "You can apply for a loan through our online banking portal or by visiting any branch.",
+            "Our interest rates start at {personal_loan_apr} for personal loans and {mortgage_rate} for mortgages.",
+            "You can transfer money using our mobile app, online banking, or by visiting a branch.",
+            "We offer several credit cards including our Rewards Card, Cash Back Card, and Premium Travel Card."
+        ]
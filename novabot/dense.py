@@ -0,0 +1,189 @@
+"""Dense (embedding) retrieval for paraphrased questions.
+
+"move money to a friend" shares no TF-IDF term with "How do I transfer
+money?", but their embeddings are close. Two embedders are available:
+
+- :class:`LsaEmbedder`: TruncatedSVD over the TF-IDF matrix, needs nothing
+  beyond scikit-learn and nothing to download.
+- :class:`SentenceEmbedder`: a small sentence-transformers model loaded
+  from a local directory (optional dependency).
+
+:class:`DenseIndex` stores unit-length question embeddings as float32, or
+int8 with a per-row scale, optionally memory-mapped from disk, and uses an
+IVF (k-means inverted file) index so a query only scores the rows of the
+``nprobe`` nearest clusters.
+"""
+import os
+
+import numpy as np
+
+from novabot.arrayfile import read_arrays, write_arrays
+from novabot.retrieval import TfidfIndex, _top_k, preprocess
+
+
+def _normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return (vectors / norms).astype(np.float32)
+
+
+class LsaEmbedder:
+    """Latent semantic embeddings from the TF-IDF question matrix."""
+
+    def __init__(self, tfidf, dim=128, seed=0):
+        from sklearn.decomposition import TruncatedSVD
+
+        self.tfidf = tfidf
+        dim = max(1, min(dim, tfidf.matrix.shape[0] - 1, tfidf.matrix.shape[1] - 1))
+        self.svd = TruncatedSVD(n_components=dim, random_state=seed)
+        self.question_vectors = _normalize(self.svd.fit_transform(tfidf.matrix))
+
+    def embed(self, texts):
+        return _normalize(self.svd.transform(self.tfidf.vectorizer.transform([preprocess(t) for t in texts])))
+
+    def has_known_terms(self, query):
+        return self.tfidf.has_known_terms(query)
+
+
+class SentenceEmbedder:
+    """Embeddings from a sentence-transformers model directory on local disk."""
+
+    def __init__(self, model_path, device="cpu"):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            raise ImportError("SentenceEmbedder needs the optional 'sentence-transformers' package; "
+                              "use LsaEmbedder for a dependency-free dense index") from None
+        self.model = SentenceTransformer(model_path, device=device)
+
+    def embed(self, texts):
+        return _normalize(self.model.encode(list(texts), convert_to_numpy=True))
+
+    def has_known_terms(self, query):
+        return bool(query.strip())
+
+
+class DenseIndex:
+    """Nearest-neighbour search over question embeddings.
+
+    With ``nlist`` the questions are clustered with k-means and stored
+    grouped by cluster, so probing a cluster scores one contiguous slice.
+    ``nlist=None`` scores every row (exact). ``quantize=True`` keeps int8
+    codes, a quarter of the float32 memory, at a small recall cost. With
+    ``path`` the vectors are written to disk and served from a memmap.
+    """
+
+    def __init__(self, embedder, questions, answers, vectors=None, nlist="auto", nprobe=8,
+                 quantize=False, path=None, seed=0):
+        self.embedder = embedder
+        self.questions = list(questions)
+        self.answers = list(answers)
+        self.nprobe = nprobe
+        if vectors is None:
+            vectors = embedder.embed(self.questions)
+        if nlist == "auto":
+            nlist = int(np.sqrt(len(vectors))) if len(vectors) >= 10000 else None
+
+        if nlist:
+            from sklearn.cluster import MiniBatchKMeans
+
+            kmeans = MiniBatchKMeans(n_clusters=nlist, random_state=seed, n_init=3,
+                                     batch_size=4096).fit(vectors)
+            assignment = kmeans.labels_
+            self.centroids = _normalize(kmeans.cluster_centers_)
+            ids = np.argsort(assignment, kind="stable")
+            offsets = np.zeros(nlist + 1, dtype=np.int64)
+            np.cumsum(np.bincount(assignment, minlength=nlist), out=offsets[1:])
+        else:
+            self.centroids = None
+            ids = np.arange(len(vectors))
+            offsets = np.array([0, len(vectors)], dtype=np.int64)
+
+        arrays = {"ids": ids.astype(np.int64), "offsets": offsets}
+        vectors = vectors[ids]
+        if quantize:
+            scale = 127 / np.maximum(np.abs(vectors).max(axis=1), 1e-12)
+            arrays["codes"] = np.round(vectors * scale[:, np.newaxis]).astype(np.int8)
+            arrays["inv_scale"] = (1 / scale).astype(np.float32)
+        else:
+            arrays["vectors"] = vectors
+        if path is not None:
+            write_arrays(path, arrays, meta={"kind": "dense", "quantized": bool(quantize)})
+            _, arrays = read_arrays(path)
+        self.ids = arrays["ids"]
+        self.offsets = arrays["offsets"]
+        self.vectors = arrays.get("vectors")
+        self.codes = arrays.get("codes")
+        self.inv_scale = arrays.get("inv_scale")
+
+    def __len__(self):
+        return len(self.questions)
+
+    @property
+    def nbytes(self):
+        parts = [self.ids, self.offsets, self.vectors, self.codes, self.inv_scale, self.centroids]
+        return sum(part.nbytes for part in parts if part is not None)
+
+    def _score_slice(self, start, stop, query_vectors):
+        if self.codes is not None:
+            scores = self.codes[start:stop].astype(np.float32) @ query_vectors.T
+            return scores * self.inv_scale[start:stop, np.newaxis]
+        return self.vectors[start:stop] @ query_vectors.T
+
+    def _candidates(self, query_vector, k):
+        """Row range slices to score for one query (all rows without IVF)."""
+        if self.centroids is None:
+            return [(0, len(self.ids))]
+        nprobe = min(self.nprobe, len(self.centroids))
+        centroid_scores = self.centroids @ query_vector
+        probes = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+        slices = [(self.offsets[p], self.offsets[p + 1]) for p in probes]
+        if sum(b - a for a, b in slices) < k:
+            # Probed clusters too small to fill k: scan everything
+            return [(0, len(self.ids))]
+        return slices
+
+    def top_k_vector(self, query_vector, k=1):
+        k = min(k, len(self))
+        slices = self._candidates(query_vector, k)
+        scores = np.concatenate([self._score_slice(a, b, query_vector[np.newaxis, :])[:, 0] for a, b in slices])
+        positions = np.concatenate([np.arange(a, b) for a, b in slices])
+        top = _top_k(scores[np.newaxis, :], k)[0]
+        return self.ids[positions[top]], scores[top]
+
+    def top_k(self, query, k=1):
+        return self.top_k_vector(self.embedder.embed([query])[0], k)
+
+    def has_known_terms(self, query):
+        return self.embedder.has_known_terms(query)
+
+    def best_match(self, query):
+        rows, scores = self.top_k(query, 1)
+        return int(rows[0]), float(scores[0])
+
+    def match(self, query):
+        if not self.has_known_terms(query):
+            return None
+        return self.best_match(query)
+
+    def answer(self, query):
+        return self.answers[self.best_match(query)[0]]
+
+    def answer_batch(self, queries, k=1):
+        query_vectors = self.embedder.embed(queries)
+        k = min(k, len(self))
+        indices = np.empty((len(queries), k), dtype=np.int64)
+        scores = np.empty((len(queries), k), dtype=np.float64)
+        for i, vector in enumerate(query_vectors):
+            indices[i], scores[i] = self.top_k_vector(vector, k)
+        return indices, scores
+
+
+def build_lsa_index(questions, answers, dim=128, cache_dir=None, **options):
+    """DenseIndex with LSA embeddings, memory-mapped under ``cache_dir`` if given."""
+    embedder = LsaEmbedder(TfidfIndex(questions, answers, pruning=False), dim=dim)
+    path = None
+    if cache_dir is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+        path = os.path.join(cache_dir, "dense.vectors")
+    return DenseIndex(embedder, questions, answers, vectors=embedder.question_vectors, path=path, **options)
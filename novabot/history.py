@@ -0,0 +1,115 @@
+"""Bounded chat history for the Streamlit sidebar.
+
+:class:`ChatHistory` keeps the last ``window`` turns in a ring buffer,
+each with its HTML already built, so a rerun renders the visible history as
+one ``st.markdown`` call whose cost does not depend on how long the
+conversation is. Turns pushed out of the window go to a :class:`SpillStore`
+(one SQLite file shared by all sessions, rows keyed by session id) and come
+back a page at a time when the user asks for older messages.
+"""
+import html
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import deque
+
+_CLASSES = {"user": "user-message", "assistant": "bot-message"}
+
+
+def message_html(role, content):
+    # Escaped, with answer lines (e.g. transaction lists) kept as line breaks
+    text = html.escape(content).replace("\n", "<br>")
+    return "<div class='%s'>%s</div>" % (_CLASSES.get(role, "bot-message"), text)
+
+
+class SpillStore:
+    """Turns that left a session's window, in SQLite.
+
+    Turns spilled more than ``max_age`` seconds ago are deleted when a
+    store is opened, since Streamlit gives no hook for a session ending.
+    """
+
+    def __init__(self, path=None, max_age=86400.0):
+        self.path = path or os.path.join(tempfile.gettempdir(), "novabot_history.sqlite")
+        # Streamlit reruns a session on whichever thread is free
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS turns (session TEXT, seq INTEGER, role TEXT, "
+                             "content TEXT, ts REAL, PRIMARY KEY (session, seq)) WITHOUT ROWID")
+            self._db.execute("CREATE INDEX IF NOT EXISTS turns_ts ON turns (ts)")
+            self._db.execute("DELETE FROM turns WHERE ts < ?", (time.time() - max_age,))
+
+    def append(self, session, seq, role, content):
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO turns VALUES (?, ?, ?, ?, ?)",
+                             (session, seq, role, content, time.time()))
+
+    def turns(self, session, start, stop):
+        """``(role, content)`` of turns ``start <= seq < stop``, oldest first."""
+        with self._lock:
+            return self._db.execute("SELECT role, content FROM turns WHERE session = ? AND seq >= ? "
+                                    "AND seq < ? ORDER BY seq", (session, start, stop)).fetchall()
+
+    def clear(self, session):
+        with self._lock:
+            self._db.execute("DELETE FROM turns WHERE session = ?", (session,))
+
+    def close(self):
+        self._db.close()
+
+
+class ChatHistory:
+    """The last ``window`` turns in memory; older ones in ``store``.
+
+    Without a store, turns that leave the window are dropped.
+    """
+
+    def __init__(self, window=50, store=None, session=None):
+        self.window = window
+        self.store = store
+        self.session = session
+        self.spilled = 0
+        self._turns = deque(maxlen=window)
+        self._html = None
+
+    def __len__(self):
+        return self.spilled + len(self._turns)
+
+    def append(self, role, content):
+        if len(self._turns) == self.window:
+            old_role, old_content, _ = self._turns[0]
+            if self.store is not None:
+                self.store.append(self.session, self.spilled, old_role, old_content)
+            self.spilled += 1
+        self._turns.append((role, content, message_html(role, content)))
+        self._html = None
+
+    def messages(self):
+        """The in-memory turns as ``{"role", "content"}`` dicts, oldest first."""
+        return [{"role": role, "content": content} for role, content, _ in self._turns]
+
+    def html(self):
+        """One HTML block for the in-memory turns, rebuilt only after an append."""
+        if self._html is None:
+            self._html = "".join(fragment for _, _, fragment in self._turns)
+        return self._html
+
+    def older(self, count):
+        """The ``count`` spilled turns just before the window, oldest first."""
+        if self.store is None or not count:
+            return []
+        return self.store.turns(self.session, max(self.spilled - count, 0), self.spilled)
+
+    def older_html(self, count):
+        return "".join(message_html(role, content) for role, content in self.older(count))
+
+    def clear(self):
+        if self.store is not None:
+            self.store.clear(self.session)
+        self.spilled = 0
+        self._turns.clear()
+        self._html = None
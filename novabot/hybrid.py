@@ -0,0 +1,210 @@
+"""Two-stage retrieval: cheap TF-IDF candidates, reranked and fused with RRF.
+
+The first stage (:class:`novabot.retrieval.TfidfIndex`) pulls the top
+``candidates`` questions. A more expensive scorer then reranks only those:
+:class:`BM25Scorer` (BM25F over the question and answer fields) or, when
+available, :class:`CrossEncoderScorer`. The two rankings are combined with
+reciprocal rank fusion, ``sum(1 / (rrf_k + rank))``.
+
+Each stage has a time budget in milliseconds. A first stage that overruns
+its budget skips reranking. The reranker scores candidates in chunks and
+stops when its budget is spent; unscored candidates keep their first-stage
+rank only. Per-stage timings and budget overruns are kept in
+:attr:`HybridRetriever.timings` (``NovaBot.stats()["index"]``), and the
+timings are also recorded as the ``hybrid_first_stage`` and
+``hybrid_rerank`` stages of :data:`novabot.metrics.METRICS`.
+"""
+import threading
+import time
+
+import numpy as np
+
+from novabot.metrics import METRICS
+from novabot.retrieval import preprocess
+from novabot.text import Tokenizer
+
+
+class BM25Scorer:
+    """BM25F over the question and answer fields with per-field weights."""
+
+    def __init__(self, questions, answers, field_weights=(1.0, 0.3), k1=1.2, b=0.75):
+        self.field_weights = field_weights
+        self.k1 = k1
+        self.b = b
+        self.tokenizer = Tokenizer()
+        fields = [[preprocess(t) for t in texts] for texts in (questions, answers)]
+        terms = set()
+        for texts in fields:
+            for text in texts:
+                terms.update(self.tokenizer(text))
+        self.vocabulary = {term: column for column, term in enumerate(sorted(terms))}
+        self.fields = []
+        present = None
+        for texts in fields:
+            counts = self.tokenizer.count(texts, self.vocabulary).tocsc()
+            lengths = np.asarray(counts.sum(axis=1)).ravel()
+            # CSC: a query touches a few term columns, sliced before the candidate rows
+            self.fields.append((counts, lengths / max(lengths.mean(), 1e-9)))
+            present = counts.astype(bool) if present is None else present + counts.astype(bool)
+        df = np.diff(present.tocsc().indptr)
+        n = counts.shape[0]
+        self.idf = np.log1p((n - df + 0.5) / (df + 0.5))
+
+    def bind(self, query):
+        """Return ``score(rows)`` for one query; term columns are sliced once."""
+        vocabulary = self.vocabulary
+        terms = sorted({vocabulary[t] for t in self.tokenizer(preprocess(query)) if t in vocabulary})
+        if not terms:
+            return lambda rows: np.zeros(len(rows))
+        idf = self.idf[terms]
+        fields = [(weight, counts[:, terms].tocsr(), relative_length)
+                  for weight, (counts, relative_length) in zip(self.field_weights, self.fields)]
+
+        def score(rows):
+            tf = np.zeros((len(rows), len(terms)))
+            for weight, term_counts, relative_length in fields:
+                tf += weight * term_counts[rows].toarray() / (1 - self.b + self.b * relative_length[rows, np.newaxis])
+            return (idf * tf / (self.k1 + tf)).sum(axis=1)
+        return score
+
+
+class CrossEncoderScorer:
+    """Reranks with a sentence-transformers cross-encoder from local disk."""
+
+    def __init__(self, model_path, questions, device="cpu"):
+        try:
+            from sentence_transformers import CrossEncoder
+        except ImportError:
+            raise ImportError("CrossEncoderScorer needs the optional 'sentence-transformers' package; "
+                              "use BM25Scorer instead") from None
+        self.model = CrossEncoder(model_path, device=device)
+        self.questions = questions
+
+    def bind(self, query):
+        return lambda rows: np.asarray(self.model.predict([(query, self.questions[i]) for i in rows]))
+
+
+class StageTimer:
+
+    def __init__(self, stage, registry=METRICS):
+        self.stage = stage
+        self.registry = registry
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.over_budget = 0
+        self.skipped = 0
+        self._lock = threading.Lock()
+
+    def skip(self):
+        with self._lock:
+            self.skipped += 1
+
+    def record(self, elapsed_ms, budget_ms=None):
+        self.registry.observe(self.stage, elapsed_ms / 1000)
+        with self._lock:
+            self.count += 1
+            self.total_ms += elapsed_ms
+            self.max_ms = max(self.max_ms, elapsed_ms)
+            if budget_ms is not None and elapsed_ms > budget_ms:
+                self.over_budget += 1
+
+    def stats(self):
+        return {"count": self.count, "mean_ms": self.total_ms / self.count if self.count else 0.0,
+                "max_ms": self.max_ms, "over_budget": self.over_budget, "skipped": self.skipped}
+
+
+def reciprocal_rank_fusion(rankings, rrf_k=60):
+    """Fuse rankings (arrays of 0-based rank positions, NaN = unranked) by RRF."""
+    fused = 0.0
+    for ranks in rankings:
+        fused = fused + np.where(np.isnan(ranks), 0.0, 1.0 / (rrf_k + np.nan_to_num(ranks) + 1))
+    return fused
+
+
+class HybridRetriever:
+    """First-stage index plus reranker, with the TfidfIndex query interface.
+
+    The returned score is the first-stage cosine of the chosen question, so
+    NovaBot's ``min_score`` threshold keeps its meaning.
+    """
+
+    def __init__(self, first_stage, reranker, candidates=50, rrf_k=60,
+                 first_stage_budget_ms=20.0, rerank_budget_ms=20.0, rerank_chunk=16):
+        self.first_stage = first_stage
+        self.reranker = reranker
+        self.candidates = candidates
+        self.rrf_k = rrf_k
+        self.first_stage_budget_ms = first_stage_budget_ms
+        self.rerank_budget_ms = rerank_budget_ms
+        self.rerank_chunk = rerank_chunk
+        self.answers = first_stage.answers
+        self.fuzzy = getattr(first_stage, "fuzzy", None)
+        self.timings = {"first_stage": StageTimer("hybrid_first_stage"), "rerank": StageTimer("hybrid_rerank")}
+
+    def __len__(self):
+        return len(self.first_stage)
+
+    def has_known_terms(self, query):
+        return self.first_stage.has_known_terms(query)
+
+    def rerank(self, query, rows, first_scores, first_ms):
+        """Reorder first-stage ``rows`` by RRF of both stages' rankings."""
+        self.timings["first_stage"].record(first_ms, self.first_stage_budget_ms)
+        if first_ms > self.first_stage_budget_ms or len(rows) < 2:
+            self.timings["rerank"].skip()
+            return rows, first_scores
+
+        start = time.perf_counter()
+        score = self.reranker.bind(query)
+        rerank_scores = np.full(len(rows), np.nan)
+        for chunk in range(0, len(rows), self.rerank_chunk):
+            stop = chunk + self.rerank_chunk
+            rerank_scores[chunk:stop] = score(rows[chunk:stop])
+            if (time.perf_counter() - start) * 1000 > self.rerank_budget_ms:
+                break
+        scored = ~np.isnan(rerank_scores)
+        rerank_ranks = np.full(len(rows), np.nan)
+        order = np.argsort(-rerank_scores[scored], kind="stable")
+        rerank_ranks[np.flatnonzero(scored)[order]] = np.arange(scored.sum())
+        fused = reciprocal_rank_fusion([np.arange(len(rows), dtype=float), rerank_ranks], self.rrf_k)
+        self.timings["rerank"].record((time.perf_counter() - start) * 1000, self.rerank_budget_ms)
+        order = np.argsort(-fused, kind="stable")
+        return rows[order], first_scores[order]
+
+    def top_k(self, query, k=1):
+        start = time.perf_counter()
+        rows, scores = self.first_stage.top_k(query, max(k, self.candidates))
+        first_ms = (time.perf_counter() - start) * 1000
+        rows, scores = self.rerank(query, np.asarray(rows), np.asarray(scores), first_ms)
+        return rows[:k], scores[:k]
+
+    def best_match(self, query):
+        rows, scores = self.top_k(query, 1)
+        if not len(rows):
+            return 0, 0.0
+        return int(rows[0]), float(scores[0])
+
+    def match(self, query):
+        if not self.has_known_terms(query):
+            return None
+        return self.best_match(query)
+
+    def answer(self, query):
+        return self.answers[self.best_match(query)[0]]
+
+    def answer_batch(self, queries, k=1):
+        start = time.perf_counter()
+        rows, scores = self.first_stage.answer_batch(queries, max(k, self.candidates))
+        # Stage one ran once for the whole batch: charge each query its share
+        first_ms = (time.perf_counter() - start) * 1000 / max(len(queries), 1)
+        k = min(k, len(self))
+        indices = np.empty((len(queries), k), dtype=np.int64)
+        top_scores = np.empty((len(queries), k), dtype=np.float64)
+        for i, query in enumerate(queries):
+            query_rows, query_scores = self.rerank(query, rows[i], scores[i], first_ms)
+            indices[i], top_scores[i] = query_rows[:k], query_scores[:k]
+        return indices, top_scores
+
+    def stats(self):
+        return {stage: timer.stats() for stage, timer in self.timings.items()}
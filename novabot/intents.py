@@ -0,0 +1,169 @@
+"""Transaction questions answered from a TransactionStore instead of text.
+
+:class:`TransactionIntents` recognizes balance, total ("how much did Alice
+spend at Netflix last month") and list ("Bob's latest deposits") questions
+about one customer, fills the merchant, type and period slots, and answers
+with vectorized aggregation over that customer's rows. Rows without a
+date, such as every one parsed from the dataset, cannot be placed in a
+period; a period question counts them too and says so. Questions it does
+not recognize return None and go to retrieval as before, and so do
+how-to questions ("how do I transfer money to Bob?") and questions that
+only name a transaction type without asking about anyone's records.
+"""
+import datetime
+import re
+
+import numpy as np
+
+from novabot.transactions import NO_DATE, day_number, format_amount
+
+_WORD = re.compile(r"[a-z0-9]+")
+_TYPE_WORDS = {
+    "spend": 0, "spent": 0, "spending": 0, "purchase": 0, "purchases": 0, "bought": 0,
+    "transfer": 1, "transfers": 1, "transferred": 1,
+    "deposit": 2, "deposits": 2, "deposited": 2,
+    "withdrawal": 3, "withdrawals": 3, "withdrew": 3, "withdraw": 3,
+}
+_LOAN_PAYMENT = re.compile(r"\bloan payments?\b")
+_TYPE_LABELS = ("purchases", "transfers", "deposits", "withdrawals", "loan payments")
+_PERIOD = re.compile(r"\b(?:(last|this|past) (week|month|year)|today|yesterday|(?:last|past) (\d+) days)\b")
+_BALANCE = re.compile(r"\bbalance\b")
+_TOTAL = re.compile(r"\b(?:how much|total|sum)\b")
+_SPEND = re.compile(r"\b(?:spend|spent|spending)\b")
+_LIST = re.compile(r"\b(?:transactions?|list|show|latest|recent|history)\b")
+_HOW_TO = re.compile(r"^(?:how (?:do|does|can|could|should|would|to)|(?:can|could|may) (?!you\b))\b|\bhow to\b")
+_POSSESSIVE = re.compile(r"\b(\w+)['’]s\b")
+_MY = re.compile(r"\b(?:my|mine)\b")
+
+
+def _counted(n, label):
+    return "%d %s" % (n, label if n != 1 else label[:-1])
+
+
+def _month_start(date):
+    return date.replace(day=1)
+
+
+def period_days(match, today):
+    """Inclusive ``(start, end)`` day numbers for a matched period phrase."""
+    text = match.group(0)
+    if text == "today":
+        return day_number(today), day_number(today)
+    if text == "yesterday":
+        return day_number(today) - 1, day_number(today) - 1
+    if match.group(3):
+        return day_number(today) - int(match.group(3)) + 1, day_number(today)
+    which, unit = match.group(1), match.group(2)
+    if unit == "week":
+        monday = today - datetime.timedelta(days=today.weekday())
+        if which == "this":
+            return day_number(monday), day_number(today)
+        if which == "last":
+            return day_number(monday) - 7, day_number(monday) - 1
+        return day_number(today) - 6, day_number(today)
+    if unit == "month":
+        if which == "this":
+            return day_number(_month_start(today)), day_number(today)
+        if which == "last":
+            end = _month_start(today) - datetime.timedelta(days=1)
+            return day_number(_month_start(end)), day_number(end)
+        return day_number(today) - 29, day_number(today)
+    if which == "this":
+        return day_number(today.replace(month=1, day=1)), day_number(today)
+    if which == "last":
+        return (day_number(datetime.date(today.year - 1, 1, 1)),
+                day_number(datetime.date(today.year - 1, 12, 31)))
+    return day_number(today) - 364, day_number(today)
+
+
+class TransactionIntents:
+
+    def __init__(self, store, today=datetime.date.today, max_listed=10):
+        self.today = today
+        self.max_listed = max_listed
+        self.update(store)
+
+    def update(self, store):
+        """Switch to a new store, e.g. after the dataset was reloaded."""
+        # Longest names first so "apple store" wins over a merchant "apple"
+        names = sorted(store.merchant_ids, key=len, reverse=True)
+        merchants = re.compile(r"\b(%s)\b" % "|".join(map(re.escape, names))) if names else None
+        self._state = store, merchants
+
+    @property
+    def store(self):
+        return self._state[0]
+
+    def handle(self, query, customer=None):
+        """Answer text for a transaction question, or None if it is not one.
+
+        ``customer`` is the signed-in customer's name; without it the
+        question has to name a known customer. The question has to be about
+        someone's records: a possessive ("Bob's", "my") or a list, total,
+        spending or balance cue. How-to questions never are.
+        """
+        store, merchants = self._state
+        text = query.strip().lower()
+        if _HOW_TO.search(text):
+            return None
+        words = _WORD.findall(text)
+        owner = next((store.customer_ids[m.group(1)] for m in _POSSESSIVE.finditer(text)
+                      if m.group(1) in store.customer_ids), None)
+        if customer is None:
+            customer = owner if owner is not None else next(
+                (store.customer_ids[w] for w in words if w in store.customer_ids), None)
+        else:
+            customer = store.customer_ids.get(customer.lower())
+        if customer is None:
+            return None
+
+        kind = 4 if _LOAN_PAYMENT.search(text) else next((_TYPE_WORDS[w] for w in words if w in _TYPE_WORDS), None)
+        wants_list = _LIST.search(text) is not None
+        wants_total = _TOTAL.search(text) is not None or (_SPEND.search(text) is not None and not wants_list)
+        wants_balance = _BALANCE.search(text) is not None
+        if not (wants_total or wants_list or wants_balance or owner is not None or _MY.search(text)):
+            return None
+        if kind is None and not (wants_total or wants_list) and wants_balance:
+            return "%s's balance from recorded transactions is %s." % (
+                store.customers[customer], format_amount(store.balance(customer)))
+        if kind is None and not (wants_total or wants_list):
+            return None
+
+        found = merchants.search(text) if merchants is not None else None
+        merchant = store.merchant_ids[found.group(1)] if found else None
+        period = _PERIOD.search(text)
+        start, end = period_days(period, self.today()) if period else (None, None)
+        rows = store.rows(customer, kind, merchant, start, end)
+        name = store.customers[customer]
+        label = "transactions" if kind is None else _TYPE_LABELS[kind]
+        where = "" if merchant is None else " at %s" % store.merchants[merchant]
+        when = "" if period is None else " " + period.group(0)
+        note = ""
+        if period is not None:
+            matching = store.rows(customer, kind, merchant)
+            undated = matching[store.day[matching] == NO_DATE]
+            if len(undated):
+                # Rows run newest first and undated ones come last
+                rows = np.sort(np.concatenate([rows, undated]))
+                note = " %s without a date %s included, as I can't tell whether %s from %s." % (
+                    _counted(len(undated), label).capitalize(), "is" if len(undated) == 1 else "are",
+                    "it is" if len(undated) == 1 else "they are", period.group(0))
+                when = ""
+
+        if not len(rows):
+            return "I found no %s%s for %s%s." % (label, where, name, when)
+        if wants_total:
+            if kind == 0:
+                return "%s spent %s%s%s (%s).%s" % (
+                    name, format_amount(store.total(rows)), where, when, _counted(len(rows), label), note)
+            if kind is None:
+                return "%s's transactions%s%s net to %s (%s).%s" % (
+                    name, where, when, format_amount(store.total(rows, signed=True)), _counted(len(rows), label),
+                    note)
+            return "%s's %s%s%s total %s (%s).%s" % (
+                name, label, where, when, format_amount(store.total(rows)), _counted(len(rows), label), note)
+        lines = ["Here are %s's recent %s%s%s:" % (name, label, where, when)]
+        lines += ["- " + store.describe(row) for row in rows[:self.max_listed]]
+        if note:
+            lines.append(note.strip())
+        return "\n".join(lines)
@@ -0,0 +1,72 @@
+import numpy as np
+
+
+class InvertedIndex:
+    """Term -> posting list of (question id, weight) over a TF-IDF matrix.
+
+    The postings are simply the CSC layout of the question matrix, with the
+    largest weight per term kept as its score upper bound for MaxScore
+    pruning in :meth:`top_k`.
+    """
+
+    def __init__(self, matrix):
+        csc = matrix.tocsc()
+        csc.sort_indices()
+        self.indptr = csc.indptr
+        self.rows = csc.indices
+        self.weights = csc.data
+        self.max_weight = csc.max(axis=0).toarray().ravel()
+
+    def postings(self, term):
+        start, stop = self.indptr[term], self.indptr[term + 1]
+        return self.rows[start:stop], self.weights[start:stop]
+
+    def rarest_posting(self, query_vector):
+        terms = query_vector.indices
+        if not len(terms):
+            return 0
+        return int((self.indptr[terms + 1] - self.indptr[terms]).min())
+
+    def top_k(self, query_vector, k):
+        """Exact top-``k`` rows for a ``1 x V`` query, scoring only candidates.
+
+        Terms are visited in decreasing order of their score upper bound.
+        Once the bounds of the unvisited terms sum below the current k-th
+        best partial score, no unseen row can reach the top k: later terms
+        only update existing candidates, and candidates that cannot catch up
+        are dropped. Returns ``(rows, scores, scored)``, where ``scored`` is
+        the number of distinct rows that were scored. Rows sharing no term
+        with the query are never returned, so fewer than ``k`` may come back.
+        """
+        terms = query_vector.indices
+        query_weights = query_vector.data
+        bounds = query_weights * self.max_weight[terms]
+        order = np.argsort(-bounds, kind="stable")
+        # remaining[i]: upper bound on what terms after the i-th can still add
+        remaining = np.append(np.cumsum(bounds[order][::-1])[::-1][1:], 0.0)
+
+        rows = np.empty(0, dtype=self.rows.dtype)
+        scores = np.empty(0, dtype=np.float64)
+        scored = 0
+        accepting = True
+        for i, t in enumerate(order):
+            posting_rows, posting_weights = self.postings(terms[t])
+            contribution = query_weights[t] * posting_weights
+            if accepting:
+                rows, inverse = np.unique(np.concatenate([rows, posting_rows]), return_inverse=True)
+                scores = np.bincount(inverse, weights=np.concatenate([scores, contribution]), minlength=len(rows))
+                scored = max(scored, len(rows))
+            elif len(rows) and len(posting_rows):
+                pos = np.minimum(np.searchsorted(posting_rows, rows), len(posting_rows) - 1)
+                hit = posting_rows[pos] == rows
+                scores[hit] += contribution[pos[hit]]
+            if len(rows) >= k:
+                threshold = np.partition(scores, len(scores) - k)[len(scores) - k]
+                if remaining[i] < threshold:
+                    accepting = False
+                keep = scores + remaining[i] >= threshold
+                if not keep.all():
+                    rows, scores = rows[keep], scores[keep]
+
+        order = np.lexsort((rows, -scores))[:k]
+        return rows[order], scores[order], scored
@@ -0,0 +1,249 @@
+"""In-process timing spans, histograms and counters, exported for Prometheus.
+
+Stages of the answer pipeline are wrapped in ``METRICS.span(stage)``:
+
+- ``preprocess``, ``vectorize``, ``score``: one TfidfIndex query
+- ``batch_vectorize``, ``batch_score``: one TfidfIndex.answer_batch call
+- ``cache_lookup``, ``intent``, ``retrieve``, ``render``, ``reply``: NovaBot.reply
+- ``reply_batch``: NovaBot.reply_batch
+- ``slot_fetch``: one call to the answer slot provider (novabot.templates)
+- ``admission_wait``: waiting for a retrieval slot (novabot.admission)
+- ``first_chunk``, ``stream``: time to the first and the last chunk of a
+  streamed answer (novabot.streaming)
+- ``load_dataset``, ``index_build``: parsing the dataset and building an index
+- ``chat_handler``, ``render_history``: the Streamlit sidebar chat
+- ``http_request``: one request to novabot.server
+
+Each stage feeds a fixed-bucket histogram (10 us to 10 s, doubling), which
+gives p50/p95/p99 estimates in :meth:`Registry.stats` and ``_bucket`` series
+in :meth:`Registry.render`, the Prometheus text format served on
+``/metrics`` by novabot.server or by :func:`start_metrics_server`.
+Counters come from collectors, such as NovaBot's reply counts by source.
+
+:class:`SlowRequestProfiler` is opt-in: it profiles a sample of requests and
+writes a cProfile (or pyinstrument) dump for each one slower than a
+threshold.
+"""
+import bisect
+import contextlib
+import logging
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = tuple(1e-5 * 2 ** i for i in range(21))
+
+
+class Histogram:
+
+    def __init__(self, bounds=DEFAULT_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        slot = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[slot] += 1
+            self.count += 1
+            self.sum += value
+
+    def quantile(self, q):
+        """Estimate by linear interpolation inside the bucket holding rank ``q``."""
+        with self._lock:
+            counts, count = list(self.counts), self.count
+        if not count:
+            return 0.0
+        rank = q * count
+        seen = 0
+        for slot, n in enumerate(counts):
+            if n and seen + n >= rank:
+                lower = self.bounds[slot - 1] if slot else 0.0
+                upper = self.bounds[slot] if slot < len(self.bounds) else self.bounds[-1]
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+        return self.bounds[-1]
+
+
+class _Span:
+    __slots__ = ("registry", "stage", "start")
+
+    def __init__(self, registry, stage):
+        self.registry = registry
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.observe(self.stage, time.perf_counter() - self.start)
+
+
+class Registry:
+
+    def __init__(self, bounds=DEFAULT_BUCKETS):
+        self.bounds = bounds
+        self.histograms = {}
+        self._collectors = {}
+        self._lock = threading.Lock()
+
+    def span(self, stage):
+        """Context manager that records its duration under ``stage``."""
+        return _Span(self, stage)
+
+    def observe(self, stage, seconds):
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(stage, Histogram(self.bounds))
+        histogram.observe(seconds)
+
+    def add_collector(self, name, collect):
+        """Register ``collect() -> [(metric, type, help, [(labels, value), ...]), ...]``.
+
+        A collector registered again under the same name replaces the old one.
+        """
+        self._collectors[name] = collect
+
+    def stats(self):
+        return {stage: {"count": h.count, "mean_ms": 1000 * h.sum / h.count if h.count else 0.0,
+                        "p50_ms": 1000 * h.quantile(0.5), "p95_ms": 1000 * h.quantile(0.95),
+                        "p99_ms": 1000 * h.quantile(0.99)}
+                for stage, h in sorted(list(self.histograms.items()))}
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format."""
+        lines = ["# HELP novabot_stage_duration_seconds Time spent in each pipeline stage.",
+                 "# TYPE novabot_stage_duration_seconds histogram"]
+        for stage, histogram in sorted(list(self.histograms.items())):
+            with histogram._lock:
+                counts, count, total = list(histogram.counts), histogram.count, histogram.sum
+            cumulative = 0
+            for bound, n in zip(list(histogram.bounds) + ["+Inf"], counts):
+                cumulative += n
+                le = bound if bound == "+Inf" else "%g" % bound
+                lines.append('novabot_stage_duration_seconds_bucket{stage="%s",le="%s"} %d'
+                             % (stage, le, cumulative))
+            lines.append('novabot_stage_duration_seconds_sum{stage="%s"} %r' % (stage, total))
+            lines.append('novabot_stage_duration_seconds_count{stage="%s"} %d' % (stage, count))
+        for collect in list(self._collectors.values()):
+            for metric, kind, help_text, samples in collect():
+                lines.append("# HELP %s %s" % (metric, help_text))
+                lines.append("# TYPE %s %s" % (metric, kind))
+                for labels, value in samples:
+                    label_text = ",".join('%s="%s"' % item for item in sorted(labels.items()))
+                    lines.append("%s%s %r" % (metric, "{%s}" % label_text if label_text else "", value))
+        return "\n".join(lines) + "\n"
+
+
+METRICS = Registry()
+
+
+class SlowRequestProfiler:
+    """Profiles a ``sample_rate`` share of requests; keeps the slow ones.
+
+    A request that takes ``threshold_ms`` or longer has its profile written
+    to ``directory``: ``.prof`` files for ``engine="cProfile"`` (open with
+    ``python -m pstats`` or snakeviz), ``.html`` for ``engine="pyinstrument"``
+    (optional dependency). Only one request is profiled at a time; others
+    run unprofiled meanwhile.
+    """
+
+    def __init__(self, threshold_ms=100.0, sample_rate=1.0, directory="profiles", engine="cProfile"):
+        if engine == "pyinstrument":
+            try:
+                import pyinstrument  # noqa: F401
+            except ImportError:
+                raise ImportError("engine='pyinstrument' needs the optional 'pyinstrument' package; "
+                                  "use engine='cProfile'") from None
+        elif engine != "cProfile":
+            raise ValueError("engine must be 'cProfile' or 'pyinstrument'")
+        self.threshold_ms = threshold_ms
+        self.sample_rate = sample_rate
+        self.directory = directory
+        self.engine = engine
+        self.profiled = 0
+        self.dumped = 0
+        self._lock = threading.Lock()
+
+    def _start(self):
+        if self.engine == "pyinstrument":
+            from pyinstrument import Profiler
+
+            profiler = Profiler()
+            profiler.start()
+            return profiler
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler
+
+    def _dump(self, profiler, name, elapsed_ms):
+        os.makedirs(self.directory, exist_ok=True)
+        stem = os.path.join(self.directory, "%s-%d-%dms" % (name, time.time() * 1000, elapsed_ms))
+        if self.engine == "pyinstrument":
+            with open(stem + ".html", "w", encoding="utf-8") as out:
+                out.write(profiler.output_html())
+        else:
+            profiler.dump_stats(stem + ".prof")
+        self.dumped += 1
+        logger.warning("Slow %s took %.1f ms; profile written to %s", name, elapsed_ms, stem)
+
+    @contextlib.contextmanager
+    def profile(self, name):
+        if random.random() >= self.sample_rate or not self._lock.acquire(blocking=False):
+            yield
+            return
+        try:
+            try:
+                profiler = self._start()
+            except ValueError:
+                # Another profiler (a debugger, coverage) already owns the hook
+                profiler = None
+            start = time.perf_counter()
+            try:
+                yield
+            finally:
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                if profiler is not None:
+                    if self.engine == "pyinstrument":
+                        profiler.stop()
+                    else:
+                        profiler.disable()
+                    self.profiled += 1
+                    if elapsed_ms >= self.threshold_ms:
+                        self._dump(profiler, name, elapsed_ms)
+        finally:
+            self._lock.release()
+
+
+def start_metrics_server(port, host="127.0.0.1", registry=METRICS):
+    """Serve ``registry.render()`` on ``http://host:port/metrics`` from a daemon thread."""
+
+    class Handler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="novabot-metrics", daemon=True).start()
+    return server
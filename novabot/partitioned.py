@@ -0,0 +1,185 @@
+"""One sub-index per dataset section, with a router in front.
+
+``novabank_dataset.txt`` is split into sections ("💸 ACCOUNT & BALANCE",
+"🏠 LOANS, MORTGAGES, CREDIT", ...). :class:`PartitionedIndex` builds a
+:class:`novabot.retrieval.TfidfIndex` per section on one shared vocabulary
+(and one character n-gram vocabulary in fuzzy mode), so scores from
+different sections compare directly. A nearest-centroid router (a linear
+classifier on the same TF-IDF features) sends each query to the one or two
+sections most likely to hold its answer, and only their rows are scored.
+
+The page the user is browsing can be passed as a hint: sections that belong
+to that page get their router score multiplied by ``hint_boost``.
+"""
+from collections import defaultdict
+
+import numpy as np
+from scipy import sparse
+
+from novabot.fuzzy import char_vectorizer
+from novabot.retrieval import TfidfIndex, _top_k, preprocess
+from novabot.text import WordVectorizer
+
+# App page -> words of the section headers it covers
+PAGE_SECTIONS = {
+    "Accounts": ("ACCOUNT", "DEPOSIT", "WITHDRAWAL", "TRANSFER", "STATEMENT"),
+    "Loans": ("LOAN", "MORTGAGE", "CREDIT"),
+    "Investments": ("INVEST",),
+    "Services": ("SECURITY", "SETTINGS", "CUSTOMER"),
+    "About": ("GENERAL", "OVERVIEW"),
+}
+
+
+class PartitionedIndex:
+    """Section sub-indexes behind a query router, with the TfidfIndex interface.
+
+    A query is sent to the best-scoring section plus up to
+    ``max_partitions - 1`` more whose router score is at least
+    ``min_route_ratio`` of the best, then to further sections only if those
+    hold fewer than ``k`` questions. A query sharing no word with any
+    section (a fuzzy-only match) is sent everywhere.
+    """
+
+    accepts_page = True
+    accepts_context = True
+
+    def __init__(self, corpus, max_partitions=2, min_route_ratio=0.5, hint_boost=1.5, **index_options):
+        self.questions = list(corpus.questions)
+        self.answers = list(corpus.answers)
+        self.max_partitions = max_partitions
+        self.min_route_ratio = min_route_ratio
+        self.hint_boost = hint_boost
+        texts = [preprocess(q) for q in self.questions]
+        self.vectorizer = WordVectorizer().fit(texts)
+        self._analyze = self.vectorizer.build_analyzer()
+        if index_options.get("fuzzy"):
+            index_options["char_vectorizer"] = char_vectorizer(texts).fit(texts)
+
+        category_ids = np.asarray(corpus.category_ids)
+        self.names = []
+        self.row_ids = []
+        self.partitions = []
+        centroids = []
+        for code in np.unique(category_ids):
+            rows = np.flatnonzero(category_ids == code)
+            index = TfidfIndex([self.questions[i] for i in rows], [self.answers[i] for i in rows],
+                               vectorizer=self.vectorizer, **index_options)
+            self.names.append(corpus.category_names[code] if code >= 0 else "")
+            self.row_ids.append(rows)
+            self.partitions.append(index)
+            centroid = np.asarray(index.matrix.sum(axis=0)).ravel()
+            centroids.append(centroid / max(np.linalg.norm(centroid), 1e-12))
+        # Every section has character n-grams or none does
+        self.fuzzy = self.partitions[0].fuzzy if self.partitions else None
+        self.sizes = np.array([len(rows) for rows in self.row_ids])
+        self.centroids_t = sparse.csr_matrix(np.array(centroids).T)
+        self.page_partitions = {
+            page: np.array([p for p, name in enumerate(self.names)
+                            if any(word in name.upper() for word in words)], dtype=np.int64)
+            for page, words in PAGE_SECTIONS.items()}
+
+    def __len__(self):
+        return len(self.questions)
+
+    def _route_scores(self, vectors, pages=None):
+        scores = (vectors @ self.centroids_t).toarray()
+        if pages is not None:
+            for i, page in enumerate(pages):
+                hinted = self.page_partitions.get(page)
+                if hinted is not None and len(hinted):
+                    scores[i, hinted] *= self.hint_boost
+        return scores
+
+    def _choose(self, scores, k):
+        order = np.argsort(-scores, kind="stable")
+        best = scores[order[0]]
+        if best <= 0:
+            return order
+        chosen = [order[0]]
+        for p in order[1:self.max_partitions]:
+            if scores[p] < self.min_route_ratio * best:
+                break
+            chosen.append(p)
+        covered = self.sizes[chosen].sum()
+        for p in order[len(chosen):]:
+            if covered >= k:
+                break
+            chosen.append(p)
+            covered += self.sizes[p]
+        return np.array(chosen)
+
+    def route(self, query, page=None, k=1):
+        """Partition numbers the query is sent to, most likely first."""
+        vector = self.vectorizer.transform([preprocess(query)])
+        return self._choose(self._route_scores(vector, [page])[0], k)
+
+    def top_k(self, query, k=1, page=None, exact=False, context=None):
+        k = min(k, len(self))
+        text = preprocess(query)
+        if context is None:
+            vector = self.vectorizer.transform([text])
+        else:
+            vector = context.vector(self.vectorizer, text)
+        rows, scores = [], []
+        for p in self._choose(self._route_scores(vector, [page])[0], k):
+            part_rows, part_scores = self.partitions[p]._top_k_text(text, vector, k, exact)
+            rows.append(self.row_ids[p][part_rows])
+            scores.append(part_scores)
+        rows, scores = np.concatenate(rows), np.concatenate(scores)
+        top = np.argsort(-scores, kind="stable")[:k]
+        return rows[top], scores[top]
+
+    def has_known_terms(self, query):
+        text = preprocess(query)
+        vocabulary = self.vectorizer.vocabulary_
+        if any(token in vocabulary for token in self._analyze(text)):
+            return True
+        return any(part.fuzzy is not None and part.fuzzy.has_known_ngrams(text) for part in self.partitions)
+
+    def match(self, query, page=None, context=None):
+        if not self.has_known_terms(query):
+            return None
+        return self.best_match(query, page, context)
+
+    def best_match(self, query, page=None, context=None):
+        rows, scores = self.top_k(query, 1, page, context=context)
+        if not len(rows):
+            return 0, 0.0
+        return int(rows[0]), float(scores[0])
+
+    def answer(self, query, page=None):
+        return self.answers[self.best_match(query, page)[0]]
+
+    def answer_batch(self, queries, k=1, pages=None, max_cells=2 ** 24):
+        """Top-``k`` indices and scores per query; each partition scores the
+        queries routed to it in one sparse product per block."""
+        k = min(k, len(self))
+        texts = [preprocess(q) for q in queries]
+        vectors = self.vectorizer.transform(texts)
+        routed = defaultdict(list)
+        for i, scores in enumerate(self._route_scores(vectors, pages)):
+            for p in self._choose(scores, k):
+                routed[p].append(i)
+
+        candidate_rows = [[] for _ in queries]
+        candidate_scores = [[] for _ in queries]
+        for p, members in routed.items():
+            part = self.partitions[p]
+            part_k = min(k, len(part))
+            block = max(1, max_cells // len(part))
+            for start in range(0, len(members), block):
+                chunk = members[start:start + block]
+                dense = part._score_texts([texts[i] for i in chunk], vectors[chunk])
+                top = _top_k(dense, part_k)
+                top_scores = np.take_along_axis(dense, top, axis=1)
+                for j, i in enumerate(chunk):
+                    candidate_rows[i].append(self.row_ids[p][top[j]])
+                    candidate_scores[i].append(top_scores[j])
+
+        indices = np.empty((len(queries), k), dtype=np.int64)
+        scores = np.empty((len(queries), k), dtype=np.float64)
+        for i in range(len(queries)):
+            rows, row_scores = np.concatenate(candidate_rows[i]), np.concatenate(candidate_scores[i])
+            top = np.argsort(-row_scores, kind="stable")[:k]
+            indices[i], scores[i] = rows[top], row_scores[top]
+        return indices, scores
@@ -0,0 +1,151 @@
+import logging
+import os
+import threading
+
+from novabot.dataset import Corpus, file_digest, load_corpus, load_dataset
+from novabot.metrics import METRICS
+from novabot.retrieval import TfidfIndex
+
+logger = logging.getLogger(__name__)
+
+
+def build_tfidf_index(file_path, **options):
+    from novabot.artifact import load_prebuilt
+
+    # A prebuilt artifact for this exact file skips fitting (see novabot.artifact)
+    index = load_prebuilt(file_path, **options)
+    if index is not None:
+        logger.info("Loaded prebuilt index for %s", file_path)
+        return index
+    return TfidfIndex(*load_dataset(file_path), **options)
+
+
+def build_dense_index(file_path, **options):
+    from novabot.dense import build_lsa_index
+
+    return build_lsa_index(*load_dataset(file_path), **options)
+
+
+def build_hybrid_index(file_path, fuzzy=True, **options):
+    from novabot.hybrid import BM25Scorer, HybridRetriever
+
+    questions, answers = load_dataset(file_path)
+    return HybridRetriever(TfidfIndex(questions, answers, fuzzy=fuzzy), BM25Scorer(questions, answers), **options)
+
+
+def build_partitioned_index(file_path, fuzzy=True, **options):
+    from novabot.partitioned import PartitionedIndex
+
+    try:
+        corpus = load_corpus(file_path)
+    except FileNotFoundError:
+        corpus = Corpus.from_entries((q, a, None) for q, a in zip(*load_dataset(file_path)))
+    return PartitionedIndex(corpus, fuzzy=fuzzy, **options)
+
+
+def build_segmented_index(file_path, **options):
+    from novabot.segments import SegmentedIndex
+
+    return SegmentedIndex.from_file(file_path, **options).start()
+
+
+def build_sharded_index(file_path, **options):
+    from novabot.sharded import ShardedIndex
+
+    return ShardedIndex(*load_dataset(file_path), **options)
+
+
+BUILDERS = {"tfidf": build_tfidf_index, "dense": build_dense_index, "hybrid": build_hybrid_index,
+            "partitioned": build_partitioned_index, "segmented": build_segmented_index,
+            "sharded": build_sharded_index}
+
+
+class IndexManager:
+    """Owns the live index for a dataset file and hot-swaps it on change.
+
+    Readers take ``manager.current`` once per request and keep using that
+    object; a rebuild happens entirely on the watcher thread and only the
+    final reference assignment is visible to them, so a half-built index is
+    never observed. Rebuilds are keyed on the file's content hash, so a
+    touched-but-identical file is ignored. An index with ``sync_file``
+    (novabot.segments) is updated in place with just the changed entries
+    instead of being rebuilt.
+    """
+
+    def __init__(self, file_path, build=build_tfidf_index, poll_interval=2.0):
+        self.file_path = file_path
+        self.build = build
+        self.poll_interval = poll_interval
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._signature = self._stat()
+        self.digest = self._digest()
+        with METRICS.span("index_build"):
+            self.current = build(file_path)
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.file_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def _digest(self):
+        try:
+            return file_digest(self.file_path)
+        except FileNotFoundError:
+            return None
+
+    def add_listener(self, callback):
+        """Call ``callback(new_index)`` after every swap."""
+        self._listeners.append(callback)
+
+    def check(self):
+        """Rebuild and swap if the file content changed; return True on swap.
+
+        A build that raises leaves the current index in place and is tried
+        again on the next call.
+        """
+        with self._lock:
+            signature = self._stat()
+            if signature == self._signature:
+                return False
+            digest = self._digest()
+            if digest == self.digest:
+                self._signature = signature
+                return False
+            index = self.current
+            if hasattr(index, "sync_file"):
+                applied = index.sync_file(self.file_path)
+                logger.info("Applied %s from %s", applied, self.file_path)
+            else:
+                with METRICS.span("index_build"):
+                    index = self.build(self.file_path)
+            # Recorded only now, so a failed build is retried on the next check
+            self._signature, self.digest, self.current = signature, digest, index
+        logger.info("Reloaded %s (%d questions)", self.file_path, len(index))
+        for callback in self._listeners:
+            callback(index)
+        return True
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.check()
+            except Exception:
+                # Keep serving the previous index; retry on the next change
+                logger.exception("Failed to rebuild index from %s", self.file_path)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._watch, name="novabot-index-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,193 @@
+import numpy as np
+
+from novabot.fuzzy import CharNgramIndex
+from novabot.inverted import InvertedIndex
+from novabot.metrics import METRICS
+from novabot.text import WordVectorizer, fold
+
+
+def preprocess(text):
+    return fold(text)
+
+
+class TfidfIndex:
+    """TF-IDF index over the FAQ questions, fitted once and queried many times.
+
+    Rows of ``matrix`` are L2-normalised by the vectorizer, so a sparse dot
+    product with a transformed query gives the same ranking as
+    ``cosine_similarity``. With ``pruning`` single queries are answered from
+    an inverted index that only scores questions sharing a term with the
+    query; ``exact=True`` forces the full matrix product.
+
+    With ``fuzzy`` a character n-gram index is built as well and every score
+    becomes ``(1 - fuzzy_weight) * word + fuzzy_weight * char``, so
+    misspelled queries still find their question. Fuzzy indexes score every
+    question with the matrix product and build no inverted index: a query
+    has dozens of n-grams, and MaxScore over words and n-grams together was
+    several times slower at p99 than the product (``benchmarks/bench_fuzzy.py``).
+
+    A ``vectorizer`` (and ``char_vectorizer`` for fuzzy mode) that is
+    already fitted is reused as is, so several indexes over parts of one
+    corpus share a vocabulary and IDF weights and their scores stay
+    comparable. :meth:`from_fitted` builds an index from a matrix that is
+    already transformed, as stored by :mod:`novabot.artifact`. Words are
+    weighted by :class:`novabot.text.WordVectorizer`; scikit-learn is only
+    imported to fit the character n-grams.
+    """
+
+    dense_cutoff = 0.01
+    accepts_context = True
+
+    def __init__(self, questions, answers, pruning=True, fuzzy=False, fuzzy_weight=0.3, vectorizer=None,
+                 char_vectorizer=None):
+        self.questions = list(questions)
+        self.answers = list(answers)
+        texts = [preprocess(q) for q in self.questions]
+        if vectorizer is None:
+            self.vectorizer = WordVectorizer()
+            self.matrix = self.vectorizer.fit_transform(texts).tocsr()
+        else:
+            self.vectorizer = vectorizer
+            self.matrix = vectorizer.transform(texts).tocsr()
+        # Transposed copy so scoring is a (1 x V) @ (V x N) product
+        self.matrix_t = self.matrix.T.tocsr()
+        self.fuzzy = CharNgramIndex(texts, vectorizer=char_vectorizer) if fuzzy else None
+        self.inverted = InvertedIndex(self.matrix) if pruning and not fuzzy else None
+        self.fuzzy_weight = fuzzy_weight
+        self._analyze = self.vectorizer.build_analyzer()
+
+    @classmethod
+    def from_fitted(cls, questions, answers, vectorizer, matrix_t, pruning=True, fuzzy=None, fuzzy_weight=0.3):
+        """An index over the transposed question matrix ``matrix_t`` (terms x
+        questions) of ``vectorizer``; ``fuzzy`` is a ready CharNgramIndex."""
+        index = cls.__new__(cls)
+        index.questions = list(questions)
+        index.answers = list(answers)
+        index.vectorizer = vectorizer
+        index.matrix_t = matrix_t
+        index.matrix = matrix_t.T
+        index.fuzzy = fuzzy
+        index.inverted = InvertedIndex(index.matrix) if pruning and fuzzy is None else None
+        index.fuzzy_weight = fuzzy_weight
+        index._analyze = vectorizer.build_analyzer()
+        return index
+
+    def __len__(self):
+        return len(self.questions)
+
+    def transform(self, query):
+        return self.vectorizer.transform([preprocess(query)])
+
+    def scores(self, query):
+        return self._score_texts([preprocess(query)])[0]
+
+    def _score_texts(self, texts, word_vectors=None):
+        if word_vectors is None:
+            word_vectors = self.vectorizer.transform(texts)
+        scores = (word_vectors @ self.matrix_t).toarray()
+        if self.fuzzy is not None:
+            scores *= 1 - self.fuzzy_weight
+            scores += self.fuzzy_weight * self.fuzzy.scores_batch(texts)
+        return scores
+
+    def top_k(self, query, k=1, exact=False, context=None):
+        """Best ``k`` question indices and scores for one query.
+
+        Queries made only of common terms cannot terminate early, so when
+        even the rarest query term is in more than ``dense_cutoff`` of the
+        questions they take the matrix product, which is cheaper than
+        merging that many posting lists. A
+        :class:`novabot.context.ConversationContext` mixes earlier turns
+        into the query vector and records this one.
+        """
+        with METRICS.span("preprocess"):
+            text = preprocess(query)
+        with METRICS.span("vectorize"):
+            if context is None:
+                vector = self.vectorizer.transform([text])
+            else:
+                vector = context.vector(self.vectorizer, text)
+        with METRICS.span("score"):
+            return self._top_k_text(text, vector, k, exact)
+
+    def _top_k_text(self, text, vector, k=1, exact=False):
+        if (self.inverted is None or exact
+                or self.inverted.rarest_posting(vector) > self.dense_cutoff * len(self)):
+            scores = self._score_texts([text], vector)[0]
+            if k == 1:
+                top = np.array([np.argmax(scores)])
+            else:
+                top = _top_k(scores[np.newaxis, :], min(k, len(self)))[0]
+            return top, scores[top]
+        rows, scores, _ = self.inverted.top_k(vector, k)
+        return rows, scores
+
+    def has_known_terms(self, query):
+        """Whether the query shares any feature with the index.
+
+        Costs one tokenization and a few dict lookups, so queries that would
+        score 0 against every question are rejected before any matrix work.
+        """
+        text = preprocess(query)
+        vocabulary = self.vectorizer.vocabulary_
+        if any(token in vocabulary for token in self._analyze(text)):
+            return True
+        return self.fuzzy is not None and self.fuzzy.has_known_ngrams(text)
+
+    def match(self, query, exact=False, context=None):
+        """``(index, score)`` of the best question, or None if no term is known."""
+        if not self.has_known_terms(query):
+            return None
+        return self.best_match(query, exact, context)
+
+    def best_match(self, query, exact=False, context=None):
+        rows, scores = self.top_k(query, 1, exact, context)
+        if not len(rows):
+            # No shared terms: every score is 0, as np.argmax would see it
+            return 0, 0.0
+        return int(rows[0]), float(scores[0])
+
+    def answer(self, query):
+        return self.answers[self.best_match(query)[0]]
+
+    def answer_batch(self, queries, k=1, max_cells=2 ** 24):
+        """Top-``k`` question indices and scores for every query.
+
+        All queries are vectorized in one ``transform`` call and scored with
+        one sparse product per block of rows; blocks keep the dense score
+        buffer under ``max_cells`` floats. Returns two ``(len(queries), k)``
+        arrays, best match first. Equal scores may come back in any order.
+        """
+        k = min(k, len(self))
+        with METRICS.span("batch_vectorize"):
+            texts = [preprocess(q) for q in queries]
+            query_matrix = self.vectorizer.transform(texts)
+        with METRICS.span("batch_score"):
+            return self._answer_matrix(texts, query_matrix, k, max_cells)
+
+    def _answer_matrix(self, texts, query_matrix, k, max_cells):
+        indices = np.empty((query_matrix.shape[0], k), dtype=np.int64)
+        scores = np.empty((query_matrix.shape[0], k), dtype=np.float64)
+        block = max(1, max_cells // max(len(self), 1))
+        for start in range(0, query_matrix.shape[0], block):
+            stop = start + block
+            dense = self._score_texts(texts[start:stop], query_matrix[start:stop])
+            top = _top_k(dense, k)
+            indices[start:stop] = top
+            scores[start:stop] = np.take_along_axis(dense, top, axis=1)
+        return indices, scores
+
+
+def _top_k(scores, k):
+    # argpartition picks the k best per row in O(n), then only those k are sorted
+    if k < scores.shape[1]:
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        top = np.broadcast_to(np.arange(scores.shape[1]), scores.shape).copy()
+    top.sort(axis=1)
+    order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1, kind='stable')
+    return np.take_along_axis(top, order, axis=1)
+
+
+def get_most_relevant_answer(user_query, index):
+    return index.answer(user_query)
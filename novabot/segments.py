@@ -0,0 +1,390 @@
+"""Incrementally updatable TF-IDF index made of immutable segments.
+
+FAQ entries are keyed by question. Adding or updating entries builds a small
+new segment from just those entries; deleting one marks it dead (a
+tombstone) and adjusts the document frequencies. The cost of a change is
+proportional to the change, not to the corpus. Segments are merged in the
+background (LSM-style): small segments are folded together once there are
+more than ``max_segments``, and everything is rewritten into one segment
+when tombstones or IDF drift pass their thresholds.
+
+IDF weights are refreshed lazily. Scoring uses a snapshot of the IDF taken
+at the last full merge; terms first seen after it get their IDF when their
+segment is built. After :meth:`SegmentedIndex.compact` the scores equal a
+TfidfIndex fitted from scratch on the live entries.
+
+Changesets are JSON lines, applied all-or-nothing::
+
+    {"op": "upsert", "question": "...", "answer": "..."}
+    {"op": "update", "question": "...", "new_question": "...", "answer": "..."}
+    {"op": "delete", "question": "..."}
+"""
+import json
+import logging
+import threading
+from collections import Counter
+
+import numpy as np
+from scipy import sparse
+
+from novabot.retrieval import _top_k, preprocess
+from novabot.text import Tokenizer
+
+logger = logging.getLogger(__name__)
+
+OPS = ("upsert", "update", "delete")
+
+
+def _text(value):
+    return isinstance(value, str) and bool(value)
+
+
+def read_changeset(lines):
+    """Parse and validate changeset lines; raise ValueError naming the line."""
+    changes = []
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            change = json.loads(line)
+        except ValueError:
+            raise ValueError("changeset line %d is not valid JSON" % number) from None
+        if not isinstance(change, dict) or change.get("op") not in OPS:
+            raise ValueError("changeset line %d needs an op in %s" % (number, ", ".join(OPS)))
+        if not _text(change.get("question")):
+            raise ValueError("changeset line %d needs a question" % number)
+        if change["op"] == "upsert" and "answer" not in change:
+            raise ValueError("changeset line %d needs an answer" % number)
+        for field in ("new_question", "answer"):
+            if field in change and not _text(change[field]):
+                raise ValueError("changeset line %d: %s must be a non-empty string" % (number, field))
+        changes.append(change)
+    return changes
+
+
+class Segment:
+    """Raw term counts of some documents plus their TF-IDF matrix under one IDF."""
+
+    def __init__(self, doc_ids, counts, idf):
+        self.doc_ids = doc_ids
+        self.counts = counts
+        self.dead = 0
+        weighted = counts @ sparse.diags(idf[:counts.shape[1]])
+        norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1)).ravel())
+        norms[norms == 0] = 1
+        self.matrix_t = (sparse.diags(1 / norms) @ weighted).T.tocsr()
+
+    def __len__(self):
+        return len(self.doc_ids)
+
+
+class SegmentedIndex:
+    """TF-IDF index over segments, with the TfidfIndex query interface.
+
+    ``answers`` is indexed by document id; ids of deleted or replaced
+    entries are never reused, so an id read before a change stays valid.
+    Duplicate questions keep the last answer.
+    """
+
+    def __init__(self, questions, answers, max_segments=8, max_dead_ratio=0.2, max_idf_drift=0.1):
+        self.max_segments = max_segments
+        self.max_dead_ratio = max_dead_ratio
+        self.max_idf_drift = max_idf_drift
+        self._analyze = Tokenizer()
+        self.vocabulary = {}
+        self.df = np.zeros(0, dtype=np.int64)
+        self.questions = []
+        self.answers = []
+        self.live = np.zeros(0, dtype=bool)
+        self.keys = {}
+        self._location = {}
+        self._file_entries = None
+        self._lock = threading.RLock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._snapshot_docs = 0
+        # Readers take (segments, idf) once per query; writers replace it whole
+        self._view = ((), np.zeros(0))
+        entries = dict(zip(questions, answers))
+        # The first segment's IDF is computed from scratch: it is a snapshot
+        self._add(list(entries), list(entries.values()))
+        self._snapshot_docs = len(self.keys)
+
+    def __len__(self):
+        return len(self.keys)
+
+    @classmethod
+    def from_file(cls, file_path, **options):
+        """Index a dataset file; later :meth:`sync_file` calls apply its diffs."""
+        from novabot.dataset import load_dataset
+
+        questions, answers = load_dataset(file_path)
+        index = cls(questions, answers, **options)
+        index._file_entries = dict(zip(questions, answers))
+        return index
+
+    # Writes
+
+    def _count_matrix(self, texts, grow=False):
+        indptr, indices, data = [0], [], []
+        vocabulary = self.vocabulary
+        for text in texts:
+            counts = Counter()
+            for token in self._analyze(preprocess(text)):
+                term = vocabulary.get(token)
+                if term is None:
+                    if not grow:
+                        continue
+                    term = vocabulary[token] = len(vocabulary)
+                counts[term] += 1
+            indices.extend(counts)
+            data.extend(counts.values())
+            indptr.append(len(indices))
+        return sparse.csr_matrix((np.array(data, dtype=np.float64), np.array(indices, dtype=np.int64), indptr),
+                                 shape=(len(texts), len(vocabulary)))
+
+    def _current_idf(self, terms=None):
+        df = self.df if terms is None else self.df[terms]
+        return np.log((1 + len(self.keys)) / (1 + df)) + 1
+
+    def _add(self, questions, answers):
+        """Index new entries as one segment; caller holds the lock."""
+        for question in questions:
+            if question in self.keys:
+                self._delete(question)
+        counts = self._count_matrix(questions, grow=True)
+        vocabulary_size = len(self.vocabulary)
+        if len(self.df) < vocabulary_size:
+            self.df = np.concatenate([self.df, np.zeros(vocabulary_size - len(self.df), dtype=np.int64)])
+        np.add.at(self.df, counts.indices, 1)
+
+        first = len(self.questions)
+        doc_ids = np.arange(first, first + len(questions), dtype=np.int64)
+        self.questions.extend(questions)
+        self.answers.extend(answers)
+        self.live = np.concatenate([self.live, np.ones(len(questions), dtype=bool)])
+        for question, doc_id in zip(questions, doc_ids):
+            self.keys[question] = int(doc_id)
+
+        segments, idf = self._view
+        if len(idf) < vocabulary_size:
+            # Terms new since the snapshot get their IDF now; known terms keep theirs
+            idf = np.concatenate([idf, self._current_idf(np.arange(len(idf), vocabulary_size))])
+        segment = Segment(doc_ids, counts, idf)
+        for row, doc_id in enumerate(doc_ids):
+            self._location[int(doc_id)] = (segment, row)
+        self._view = (segments + (segment,), idf)
+
+    def _delete(self, question):
+        doc_id = self.keys.pop(question)
+        segment, row = self._location.pop(doc_id)
+        self.live[doc_id] = False
+        segment.dead += 1
+        start, stop = segment.counts.indptr[row], segment.counts.indptr[row + 1]
+        self.df[segment.counts.indices[start:stop]] -= 1
+
+    def apply(self, changes):
+        """Apply parsed changes; returns counts per outcome.
+
+        The changes are resolved into deletions and new entries before the
+        index is touched, so one that cannot be applied changes nothing.
+        """
+        with self._lock:
+            deleted, pending, applied = self._plan(changes)
+            for question in deleted:
+                self._delete(question)
+            if pending:
+                self._add(list(pending), list(pending.values()))
+        self._wake.set()
+        if self._thread is None:
+            self.maybe_merge()
+        return dict(applied)
+
+    def _plan(self, changes):
+        """``(questions to delete, {question: answer} to add, counts)``."""
+        applied = Counter()
+        deleted = set()
+        pending = {}
+
+        def live(question):
+            return question in self.keys and question not in deleted
+
+        for change in changes:
+            question, op = change["question"], change["op"]
+            if op == "delete":
+                pending.pop(question, None)
+                if live(question):
+                    deleted.add(question)
+                    applied["deleted"] += 1
+                else:
+                    applied["missing"] += 1
+                continue
+            if op == "update":
+                old = pending.pop(question, None)
+                if old is None and not live(question):
+                    applied["missing"] += 1
+                    continue
+                answer = change.get("answer", old if old is not None else self.answers[self.keys[question]])
+                new_question = change.get("new_question", question)
+                if new_question != question and live(question):
+                    deleted.add(question)
+                pending[new_question] = answer
+                applied["updated"] += 1
+            else:
+                pending[question] = change["answer"]
+                applied["upserted"] += 1
+        return deleted, pending, applied
+
+    def apply_changeset(self, lines):
+        return self.apply(read_changeset(lines))
+
+    def sync_file(self, file_path):
+        """Apply the difference between the dataset file and its last version."""
+        from novabot.dataset import load_dataset
+
+        entries = dict(zip(*load_dataset(file_path)))
+        previous = self._file_entries or {}
+        changes = [{"op": "delete", "question": q} for q in previous if q not in entries]
+        changes += [{"op": "upsert", "question": q, "answer": a}
+                    for q, a in entries.items() if previous.get(q) != a or q not in self.keys]
+        self._file_entries = entries
+        return self.apply(changes)
+
+    # Merging
+
+    def _merge(self, segments, idf):
+        doc_ids = np.concatenate([s.doc_ids for s in segments])
+        width = len(idf)
+        counts = sparse.vstack([_widen(s.counts, width) for s in segments]).tocsr()
+        keep = self.live[doc_ids]
+        return Segment(doc_ids[keep], counts[keep], idf)
+
+    def maybe_merge(self):
+        """Merge small segments or compact everything when thresholds are passed."""
+        segments, _ = self._view
+        dead = sum(s.dead for s in segments)
+        drift = abs(len(self.keys) - self._snapshot_docs) / max(self._snapshot_docs, 1)
+        if dead > self.max_dead_ratio * max(len(self.keys), 1) or drift > self.max_idf_drift:
+            self.compact()
+        elif len(segments) > self.max_segments:
+            with self._lock:
+                segments, idf = self._view
+                if len(segments) <= self.max_segments:
+                    return
+                largest = max(range(len(segments)), key=lambda i: len(segments[i]))
+                small = [s for i, s in enumerate(segments) if i != largest]
+                merged = self._merge(small, idf)
+                self._relocate(merged)
+                self._view = ((segments[largest], merged), idf)
+
+    def compact(self):
+        """Rewrite all segments into one under freshly computed IDF weights."""
+        with self._lock:
+            segments, _ = self._view
+            idf = self._current_idf()
+            merged = self._merge(segments, idf) if segments else Segment(
+                np.zeros(0, dtype=np.int64), sparse.csr_matrix((0, len(idf))), idf)
+            self._relocate(merged)
+            self._view = ((merged,), idf)
+            self._snapshot_docs = len(self.keys)
+
+    def _relocate(self, segment):
+        for row, doc_id in enumerate(segment.doc_ids):
+            self._location[int(doc_id)] = (segment, row)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait()
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            try:
+                self.maybe_merge()
+            except Exception:
+                logger.exception("Segment merge failed")
+
+    def start(self):
+        """Merge on a background thread instead of inside :meth:`apply`."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="novabot-segment-merger", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    # Queries
+
+    def _query_vectors(self, texts, idf):
+        counts = _widen(self._count_matrix(texts), len(idf))
+        weighted = counts @ sparse.diags(idf)
+        norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1)).ravel())
+        norms[norms == 0] = 1
+        return (sparse.diags(1 / norms) @ weighted).tocsr()
+
+    def _score_segments(self, queries, k):
+        """``(len(queries), k)`` doc ids and scores; dead entries score -1."""
+        segments, idf = self._view
+        vectors = self._query_vectors(queries, idf)
+        rows, scores = [], []
+        for segment in segments:
+            if not len(segment):
+                continue
+            dense = (_widen(vectors, segment.matrix_t.shape[0]) @ segment.matrix_t).toarray()
+            if segment.dead:
+                dense[:, ~self.live[segment.doc_ids]] = -1.0
+            top = _top_k(dense, min(k, len(segment)))
+            rows.append(segment.doc_ids[top])
+            scores.append(np.take_along_axis(dense, top, axis=1))
+        if not rows:
+            return np.zeros((vectors.shape[0], 0), dtype=np.int64), np.zeros((vectors.shape[0], 0))
+        rows, scores = np.hstack(rows), np.hstack(scores)
+        top = _top_k(scores, min(k, scores.shape[1]))
+        return np.take_along_axis(rows, top, axis=1), np.take_along_axis(scores, top, axis=1)
+
+    def top_k(self, query, k=1):
+        rows, scores = self._score_segments([query], k)
+        # Fewer than k live entries: drop the dead padding
+        keep = scores[0] >= 0
+        return rows[0][keep], scores[0][keep]
+
+    def has_known_terms(self, query):
+        vocabulary, df = self.vocabulary, self.df
+        for token in self._analyze(preprocess(query)):
+            term = vocabulary.get(token)
+            if term is not None and term < len(df) and df[term] > 0:
+                return True
+        return False
+
+    def match(self, query):
+        if not self.has_known_terms(query):
+            return None
+        return self.best_match(query)
+
+    def best_match(self, query):
+        rows, scores = self.top_k(query, 1)
+        if not len(rows):
+            return 0, 0.0
+        return int(rows[0]), float(scores[0])
+
+    def answer(self, query):
+        return self.answers[self.best_match(query)[0]]
+
+    def answer_batch(self, queries, k=1):
+        return self._score_segments(queries, min(k, len(self)))
+
+
+def _widen(matrix, width):
+    """``matrix`` with columns added (or dropped) to make it ``width`` wide."""
+    if matrix.shape[1] == width:
+        return matrix
+    if matrix.shape[1] > width:
+        return matrix[:, :width]
+    matrix = matrix.tocsr(copy=True)
+    matrix.resize((matrix.shape[0], width))
+    return matrix
@@ -0,0 +1,319 @@
+"""Headless NovaBot retrieval service over asyncio HTTP/1.1.
+
+    python -m novabot.server --dataset novabank_dataset.txt --port 8765
+
+Endpoints (JSON in and out):
+
+- ``POST /answer`` ``{"query": "...", "page": "Loans"}`` (or ``GET /answer?q=...&page=...``)
+- ``POST /answer_batch`` ``{"queries": ["...", ...], "pages": [...], "customers": [...]}``
+
+``page`` is optional: the app page the user is on, a routing hint for the
+partitioned index. ``/answer`` also takes an optional ``customer`` (the
+signed-in customer's name) for transaction questions and ``session`` (the
+chat session, for the per-session rate limit); those requests skip the
+coalescer, since their answers are per customer or session.
+- ``GET /stats`` and ``GET /health``
+- ``GET /metrics``: Prometheus text format (see novabot.metrics)
+- ``POST /admin/changeset`` with a JSON-lines changeset as the body and an
+  ``X-Admin-Token`` header, only when the server has an admin token::
+
+      curl --data-binary @changes.jsonl -H "X-Admin-Token: $TOKEN" \
+          http://127.0.0.1:8765/admin/changeset
+
+Scoring runs on a thread pool so the event loop only parses requests.
+Single ``/answer`` requests go through a :class:`Coalescer`, which answers
+concurrent identical questions once and scores the rest in micro-batches.
+"""
+import argparse
+import asyncio
+import hmac
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from urllib.parse import parse_qs, urlsplit
+
+from novabot.bot import create_bot
+from novabot.metrics import METRICS, SlowRequestProfiler
+from novabot.reloader import BUILDERS
+
+logger = logging.getLogger(__name__)
+
+MAX_BODY = 1 << 20
+_REASONS = {200: "OK", 400: "Bad Request", 403: "Forbidden", 404: "Not Found", 405: "Method Not Allowed",
+            409: "Conflict", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+def reply_json(reply):
+    return {"answer": reply.text, "score": reply.score, "source": reply.source}
+
+
+class HTTPError(Exception):
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class Coalescer:
+    """Shares in-flight work between concurrent single-query requests.
+
+    A query whose normalized form is already being answered waits for that
+    answer instead of queueing again. Other queries are collected for up to
+    ``window`` seconds (or ``max_batch`` queries) and scored with one
+    :meth:`NovaBot.reply_batch` call on the executor.
+    """
+
+    def __init__(self, bot, executor, max_batch=64, window=0.002):
+        self.bot = bot
+        self.executor = executor
+        self.max_batch = max_batch
+        self.window = window
+        self.coalesced = 0
+        self.batches = 0
+        self._inflight = {}
+        self._queue = []
+        self._timer = None
+
+    async def reply(self, query, page=None):
+        key = self.bot.cache_key(query, page)
+        # Queries without a key (only stop words) may score differently, so they are not shared
+        future = self._inflight.get(key) if key is not None else None
+        if future is not None:
+            self.coalesced += 1
+        else:
+            key = key if key is not None else object()
+            loop = asyncio.get_running_loop()
+            future = self._inflight[key] = loop.create_future()
+            self._queue.append((key, query, page))
+            if len(self._queue) >= self.max_batch:
+                self._flush()
+            elif self._timer is None:
+                self._timer = loop.call_later(self.window, self._flush)
+        # A disconnecting client must not cancel an answer others wait on
+        return await asyncio.shield(future)
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._queue = self._queue, []
+        if batch:
+            self.batches += 1
+            asyncio.get_running_loop().create_task(self._run(batch))
+
+    async def _run(self, batch):
+        loop = asyncio.get_running_loop()
+        try:
+            replies = await loop.run_in_executor(self.executor, self.bot.reply_batch,
+                                                 [q for _, q, _ in batch], [p for _, _, p in batch])
+        except Exception as exc:
+            for key, _, _ in batch:
+                self._inflight.pop(key).set_exception(exc)
+        else:
+            for (key, _, _), reply in zip(batch, replies):
+                self._inflight.pop(key).set_result(reply)
+
+
+class RetrievalServer:
+
+    def __init__(self, bot, workers=4, max_batch=64, window=0.002, admin_token=None):
+        self.bot = bot
+        self.admin_token = admin_token
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="novabot-score")
+        self.coalescer = Coalescer(bot, self.executor, max_batch=max_batch, window=window)
+        self._server = None
+        METRICS.add_collector("server", self.collect_metrics)
+
+    def collect_metrics(self):
+        return [
+            ("novabot_coalesced_total", "counter", "Requests answered by another in-flight request.",
+             [({}, self.coalescer.coalesced)]),
+            ("novabot_coalescer_batches_total", "counter", "Micro-batches scored.",
+             [({}, self.coalescer.batches)]),
+        ]
+
+    async def start(self, host="127.0.0.1", port=8765):
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        self._server.close()
+        await self._server.wait_closed()
+        self.executor.shutdown(wait=False)
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, version = request_line.decode("latin-1").split(None, 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY:
+                    status, payload = 413, {"error": "request body too large"}
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length) if length else b""
+                    with METRICS.span("http_request"):
+                        status, payload = await self._dispatch(method, target, body, headers)
+                    keep_alive = (headers.get("connection", "").lower() != "close"
+                                  and not version.strip().endswith("1.0"))
+                if isinstance(payload, str):
+                    data, content_type = payload.encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8"
+                else:
+                    data, content_type = json.dumps(payload).encode("utf-8"), "application/json"
+                writer.write(("HTTP/1.1 %d %s\r\nContent-Type: %s\r\n"
+                              "Content-Length: %d\r\nConnection: %s\r\n\r\n" % (
+                                  status, _REASONS[status], content_type, len(data),
+                                  "keep-alive" if keep_alive else "close")).encode("latin-1") + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, method, target, body, headers=None):
+        url = urlsplit(target)
+        try:
+            if url.path == "/health":
+                return 200, {"status": "ok", "questions": len(self.bot.index_manager.current)}
+            if url.path == "/metrics":
+                return 200, METRICS.render()
+            if url.path == "/stats":
+                stats = self.bot.stats()
+                stats["coalescer"] = {"coalesced": self.coalescer.coalesced, "batches": self.coalescer.batches}
+                return 200, stats
+            if url.path == "/answer":
+                if method == "GET":
+                    params = parse_qs(url.query)
+                    query, page = params.get("q", [""])[0], params.get("page", [None])[0]
+                    customer, session = params.get("customer", [None])[0], params.get("session", [None])[0]
+                elif method == "POST":
+                    payload = _json_body(body)
+                    query, page, customer = payload.get("query"), payload.get("page"), payload.get("customer")
+                    session = payload.get("session")
+                else:
+                    raise HTTPError(405, "use GET or POST")
+                if not isinstance(query, str) or not query.strip():
+                    raise HTTPError(400, "missing query")
+                if page is not None and not isinstance(page, str):
+                    raise HTTPError(400, "page must be a string")
+                if customer is not None and not isinstance(customer, str):
+                    raise HTTPError(400, "customer must be a string")
+                if session is not None and not isinstance(session, str):
+                    raise HTTPError(400, "session must be a string")
+                if customer is not None or session is not None:
+                    loop = asyncio.get_running_loop()
+                    return 200, reply_json(await loop.run_in_executor(
+                        self.executor, partial(self.bot.reply, query, page, customer, session=session)))
+                return 200, reply_json(await self.coalescer.reply(query, page))
+            if url.path == "/answer_batch":
+                if method != "POST":
+                    raise HTTPError(405, "use POST")
+                payload = _json_body(body)
+                queries, pages, customers = payload.get("queries"), payload.get("pages"), payload.get("customers")
+                if not isinstance(queries, list) or not all(isinstance(q, str) for q in queries):
+                    raise HTTPError(400, "queries must be a list of strings")
+                if pages is not None and (not isinstance(pages, list) or len(pages) != len(queries)
+                                          or not all(p is None or isinstance(p, str) for p in pages)):
+                    raise HTTPError(400, "pages must be a list of strings, one per query")
+                if customers is not None and (not isinstance(customers, list) or len(customers) != len(queries)
+                                              or not all(c is None or isinstance(c, str) for c in customers)):
+                    raise HTTPError(400, "customers must be a list of strings, one per query")
+                loop = asyncio.get_running_loop()
+                replies = await loop.run_in_executor(self.executor, self.bot.reply_batch, queries, pages, customers)
+                return 200, {"results": [reply_json(reply) for reply in replies]}
+            if url.path == "/admin/changeset" and self.admin_token:
+                if method != "POST":
+                    raise HTTPError(405, "use POST")
+                token = (headers or {}).get("x-admin-token", "")
+                if not hmac.compare_digest(token.encode("utf-8"), self.admin_token.encode("utf-8")):
+                    raise HTTPError(403, "bad admin token")
+                if not hasattr(self.bot.index_manager.current, "apply"):
+                    raise HTTPError(409, "the current retriever does not accept changesets; use --retriever segmented")
+                try:
+                    lines = body.decode("utf-8").splitlines()
+                    loop = asyncio.get_running_loop()
+                    applied = await loop.run_in_executor(self.executor, self.bot.apply_changeset, lines)
+                except ValueError as exc:
+                    raise HTTPError(400, str(exc))
+                return 200, {"applied": applied, "questions": len(self.bot.index_manager.current)}
+            raise HTTPError(404, "no such endpoint")
+        except HTTPError as exc:
+            return exc.status, {"error": str(exc)}
+        except Exception:
+            logger.exception("Failed to handle %s %s", method, target)
+            return 500, {"error": "internal error"}
+
+
+def _json_body(body):
+    try:
+        payload = json.loads(body or b"{}")
+    except ValueError:
+        raise HTTPError(400, "body is not valid JSON")
+    if not isinstance(payload, dict):
+        raise HTTPError(400, "body must be a JSON object")
+    return payload
+
+
+async def _serve(args):
+    profiler = None
+    if args.profile_slow_ms is not None:
+        profiler = SlowRequestProfiler(args.profile_slow_ms, args.profile_sample, args.profile_dir)
+    bot = create_bot(args.dataset, retriever=args.retriever, profiler=profiler, shards=args.shards,
+                     session_rate=args.session_rate, max_active=args.max_active, max_queued=args.max_queued,
+                     queue_timeout=args.queue_timeout_ms / 1000)
+    server = RetrievalServer(bot, workers=args.workers,
+                             max_batch=args.max_batch, window=args.window_ms / 1000,
+                             admin_token=args.admin_token)
+    port = await server.start(args.host, args.port)
+    logger.info("NovaBot service listening on http://%s:%d", args.host, port)
+    await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve NovaBot answers over HTTP.")
+    parser.add_argument("--dataset", default="novabank_dataset.txt")
+    parser.add_argument("--retriever", choices=sorted(BUILDERS), default="tfidf")
+    parser.add_argument("--shards", type=int, help="worker processes for --retriever sharded (default: one per core)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--window-ms", type=float, default=2.0)
+    parser.add_argument("--session-rate", type=float, default=1.0,
+                        help="retrievals per second per chat session, in bursts of 5")
+    parser.add_argument("--max-active", type=int, help="concurrent retrievals (default: one per core)")
+    parser.add_argument("--max-queued", type=int, default=8, help="retrievals waiting for a slot before shedding")
+    parser.add_argument("--queue-timeout-ms", type=float, default=500.0)
+    parser.add_argument("--admin-token", default=os.environ.get("NOVABOT_ADMIN_TOKEN"),
+                        help="enables /admin/changeset (default: $NOVABOT_ADMIN_TOKEN)")
+    parser.add_argument("--profile-slow-ms", type=float,
+                        help="profile replies and keep the ones slower than this")
+    parser.add_argument("--profile-sample", type=float, default=0.1, help="share of replies profiled")
+    parser.add_argument("--profile-dir", default="profiles")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
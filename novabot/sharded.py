@@ -0,0 +1,172 @@
+"""TF-IDF retrieval split across worker processes.
+
+:class:`ShardedIndex` fits one vectorizer over the whole corpus, splits the
+question matrix into ``shards`` contiguous row ranges and writes each
+range's transposed CSR arrays to a :mod:`novabot.arrayfile`. One worker
+process per shard memory-maps its file, so the matrix is shared through the
+page cache instead of being pickled into every process.
+
+A query is vectorized once in the coordinator; its few nonzero entries are
+sent to every worker, each worker scores its rows with one sparse product
+and returns its top ``k``, and the coordinator merges those into the global
+top ``k``. Batches are scattered the same way, so the workers score one
+batch in parallel. Scores are the plain word TF-IDF cosines of
+:class:`novabot.retrieval.TfidfIndex` without fuzzy matching.
+"""
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import weakref
+
+import numpy as np
+from scipy import sparse
+
+from novabot.arrayfile import read_arrays, write_arrays
+from novabot.metrics import METRICS
+from novabot.retrieval import _top_k, preprocess
+from novabot.text import WordVectorizer
+
+
+def _serve_shard(path, conn, max_cells):
+    meta, arrays = read_arrays(path)
+    matrix_t = sparse.csr_matrix((arrays["data"], arrays["indices"], arrays["indptr"]),
+                                 shape=tuple(meta["shape"]), copy=False)
+    rows = matrix_t.shape[1]
+    conn.send(rows)
+    while True:
+        message = conn.recv()
+        if message is None:
+            break
+        data, indices, indptr, k = message
+        queries = sparse.csr_matrix((data, indices, indptr), shape=(len(indptr) - 1, matrix_t.shape[0]))
+        k = min(k, rows)
+        top = np.empty((queries.shape[0], k), dtype=np.int64)
+        scores = np.empty((queries.shape[0], k), dtype=np.float64)
+        block = max(1, max_cells // max(rows, 1))
+        for start in range(0, queries.shape[0], block):
+            dense = (queries[start:start + block] @ matrix_t).toarray()
+            top[start:start + block] = _top_k(dense, k)
+            scores[start:start + block] = np.take_along_axis(dense, top[start:start + block], axis=1)
+        conn.send((top, scores))
+    conn.close()
+
+
+def _shutdown(connections, processes, directory):
+    for conn in connections:
+        try:
+            conn.send(None)
+            conn.close()
+        except OSError:
+            pass
+    for process in processes:
+        process.join(timeout=5)
+        if process.is_alive():
+            process.terminate()
+    if directory is not None:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+class ShardedIndex:
+    """The TfidfIndex interface over ``shards`` worker processes.
+
+    Shard files go to ``directory`` (a temporary directory, removed on
+    :meth:`close`, by default). Workers are stopped by :meth:`close` or
+    when the index is garbage-collected, e.g. after a reload swapped it
+    out. One scatter/gather round runs at a time; concurrent callers queue,
+    so batch through :meth:`answer_batch` for throughput.
+    """
+
+    def __init__(self, questions, answers, shards=None, directory=None, max_cells=2 ** 24):
+        self.questions = list(questions)
+        self.answers = list(answers)
+        texts = [preprocess(q) for q in self.questions]
+        self.vectorizer = WordVectorizer()
+        matrix = self.vectorizer.fit_transform(texts).tocsr()
+        self._analyze = self.vectorizer.build_analyzer()
+        shards = max(1, min(shards or os.cpu_count() or 1, len(self.questions) or 1))
+        self.offsets = np.linspace(0, len(self.questions), shards + 1).astype(np.int64)
+
+        owned = directory is None
+        self.directory = tempfile.mkdtemp(prefix="novabot-shards-") if owned else directory
+        context = multiprocessing.get_context("spawn")
+        self._connections, processes = [], []
+        for shard in range(shards):
+            part_t = matrix[self.offsets[shard]:self.offsets[shard + 1]].T.tocsr()
+            path = os.path.join(self.directory, "shard-%d.arrays" % shard)
+            write_arrays(path, {"data": part_t.data, "indices": part_t.indices, "indptr": part_t.indptr},
+                         meta={"kind": "shard", "shape": list(part_t.shape)})
+            parent, child = context.Pipe()
+            process = context.Process(target=_serve_shard, args=(path, child, max_cells),
+                                      name="novabot-shard-%d" % shard, daemon=True)
+            process.start()
+            child.close()
+            self._connections.append(parent)
+            processes.append(process)
+        self._lock = threading.Lock()
+        self._finalizer = weakref.finalize(self, _shutdown, self._connections, processes,
+                                           self.directory if owned else None)
+        # Wait until every worker has mapped its shard
+        try:
+            for conn, start, stop in zip(self._connections, self.offsets[:-1], self.offsets[1:]):
+                if conn.recv() != stop - start:
+                    raise RuntimeError("shard worker mapped the wrong number of rows")
+        except (EOFError, RuntimeError):
+            self.close()
+            raise RuntimeError("a shard worker failed to start; see its traceback above") from None
+
+    def __len__(self):
+        return len(self.questions)
+
+    @property
+    def shards(self):
+        return len(self._connections)
+
+    def close(self):
+        self._finalizer()
+
+    def _gather(self, query_matrix, k):
+        query_matrix = query_matrix.tocsr()
+        message = (query_matrix.data, query_matrix.indices, query_matrix.indptr, k)
+        with self._lock:
+            for conn in self._connections:
+                conn.send(message)
+            replies = [conn.recv() for conn in self._connections]
+        rows = np.hstack([top + offset for (top, _), offset in zip(replies, self.offsets)])
+        scores = np.hstack([shard_scores for _, shard_scores in replies])
+        best = _top_k(scores, min(k, len(self)))
+        return np.take_along_axis(rows, best, axis=1), np.take_along_axis(scores, best, axis=1)
+
+    def top_k(self, query, k=1):
+        with METRICS.span("preprocess"):
+            text = preprocess(query)
+        with METRICS.span("vectorize"):
+            vector = self.vectorizer.transform([text])
+        with METRICS.span("score"):
+            rows, scores = self._gather(vector, k)
+        return rows[0], scores[0]
+
+    def has_known_terms(self, query):
+        vocabulary = self.vectorizer.vocabulary_
+        return any(token in vocabulary for token in self._analyze(preprocess(query)))
+
+    def match(self, query):
+        if not self.has_known_terms(query):
+            return None
+        return self.best_match(query)
+
+    def best_match(self, query):
+        rows, scores = self.top_k(query, 1)
+        return int(rows[0]), float(scores[0])
+
+    def answer(self, query):
+        return self.answers[self.best_match(query)[0]]
+
+    def answer_batch(self, queries, k=1):
+        """Top-``k`` indices and scores per query, as ``(len(queries), k)``
+        arrays; every worker scores the whole batch against its shard."""
+        with METRICS.span("batch_vectorize"):
+            query_matrix = self.vectorizer.transform([preprocess(q) for q in queries])
+        with METRICS.span("batch_score"):
+            return self._gather(query_matrix, k)
@@ -0,0 +1,64 @@
+"""Answers as a stream of text chunks, generated off the caller's thread.
+
+:func:`stream_answer` submits the answer call to a shared thread pool and
+returns an :class:`AnswerStream` straight away, so the caller can render
+the user's message while retrieval runs. Iterating the stream waits for the
+answer and yields it a few words at a time, ready for ``st.write_stream``;
+an answer function that already returns an iterator of chunks (a local
+LLM, say) is streamed as it produces them.
+
+Time to the first chunk and to the last are recorded separately, as the
+``first_chunk`` and ``stream`` stages of :data:`novabot.metrics.METRICS`.
+"""
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from novabot.metrics import METRICS
+
+_WORD = re.compile(r"\s*\S+")
+# Sized above NovaBot's admission cap, so a burst waits in its bounded queue
+# (and is shed from it) rather than unbounded in this pool's
+_EXECUTOR = ThreadPoolExecutor(max_workers=32, thread_name_prefix="novabot-answer")
+
+
+def chunk_text(text, words=3):
+    """Yield ``text`` in pieces of ``words`` words, keeping its whitespace."""
+    parts = _WORD.findall(text)
+    for start in range(0, len(parts), words):
+        yield "".join(parts[start:start + words])
+
+
+class AnswerStream:
+    """Iterable of answer chunks; :attr:`text` is the whole answer once consumed.
+
+    ``delay`` seconds are slept between chunks for a typing effect.
+    """
+
+    def __init__(self, future, words=3, delay=0.0, registry=METRICS):
+        self.future = future
+        self.words = words
+        self.delay = delay
+        self.registry = registry
+        self.text = None
+        self._start = time.perf_counter()
+
+    def __iter__(self):
+        result = self.future.result()
+        chunks = chunk_text(result, self.words) if isinstance(result, str) else result
+        parts = []
+        for chunk in chunks:
+            if not parts:
+                self.registry.observe("first_chunk", time.perf_counter() - self._start)
+            elif self.delay:
+                time.sleep(self.delay)
+            parts.append(chunk)
+            yield chunk
+        self.text = "".join(parts)
+        self.registry.observe("stream", time.perf_counter() - self._start)
+
+
+def stream_answer(answer, *args, words=3, delay=0.0, executor=None, **kwargs):
+    """Start ``answer(*args, **kwargs)`` in the background; return its AnswerStream."""
+    future = (executor or _EXECUTOR).submit(answer, *args, **kwargs)
+    return AnswerStream(future, words, delay)
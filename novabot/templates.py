@@ -0,0 +1,208 @@
+"""Answers with slots for values that change: rates, hours, a balance.
+
+An answer can name a slot instead of hard-coding its value,
+``{sms_shortcode}``, optionally with the text shown when no value is
+known, ``{balance|shown in the NovaBank app}``. :class:`AnswerTemplates`
+compiles each answer once into its literal parts and slots, so rendering is
+one join, and answers without slots are returned as they are.
+
+Values come from a provider: any object whose ``fetch(customers)`` returns
+``{customer: {slot: value}}`` for a list of customer names (None for a
+visitor who is not signed in) in one backend call. :class:`SlotCache`
+keeps each customer's values for ``ttl`` seconds and fetches all the
+customers a batch is missing with one call, so a customer costs one
+round-trip per TTL rather than one per message. :class:`LocalProvider` is
+the stand-in backend: bank-wide values plus each customer's name and
+balance from a TransactionStore.
+"""
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from novabot.metrics import METRICS
+from novabot.transactions import format_amount
+
+logger = logging.getLogger(__name__)
+
+_SLOT = re.compile(r"\{(\w+)(?:\|([^{}]*))?\}")
+
+DEFAULT_VALUES = {
+    "support_hours": "Monday–Friday, 8 AM–8 PM, and Saturday, 9 AM–5 PM",
+    "sms_shortcode": "29292",
+    "personal_loan_apr": "6.5%",
+    "mortgage_rate": "2.75%",
+}
+
+
+class Template:
+    """An answer split into literal text and ``(slot, default)`` fields.
+
+    A slot without a default renders as its own placeholder when the
+    provider has no value for it, so a missing value shows instead of
+    leaving a hole in the sentence.
+    """
+
+    def __init__(self, text):
+        self.literals = []
+        self.fields = []
+        start = 0
+        for match in _SLOT.finditer(text):
+            self.literals.append(text[start:match.start()])
+            default = match.group(2)
+            self.fields.append((match.group(1), match.group(0) if default is None else default))
+            start = match.end()
+        self.literals.append(text[start:])
+        self.slots = frozenset(name for name, _ in self.fields)
+
+    def render(self, values):
+        parts = [self.literals[0]]
+        for (name, default), literal in zip(self.fields, self.literals[1:]):
+            value = values.get(name)
+            parts.append(default if value is None else str(value))
+            parts.append(literal)
+        return "".join(parts)
+
+
+class LocalProvider:
+    """Slot values without a backend: ``values`` for everyone, plus
+    ``customer_name`` and ``balance`` for customers in ``store``.
+
+    ``latency`` seconds are slept per :meth:`fetch`, to stand in for the
+    round-trip to a real one.
+    """
+
+    def __init__(self, store=None, values=DEFAULT_VALUES, latency=0.0):
+        self.store = store
+        self.values = dict(values)
+        self.latency = latency
+        self.calls = 0
+
+    def update(self, store):
+        """Switch to a new store, e.g. after the dataset was reloaded."""
+        self.store = store
+
+    def fetch(self, customers):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        store = self.store
+        result = {}
+        for customer in customers:
+            values = dict(self.values)
+            code = None if customer is None or store is None else store.customer_ids.get(customer.lower())
+            if code is not None:
+                values["customer_name"] = store.customers[code]
+                values["balance"] = format_amount(store.balance(code))
+            result[customer] = values
+        return result
+
+
+class SlotCache:
+    """Per-customer slot values from ``provider``, kept for ``ttl`` seconds.
+
+    At most ``max_customers`` customers are kept, least recently used out
+    first. A provider that raises is logged and its customers get the
+    slots' defaults for that call; nothing is cached for them.
+    """
+
+    def __init__(self, provider, ttl=300.0, max_customers=10000, clock=time.monotonic):
+        self.provider = provider
+        self.ttl = ttl
+        self.max_customers = max_customers
+        self.clock = clock
+        self.hits = self.misses = self.fetches = self.errors = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_many(self, customers):
+        """``{customer: values}`` for every customer in ``customers``; the
+        ones not cached are fetched with one provider call."""
+        found, missing = {}, []
+        now = self.clock()
+        with self._lock:
+            for customer in customers:
+                entry = self._entries.get(customer)
+                if entry is not None and entry[1] > now:
+                    self._entries.move_to_end(customer)
+                    found[customer] = entry[0]
+                    self.hits += 1
+                else:
+                    missing.append(customer)
+                    self.misses += 1
+        if not missing:
+            return found
+        try:
+            with METRICS.span("slot_fetch"):
+                fetched = self.provider.fetch(missing)
+        except Exception:
+            logger.exception("Slot provider failed; answering with slot defaults")
+            with self._lock:
+                self.errors += 1
+            found.update(dict.fromkeys(missing, {}))
+            return found
+        expires = self.clock() + self.ttl
+        with self._lock:
+            self.fetches += 1
+            for customer in missing:
+                values = found[customer] = fetched.get(customer, {})
+                self._entries[customer] = (values, expires)
+                self._entries.move_to_end(customer)
+            while len(self._entries) > self.max_customers:
+                self._entries.popitem(last=False)
+        return found
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        return {"customers": len(self._entries), "hits": self.hits, "misses": self.misses,
+                "fetches": self.fetches, "errors": self.errors}
+
+
+class AnswerTemplates:
+    """Renders answers for a customer; see the module docstring.
+
+    Compiled templates are kept per answer text until :meth:`clear`, which
+    the bot calls when the index is replaced.
+    """
+
+    def __init__(self, provider=None, ttl=300.0, max_customers=10000, clock=time.monotonic):
+        self.values = SlotCache(provider if provider is not None else LocalProvider(), ttl, max_customers, clock)
+        self._compiled = {}
+
+    def compile(self, text):
+        """The answer's Template, or None if it has no slots."""
+        if "{" not in text:
+            return None
+        try:
+            return self._compiled[text]
+        except KeyError:
+            template = Template(text)
+            template = self._compiled[text] = template if template.fields else None
+            return template
+
+    def render(self, text, customer=None):
+        return self.render_many([text], [customer])[0]
+
+    def render_many(self, texts, customers):
+        """``texts[i]`` with its slots filled for ``customers[i]``."""
+        templates = [self.compile(text) for text in texts]
+        wanted = {customer for customer, template in zip(customers, templates) if template is not None}
+        if not wanted:
+            return list(texts)
+        values = self.values.get_many(wanted)
+        return [text if template is None else template.render(values[customer])
+                for text, template, customer in zip(texts, templates, customers)]
+
+    def clear(self):
+        self._compiled = {}
+        self.values.clear()
+
+    def stats(self):
+        return dict(self.values.stats(), templates=sum(t is not None for t in list(self._compiled.values())))
@@ -0,0 +1,145 @@
+"""Text normalization, tokenization and word TF-IDF, shared by every index.
+
+:func:`fold` is the one normalization pass (``novabot.retrieval.preprocess``
+is this function): accents are folded ("é" -> "e"), text is lowercased,
+currency and percent signs become words ("$22.98" -> "dollar 22.98") and
+other punctuation is dropped, keeping decimal points inside numbers.
+:class:`Tokenizer` splits folded text into words without a second regex,
+and :meth:`Tokenizer.count` maps a whole batch of texts straight to
+vocabulary ids. :class:`WordVectorizer` is the TF-IDF weighting of
+scikit-learn's ``TfidfVectorizer`` on top of it, so the questions at build
+time and the queries at run time go through the same code.
+"""
+import re
+import unicodedata
+from itertools import chain, repeat
+
+import numpy as np
+from scipy import sparse
+
+from novabot.stopwords import ENGLISH_STOP_WORDS
+
+_SYMBOLS = {"$": " dollar ", "€": " euro ", "£": " pound ", "¥": " yen ", "₹": " rupee ", "¢": " cent ",
+            "%": " percent "}
+_ASCII_PUNCTUATION = re.compile(r"[^a-z0-9\s.]")
+_PUNCTUATION = re.compile(r"[^\w\s.]|_")
+# Combining diacritical mark blocks: what NFKD splits off accented letters
+_MARKS = re.compile("[\u0300-\u036f\u1ab0-\u1aff\u1dc0-\u1dff\u20d0-\u20ff\ufe20-\ufe2f]")
+# A dot is kept only as a decimal point
+_DOTS = re.compile(r"\.(?:(?!\d)|(?<!\d\.))")
+
+
+def _spell(match):
+    return _SYMBOLS.get(match.group(), "")
+
+
+def fold(text):
+    """Normalized ``text``; running it twice changes nothing."""
+    if text.isascii():
+        text = text.lower()
+        text = _ASCII_PUNCTUATION.sub(_spell if "$" in text or "%" in text else "", text)
+    else:
+        text = _MARKS.sub("", unicodedata.normalize("NFKD", text)).casefold()
+        text = _PUNCTUATION.sub(_spell, text)
+    return _DOTS.sub("", text) if "." in text else text
+
+
+class Tokenizer:
+    """Words of two or more characters (or numbers like "22.98") in folded
+    text, without ``stop_words``.
+
+    Folded text is only word characters, whitespace and decimal points, so
+    its tokens are what ``str.split`` returns; no regex runs at this stage.
+    """
+
+    def __init__(self, stop_words=ENGLISH_STOP_WORDS):
+        self.stop_words = frozenset(stop_words)
+
+    def __call__(self, text):
+        stop_words = self.stop_words
+        return [token for token in text.split() if len(token) > 1 and token not in stop_words]
+
+    def count(self, texts, vocabulary, chunk=4096):
+        """CSR matrix of ``vocabulary`` term counts, one row per folded text.
+
+        Each text costs one ``split``; the tokens of ``chunk`` texts at a
+        time are looked up in one pass and counted with numpy. Stop words,
+        single characters and unknown tokens are dropped, since the
+        vocabulary holds none of them.
+        """
+        texts = list(texts)
+        parts = [_count([text.split() for text in texts[start:start + chunk]], vocabulary)
+                 for start in range(0, len(texts), chunk)]
+        if len(parts) == 1:
+            return parts[0]
+        return sparse.vstack(parts, format="csr") if parts else _count([], vocabulary)
+
+
+def _count(token_lists, vocabulary):
+    lengths = np.fromiter(map(len, token_lists), dtype=np.int64, count=len(token_lists))
+    ids = np.fromiter(map(vocabulary.get, chain.from_iterable(token_lists), repeat(-1)),
+                      dtype=np.int64, count=int(lengths.sum()))
+    rows = np.repeat(np.arange(len(token_lists)), lengths)
+    known = ids >= 0
+    size = max(len(vocabulary), 1)
+    keys, counts = np.unique(rows[known] * size + ids[known], return_counts=True)
+    rows, columns = np.divmod(keys, size)
+    indptr = np.zeros(len(token_lists) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=len(token_lists)), out=indptr[1:])
+    return sparse.csr_matrix((counts.astype(np.float64), columns, indptr),
+                             shape=(len(token_lists), len(vocabulary)))
+
+
+def l2_normalize(matrix):
+    """Scale the rows of a CSR ``matrix`` to unit length, in place."""
+    lengths = np.diff(matrix.indptr)
+    norms = np.sqrt(np.bincount(np.repeat(np.arange(len(lengths)), lengths),
+                                weights=matrix.data.astype(np.float64) ** 2, minlength=len(lengths)))
+    norms[norms == 0] = 1
+    matrix.data /= np.repeat(norms, lengths).astype(matrix.dtype)
+    return matrix
+
+
+class WordVectorizer:
+    """Word TF-IDF with scikit-learn's defaults (smoothed IDF, L2-normalized
+    rows) over :class:`Tokenizer` tokens of folded text.
+
+    Fit it with :meth:`fit` or pass the ``terms`` (in column order) and
+    ``idf`` of a fitted one.
+    """
+
+    def __init__(self, terms=None, idf=None, stop_words=ENGLISH_STOP_WORDS):
+        self.tokenizer = Tokenizer(stop_words)
+        self.vocabulary_ = {} if terms is None else {term: column for column, term in enumerate(terms)}
+        self.idf_ = None if idf is None else np.asarray(idf)
+
+    def settings(self):
+        return {"analyzer": "tokens", "stop_words": sorted(self.tokenizer.stop_words)}
+
+    def build_analyzer(self):
+        return self.tokenizer
+
+    def fit(self, texts):
+        self.fit_transform(texts)
+        return self
+
+    def fit_transform(self, texts):
+        texts = list(texts)
+        words = set()
+        for text in texts:
+            words.update(text.split())
+        terms = sorted(word for word in words - self.tokenizer.stop_words if len(word) > 1)
+        if not terms:
+            raise ValueError("empty vocabulary; the texts contain only stop words")
+        self.vocabulary_ = {term: column for column, term in enumerate(terms)}
+        counts = self.tokenizer.count(texts, self.vocabulary_)
+        df = np.bincount(counts.indices, minlength=len(terms))
+        self.idf_ = np.log((len(texts) + 1) / (df + 1)) + 1
+        return self._weight(counts)
+
+    def transform(self, texts):
+        return self._weight(self.tokenizer.count(texts, self.vocabulary_))
+
+    def _weight(self, counts):
+        counts.data *= self.idf_[counts.indices]
+        return l2_normalize(counts)
@@ -0,0 +1,196 @@
+"""Per-customer transactions as a columnar store.
+
+The "📊 CUSTOMER-SPECIFIC REQUESTS" answers list transactions as text
+("- Purchase of $22.98 at Uber"). :func:`parse_transactions` turns those
+lines into records and :class:`TransactionStore` keeps them as numpy
+columns, so balances, totals and filtered lists are vectorized reductions
+over a slice instead of string matching.
+
+Rows are sorted by customer, then most recent first, so one customer's
+transactions are a contiguous slice found through ``customer_offsets`` and
+a date range inside it is a binary search. Merchants have a sort-based
+secondary index (a row permutation plus offsets per code) for queries
+across customers. Amounts are integer cents; days count from
+1970-01-01 and ``NO_DATE`` marks rows without a date, such as the ones
+parsed from the dataset. A store is saved with :mod:`novabot.arrayfile`
+and memory-mapped on load.
+"""
+import datetime
+import re
+
+import numpy as np
+
+from novabot.arrayfile import read_arrays, write_arrays
+
+TYPES = ("Purchase", "Transfer", "Deposit", "Withdrawal", "Loan Payment")
+# Money in for deposits, out for everything else (transfers are outgoing)
+SIGNS = np.array([-1, -1, 1, -1, -1], dtype=np.int64)
+NO_DATE = -1
+EPOCH = datetime.date(1970, 1, 1)
+
+_LINE = re.compile(r"-\s*(%s) of \$(\d[\d,]*(?:\.\d+)?)(?: at (.+?))?\s*$" % "|".join(TYPES))
+_OWNER = re.compile(r"\b(\w+)'s\b")
+
+
+def day_number(date):
+    return (date - EPOCH).days
+
+
+def day_date(day):
+    return EPOCH + datetime.timedelta(days=int(day))
+
+
+def format_amount(cents):
+    sign = "-" if cents < 0 else ""
+    return "%s$%s" % (sign, "{:,.2f}".format(abs(cents) / 100))
+
+
+def parse_transactions(questions, answers):
+    """Yield ``(customer, type, amount_cents, merchant)`` from dataset pairs.
+
+    A pair counts when the question names its owner ("Alice's") and every
+    answer line after the first is a transaction line.
+    """
+    for question, answer in zip(questions, answers):
+        lines = answer.split("\n")[1:]
+        matches = [_LINE.match(line) for line in lines]
+        if not matches or not all(matches):
+            continue
+        owner = _OWNER.search(question)
+        if owner is None:
+            continue
+        for match in matches:
+            amount = round(float(match.group(2).replace(",", "")) * 100)
+            yield owner.group(1), match.group(1), amount, match.group(3)
+
+
+def _group_index(codes, n):
+    order = np.argsort(codes, kind="stable")
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(codes, minlength=n), out=offsets[1:])
+    return order, offsets
+
+
+class TransactionStore:
+
+    def __init__(self, arrays, customers, merchants):
+        self.customer = arrays["customer"]
+        self.type = arrays["type"]
+        self.merchant = arrays["merchant"]
+        self.amount = arrays["amount"]
+        self.day = arrays["day"]
+        self.customer_offsets = arrays["customer_offsets"]
+        self.merchant_order = arrays["merchant_order"]
+        self.merchant_offsets = arrays["merchant_offsets"]
+        self.customers = list(customers)
+        self.merchants = list(merchants)
+        self.customer_ids = {name.lower(): i for i, name in enumerate(self.customers)}
+        self.merchant_ids = {name.lower(): i for i, name in enumerate(self.merchants)}
+
+    def __len__(self):
+        return len(self.customer)
+
+    @classmethod
+    def from_columns(cls, customer, type, merchant, amount, day, customers, merchants):
+        """Build from parallel arrays of codes; ``merchant`` is -1 for none."""
+        customer = np.asarray(customer, dtype=np.int32)
+        day = np.asarray(day, dtype=np.int32)
+        # Customer, then newest first; rows on the same day keep input order
+        order = np.lexsort((-day.astype(np.int64), customer))
+        arrays = {
+            "customer": customer[order],
+            "type": np.asarray(type, dtype=np.int8)[order],
+            "merchant": np.asarray(merchant, dtype=np.int32)[order],
+            "amount": np.asarray(amount, dtype=np.int64)[order],
+            "day": day[order],
+        }
+        arrays["customer_offsets"] = _group_index(arrays["customer"], len(customers))[1]
+        # Rows without a merchant are grouped under an extra last code
+        merchant_codes = np.where(arrays["merchant"] < 0, len(merchants), arrays["merchant"])
+        arrays["merchant_order"], arrays["merchant_offsets"] = _group_index(merchant_codes, len(merchants) + 1)
+        return cls(arrays, customers, merchants)
+
+    @classmethod
+    def from_records(cls, records):
+        """Build from ``(customer, type, amount_cents, merchant[, day])`` tuples."""
+        customer_ids, merchant_ids = {}, {}
+        columns = ([], [], [], [], [])
+        for record in records:
+            customer, kind, amount, merchant = record[:4]
+            day = record[4] if len(record) > 4 else NO_DATE
+            columns[0].append(customer_ids.setdefault(customer, len(customer_ids)))
+            columns[1].append(TYPES.index(kind))
+            columns[2].append(-1 if merchant is None else merchant_ids.setdefault(merchant, len(merchant_ids)))
+            columns[3].append(amount)
+            columns[4].append(NO_DATE if day is None else day)
+        return cls.from_columns(*columns, customers=list(customer_ids), merchants=list(merchant_ids))
+
+    def save(self, path):
+        names = ["customer", "type", "merchant", "amount", "day", "customer_offsets",
+                 "merchant_order", "merchant_offsets"]
+        write_arrays(path, {name: getattr(self, name) for name in names},
+                     meta={"kind": "transactions", "customers": self.customers, "merchants": self.merchants})
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        meta, arrays = read_arrays(path, mmap)
+        return cls(arrays, meta["customers"], meta["merchants"])
+
+    def rows(self, customer, type=None, merchant=None, start=None, end=None):
+        """Row numbers of one customer's transactions, newest first.
+
+        ``customer``, ``type`` and ``merchant`` are codes; ``start`` and
+        ``end`` are inclusive day numbers and exclude undated rows.
+        """
+        first, last = self.customer_offsets[customer], self.customer_offsets[customer + 1]
+        if start is not None or end is not None:
+            newest_first = -self.day[first:last].astype(np.int64)
+            lo = np.searchsorted(newest_first, -end, "left") if end is not None else 0
+            hi = np.searchsorted(newest_first, -start, "right") if start is not None else last - first
+            first, last = first + lo, first + hi
+            mask = self.day[first:last] != NO_DATE
+        else:
+            mask = np.ones(last - first, dtype=bool)
+        if type is not None:
+            mask &= self.type[first:last] == type
+        if merchant is not None:
+            mask &= self.merchant[first:last] == merchant
+        return first + np.flatnonzero(mask)
+
+    def total(self, rows, signed=False):
+        """Sum of amounts in cents; ``signed`` counts money out as negative."""
+        if signed:
+            return int((self.amount[rows] * SIGNS[self.type[rows]]).sum())
+        return int(self.amount[rows].sum())
+
+    def balance(self, customer):
+        """Net of all the customer's recorded transactions, in cents."""
+        return self.total(self.rows(customer), signed=True)
+
+    def merchant_rows(self, merchant, start=None, end=None):
+        """Rows of every customer's transactions at ``merchant`` (merchant index)."""
+        rows = self.merchant_order[self.merchant_offsets[merchant]:self.merchant_offsets[merchant + 1]]
+        if start is not None or end is not None:
+            days = self.day[rows]
+            mask = days != NO_DATE
+            if start is not None:
+                mask &= days >= start
+            if end is not None:
+                mask &= days <= end
+            rows = rows[mask]
+        return rows
+
+    def describe(self, row):
+        text = "%s of %s" % (TYPES[self.type[row]], format_amount(int(self.amount[row])))
+        if self.merchant[row] >= 0:
+            text += " at %s" % self.merchants[self.merchant[row]]
+        if self.day[row] != NO_DATE:
+            text += " on %s" % day_date(self.day[row]).isoformat()
+        return text
+
+
+def load_transactions(file_path):
+    """TransactionStore from the dataset's customer answers (empty if missing)."""
+    from novabot.dataset import load_dataset
+
+    return TransactionStore.from_records(parse_transactions(*load_dataset(file_path)))
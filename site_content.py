@@ -0,0 +1,412 @@
+"""Static content of the NovaBank marketing pages.
+
+Everything here is built once per process, when App.py first imports the
+module: the stylesheet, each card's HTML and a layout per page that
+:func:`render_page` turns into Streamlit elements. A rerun only sends these
+prebuilt strings instead of re-executing the page code.
+"""
+import streamlit as st
+
+CSS = """<style>
+    /* Main styling */
+    .main {
+        background-color: #f8f9fa;
+    }
+    
+    /* Header styling */
+    .bank-header {
+        background-color: white;
+        padding: 1rem;
+        border-radius: 10px;
+        box-shadow: 0 2px 5px rgba(0,0,0,0.1);
+        margin-bottom: 1rem;
+    }
+    
+    .bank-logo {
+        font-size: 2rem;
+        font-weight: bold;
+        color: #1E88E5;
+    }
+    
+    .bank-logo span {
+        color: #333;
+    }
+    
+    /* Card styling */
+    .bank-card {
+        background-color: white;
+        padding: 1.5rem;
+        border-radius: 10px;
+        box-shadow: 0 2px 5px rgba(0,0,0,0.1);
+        margin-bottom: 1rem;
+        transition: transform 0.3s;
+    }
+    
+    .bank-card:hover {
+        transform: translateY(-5px);
+    }
+    
+    .card-title {
+        font-size: 1.25rem;
+        font-weight: bold;
+        margin-bottom: 0.5rem;
+        color: #1E88E5;
+    }
+    
+    /* Feature box styling */
+    .feature-box {
+        background-color: #f0f7ff;
+        padding: 1rem;
+        border-radius: 10px;
+        border-left: 4px solid #1E88E5;
+        margin-bottom: 1rem;
+    }
+    
+    /* Button styling */
+    .stButton>button {
+        background-color: #1E88E5;
+        color: white;
+        border: none;
+        border-radius: 5px;
+        padding: 0.5rem 1rem;
+        font-weight: bold;
+    }
+    
+    .stButton>button:hover {
+        background-color: #1565C0;
+    }
+    
+    /* Chat container */
+    .chat-container {
+        position: fixed;
+        bottom: 20px;
+        right: 20px;
+        width: 350px;
+        background-color: white;
+        border-radius: 10px;
+        box-shadow: 0 4px 12px rgba(0,0,0,0.15);
+        z-index: 1000;
+    }
+    
+    .chat-header {
+        background-color: #1E88E5;
+        color: white;
+        padding: 10px 15px;
+        border-top-left-radius: 10px;
+        border-top-right-radius: 10px;
+        font-weight: bold;
+        display: flex;
+        justify-content: space-between;
+        align-items: center;
+    }
+    
+    .chat-body {
+        height: 300px;
+        overflow-y: auto;
+        padding: 15px;
+    }
+    
+    .chat-footer {
+        padding: 10px 15px;
+        border-top: 1px solid #eee;
+    }
+    
+    /* Chat toggle button */
+    .chat-toggle {
+        position: fixed;
+        bottom: 20px;
+        right: 20px;
+        width: 60px;
+        height: 60px;
+        background-color: #1E88E5;
+        color: white;
+        border-radius: 50%;
+        display: flex;
+        justify-content: center;
+        align-items: center;
+        box-shadow: 0 4px 12px rgba(0,0,0,0.15);
+        cursor: pointer;
+        z-index: 1001;
+    }
+    
+    /* Hide default Streamlit elements */
+    #MainMenu {visibility: hidden;}
+    footer {visibility: hidden;}
+    .viewerBadge_container__1QSob {display: none;}
+    
+    /* Testimonial styling */
+    .testimonial {
+        background-color: #f8f9fa;
+        padding: 1rem;
+        border-radius: 10px;
+        border-left: 4px solid #4CAF50;
+        margin-bottom: 1rem;
+        font-style: italic;
+    }
+    
+    .testimonial-author {
+        font-weight: bold;
+        text-align: right;
+        margin-top: 0.5rem;
+    }
+    
+    /* Hero section */
+    .hero-section {
+        background: linear-gradient(135deg, #1E88E5 0%, #1565C0 100%);
+        color: white;
+        padding: 2rem;
+        border-radius: 10px;
+        margin-bottom: 1.5rem;
+    }
+    
+    .hero-title {
+        font-size: 2.5rem;
+        font-weight: bold;
+        margin-bottom: 1rem;
+    }
+    
+    .hero-subtitle {
+        font-size: 1.25rem;
+        margin-bottom: 1.5rem;
+        opacity: 0.9;
+    }
+    
+    /* Chat message styling */
+    .user-message {
+        background-color: #1E88E5;
+        color: white;
+        padding: 10px 15px;
+        border-radius: 18px 18px 0 18px;
+        margin-bottom: 10px;
+        max-width: 80%;
+        margin-left: auto;
+        word-wrap: break-word;
+    }
+    
+    .bot-message {
+        background-color: #f0f0f0;
+        color: #333;
+        padding: 10px 15px;
+        border-radius: 18px 18px 18px 0;
+        margin-bottom: 10px;
+        max-width: 80%;
+        word-wrap: break-word;
+    }
+    
+    /* Navigation styling */
+    .nav-button {
+        background-color: transparent;
+        border: none;
+        color: #1E88E5;
+        font-weight: 500;
+        padding: 0.5rem 1rem;
+        border-radius: 5px;
+        cursor: pointer;
+        transition: background-color 0.3s;
+    }
+    
+    .nav-button:hover {
+        background-color: #f0f7ff;
+    }
+    
+    .nav-button.active {
+        background-color: #1E88E5;
+        color: white;
+    }
+    
+    .nav-container {
+        display: flex;
+        justify-content: space-between;
+        background-color: white;
+        padding: 0.5rem;
+        border-radius: 10px;
+        margin-bottom: 1rem;
+        box-shadow: 0 2px 5px rgba(0,0,0,0.1);
+    }
+</style>"""
+
+HEADER = '<div class="bank-header"><div class="bank-logo">Nova<span>Bank</span></div></div>'
+
+PAGE_NAMES = ("Home", "Accounts", "Loans", "Investments", "Services", "About")
+NAV_LABELS = ("🏠 Home", "💳 Accounts", "💰 Loans", "📈 Investments", "⚙️ Services", "ℹ️ About")
+
+
+def card(title, paragraphs, features=()):
+    if isinstance(paragraphs, str):
+        paragraphs = (paragraphs,)
+    parts = ['<div class="bank-card">', '<div class="card-title">%s</div>' % title]
+    parts += ["<p>%s</p>" % text for text in paragraphs]
+    if features:
+        parts.append('<div class="feature-box">%s</div>' % "<br>".join(
+            "<strong>✓ %s</strong>" % feature for feature in features))
+    parts.append("</div>")
+    return "".join(parts)
+
+
+def testimonial(quote, author):
+    return '<div class="testimonial">"%s"<div class="testimonial-author">- %s</div></div>' % (quote, author)
+
+
+# A layout is a list of blocks: ("html", markup), ("header", text),
+# ("subheader", text), ("button", label, key), ("columns", [blocks, ...])
+# and ("tabs", [(label, blocks), ...]).
+PAGES = {
+    "Home": [
+        ("html", '<div class="hero-section"><div class="hero-title">Banking Reimagined</div>'
+                 '<div class="hero-subtitle">Experience the future of banking with NovaBank\'s '
+                 'AI-powered solutions.</div></div>'),
+        ("columns", [
+            [("html", card("Smart Banking",
+                           "Experience banking powered by artificial intelligence that learns and adapts "
+                           "to your financial habits.",
+                           ["AI-Powered Insights", "Personalized Recommendations", "Automated Savings"]))],
+            [("html", card("Secure Transactions",
+                           "Your security is our priority with state-of-the-art encryption and multi-factor "
+                           "authentication.",
+                           ["Biometric Authentication", "Real-time Fraud Detection", "End-to-End Encryption"]))],
+            [("html", card("24/7 Support",
+                           "Get help anytime with our AI assistant and dedicated support team available "
+                           "around the clock.",
+                           ["AI Chatbot Assistant", "Live Video Banking", "Dedicated Advisors"]))],
+        ]),
+        ("subheader", "What Our Customers Say"),
+        ("columns", [
+            [("html", testimonial("NovaBank has completely transformed my banking experience. The AI assistant "
+                                  "is incredibly helpful and the app is so intuitive!", "Alice Johnson"))],
+            [("html", testimonial("The loan application process was so smooth. I got approved in minutes and "
+                                  "the funds were in my account the same day!", "Bob Smith"))],
+        ]),
+    ],
+    "Accounts": [
+        ("header", "Banking Accounts"),
+        ("tabs", [
+            ("Checking", [
+                ("html", card("NovaCheck Premium",
+                              "Our flagship checking account with premium benefits and AI-powered financial "
+                              "insights.",
+                              ["No monthly fees", "Free ATM withdrawals worldwide", "AI-powered spending insights",
+                               "Cashback on everyday purchases"])),
+                ("button", "Open Checking Account", "open_checking"),
+            ]),
+            ("Savings", [
+                ("html", card("NovaGrow Savings",
+                              "Watch your money grow with our high-yield savings account featuring "
+                              "AI-optimized interest rates.",
+                              ["3.5% APY", "No minimum balance", "Automated savings goals",
+                               "Smart round-up feature"])),
+                ("button", "Open Savings Account", "open_savings"),
+            ]),
+            ("Business", [
+                ("html", card("NovaBiz Account",
+                              "Designed for businesses of all sizes with powerful tools to manage your "
+                              "company finances.",
+                              ["Free business transactions", "Integrated invoicing", "Employee expense cards",
+                               "Business financial insights"])),
+                ("button", "Open Business Account", "open_business"),
+            ]),
+        ]),
+    ],
+    "Loans": [
+        ("header", "Loan Products"),
+        ("columns", [
+            [("html", card("Personal Loans", "Flexible personal loans with competitive rates and quick approval.",
+                           ["Borrow up to $50,000", "Rates from 4.99% APR", "Terms from 12-60 months",
+                            "No prepayment penalties"])),
+             ("html", card("Auto Loans", "Drive away in your dream car with our competitive auto financing.",
+                           ["New and used vehicles", "Rates from 3.49% APR", "Up to 84-month terms",
+                            "Quick online approval"]))],
+            [("html", card("Home Mortgages", "Find your dream home with our flexible mortgage options.",
+                           ["Fixed and adjustable rates", "First-time homebuyer programs", "Refinancing options",
+                            "Digital application process"])),
+             ("html", card("Business Loans", "Fuel your business growth with our flexible financing solutions.",
+                           ["Working capital loans", "Equipment financing", "Commercial real estate",
+                            "SBA loan options"]))],
+        ]),
+        ("button", "Apply for a Loan", "apply_loan"),
+    ],
+    "Investments": [
+        ("header", "Investment Solutions"),
+        ("tabs", [
+            ("Retirement", [
+                ("html", card("NovaRetire IRA", "Plan for your future with our tax-advantaged retirement accounts.",
+                              ["Traditional and Roth IRAs", "AI-powered retirement planning",
+                               "Automatic contributions", "Low-fee investment options"])),
+                ("button", "Open Retirement Account", "open_retirement"),
+            ]),
+            ("Brokerage", [
+                ("html", card("NovaTrade", "Invest in stocks, ETFs, and more with our intuitive trading platform.",
+                              ["Commission-free trades", "Fractional shares", "Advanced research tools",
+                               "AI-powered investment suggestions"])),
+                ("button", "Open Brokerage Account", "open_brokerage"),
+            ]),
+            ("Wealth Management", [
+                ("html", card("NovaWealth", "Comprehensive wealth management with personalized guidance.",
+                              ["Dedicated wealth advisor", "Custom investment strategies", "Tax optimization",
+                               "Estate planning"])),
+                ("button", "Schedule Consultation", "schedule_consultation"),
+            ]),
+        ]),
+    ],
+    "Services": [
+        ("header", "Banking Services"),
+        ("columns", [
+            [("html", card("Online & Mobile Banking",
+                           "Manage your finances anytime, anywhere with our digital banking solutions.",
+                           ["24/7 account access", "Mobile check deposit", "Bill pay & transfers",
+                            "Financial insights dashboard"])),
+             ("html", card("International Services",
+                           "Global banking solutions for travelers and international customers.",
+                           ["Multi-currency accounts", "International wire transfers", "No foreign transaction fees",
+                            "Global ATM access"]))],
+            [("html", card("Insurance Products",
+                           "Protect what matters most with our comprehensive insurance offerings.",
+                           ["Life insurance", "Home & auto insurance", "Health insurance", "Business insurance"])),
+             ("html", card("Financial Planning", "Plan for your future with our AI-powered financial planning tools.",
+                           ["Retirement planning", "College savings", "Budget optimization",
+                            "Goal-based planning"]))],
+        ]),
+    ],
+    "About": [
+        ("header", "About NovaBank"),
+        ("html", card("Our Story", (
+            "NovaBank was founded in 2020 with a mission to revolutionize banking through artificial "
+            "intelligence and cutting-edge technology. We believe that banking should be simple, transparent, "
+            "and personalized to each customer's unique financial journey.",
+            "As a 100% digital bank, we've eliminated the overhead costs of traditional brick-and-mortar "
+            "branches, allowing us to offer better rates, lower fees, and innovative features that traditional "
+            "banks simply can't match."))),
+        ("columns", [
+            [("html", card("Our Mission", "To empower people to achieve financial wellness through AI-driven "
+                                          "insights, personalized guidance, and innovative banking solutions."))],
+            [("html", card("Our Vision", "To become the world's leading AI-powered financial institution, setting "
+                                         "new standards for how people interact with their money."))],
+        ]),
+        ("html", card("NovaBot AI Assistant", (
+            "At the heart of our banking experience is NovaBot, our advanced AI assistant. NovaBot can answer "
+            "questions about your accounts, help you make transactions, provide financial insights, and much "
+            "more.",
+            "Powered by natural language processing and machine learning, NovaBot understands your questions "
+            "and provides personalized responses based on your financial situation and history."))),
+    ],
+}
+
+
+def render_page(blocks):
+    for block in blocks:
+        kind = block[0]
+        if kind == "html":
+            st.markdown(block[1], unsafe_allow_html=True)
+        elif kind == "header":
+            st.header(block[1])
+        elif kind == "subheader":
+            st.subheader(block[1])
+        elif kind == "button":
+            st.button(block[1], key=block[2])
+        elif kind == "columns":
+            for column, inner in zip(st.columns(len(block[1])), block[1]):
+                with column:
+                    render_page(inner)
+        elif kind == "tabs":
+            for tab, (_, inner) in zip(st.tabs([label for label, _ in block[1]]), block[1]):
+                with tab:
+                    render_page(inner)
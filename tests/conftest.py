@@ -0,0 +1,31 @@
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from novabot.bot import create_bot
+
+DATASET = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "novabank_dataset.txt")
+
+
+def random_corpus(n, vocabulary=400, seed=0):
+    rng = np.random.default_rng(seed)
+    words = ["w%d" % i for i in range(vocabulary)]
+    # Zipf-like frequencies, so some terms are common and most are rare
+    p = 1 / np.arange(1, vocabulary + 1)
+    p /= p.sum()
+    return [" ".join(rng.choice(words, size=rng.integers(2, 12), p=p)) for _ in range(n)]
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    """A copy of the app's dataset, so caches written next to it stay in tmp_path."""
+    path = str(tmp_path / "novabank_dataset.txt")
+    shutil.copy(DATASET, path)
+    return path
+
+
+@pytest.fixture
+def bot(dataset):
+    return create_bot(dataset, watch=False, session_rate=None)
@@ -0,0 +1,93 @@
+import threading
+import time
+
+from novabot.admission import AdmissionControl, RateLimiter
+from novabot.bot import DEFAULT_BUSY
+from novabot.metrics import Registry
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_rate_limiter_refills_at_rate():
+    clock = Clock()
+    limiter = RateLimiter(rate=2.0, burst=3, clock=clock)
+    assert [limiter.allow("a") for _ in range(4)] == [True, True, True, False]
+    assert limiter.allow("b")
+    clock.now = 0.4
+    assert not limiter.allow("a")
+    clock.now = 0.5
+    assert limiter.allow("a")
+    assert not limiter.allow("a")
+    clock.now = 100.0
+    # Refills stop at the burst size
+    assert [limiter.allow("a") for _ in range(4)] == [True, True, True, False]
+    assert limiter.limited == 4
+
+
+def test_rate_limiter_forgets_least_recent_sessions():
+    clock = Clock()
+    limiter = RateLimiter(rate=0.0, burst=1, max_sessions=2, clock=clock)
+    assert limiter.allow("a") and limiter.allow("b")
+    assert not limiter.allow("a")
+    assert limiter.allow("c")
+    assert limiter.stats() == {"sessions": 2, "limited": 1}
+    # "b" was evicted, so it starts with a full bucket again
+    assert limiter.allow("b")
+    assert not limiter.allow("c")
+
+
+def test_admission_rejects_when_queue_is_full():
+    admission = AdmissionControl(max_active=1, max_queued=0, timeout=1.0, registry=Registry())
+    assert admission.acquire()
+    start = time.perf_counter()
+    assert not admission.acquire()
+    assert time.perf_counter() - start < 0.5
+    admission.release()
+    with admission.slot() as admitted:
+        assert admitted
+        assert admission.stats()["active"] == 1
+    assert admission.stats() == {"active": 0, "queued": 0, "admitted": 2, "rejected": 1, "timed_out": 0}
+
+
+def test_admission_times_out_in_the_queue():
+    registry = Registry()
+    admission = AdmissionControl(max_active=1, max_queued=1, timeout=0.05, registry=registry)
+    assert admission.acquire()
+    with admission.slot() as admitted:
+        assert not admitted
+    assert admission.stats() == {"active": 1, "queued": 0, "admitted": 1, "rejected": 0, "timed_out": 1}
+    assert registry.histograms["admission_wait"].count == 2
+
+
+def test_release_admits_a_waiter():
+    admission = AdmissionControl(max_active=1, max_queued=1, timeout=5.0, registry=Registry())
+    assert admission.acquire()
+    result = []
+    waiter = threading.Thread(target=lambda: result.append(admission.acquire()))
+    waiter.start()
+    while not admission.queued:
+        time.sleep(0.001)
+    admission.release()
+    waiter.join()
+    assert result == [True]
+    assert admission.stats()["active"] == 1
+
+
+def test_bot_sheds_to_cache_or_busy(bot):
+    bot.limiter = RateLimiter(rate=0.0, burst=1)
+    question = bot.index_manager.current.questions[0]
+    first = bot.reply(question, session="s")
+    assert first.source not in ("rate_limited", "overloaded")
+    assert bot.reply(question, session="s").source == "cache"
+    assert bot.reply("how do I close my savings account", session="s") == (DEFAULT_BUSY, 0.0, "rate_limited")
+    bot.limiter = None
+    bot.admission = AdmissionControl(max_active=0, max_queued=0, registry=Registry())
+    assert bot.reply("how do I close my savings account").source == "overloaded"
+    assert bot.reply(question).source == "cache"
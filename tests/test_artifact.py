@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from novabot.artifact import PrebuiltVectorizer, build_artifact, load_index, load_prebuilt, save_index
+from novabot.dataset import load_dataset
+from novabot.fuzzy import char_vectorizer
+from novabot.retrieval import TfidfIndex, preprocess
+
+from conftest import DATASET
+
+QUERIES = ["How do I open an acount?", "reset my pasword", "Café  opening   hours", "loan-rates 2024!", "", "zzz"]
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    return load_dataset(DATASET)
+
+
+def test_prebuilt_char_ngrams_match_sklearn(corpus):
+    texts = [preprocess(q) for q in corpus[0]]
+    fitted = char_vectorizer(texts).fit(texts)
+    prebuilt = PrebuiltVectorizer.from_sklearn(fitted)
+    queries = [preprocess(q) for q in QUERIES] + ["Tabs\tand\nnewlines", "ÉCOLE naïve"]
+    # The character index is float32
+    np.testing.assert_allclose(prebuilt.transform(queries).toarray(), fitted.transform(queries).toarray(),
+                               atol=1e-6)
+
+
+def test_prebuilt_words_match_sklearn(corpus):
+    fitted = TfidfVectorizer(stop_words="english").fit(corpus[0])
+    prebuilt = PrebuiltVectorizer.from_sklearn(fitted)
+    np.testing.assert_allclose(prebuilt.transform(QUERIES).toarray(), fitted.transform(QUERIES).toarray(),
+                               atol=1e-12)
+
+
+def test_unsupported_settings_are_rejected(corpus):
+    with pytest.raises(ValueError):
+        PrebuiltVectorizer.from_sklearn(TfidfVectorizer(analyzer="char").fit(corpus[0]))
+    with pytest.raises(ValueError):
+        PrebuiltVectorizer.from_sklearn(TfidfVectorizer(norm="l1").fit(corpus[0]))
+
+
+@pytest.mark.parametrize("fuzzy", [False, True])
+def test_round_trip_scores(corpus, tmp_path, fuzzy):
+    index = TfidfIndex(*corpus, pruning=False, fuzzy=fuzzy)
+    path = str(tmp_path / "dataset.index")
+    save_index(index, path)
+    loaded = load_index(path, fuzzy=fuzzy)
+    assert list(loaded.questions) == list(index.questions)
+    assert list(loaded.answers) == list(index.answers)
+    for query in QUERIES + list(corpus[0][:20]):
+        np.testing.assert_allclose(loaded.scores(query), index.scores(query), atol=1e-6 if fuzzy else 1e-12)
+        assert loaded.best_match(query, exact=True)[0] == index.best_match(query, exact=True)[0]
+
+
+def test_load_prebuilt_checks_the_source(dataset):
+    assert load_prebuilt(dataset) is None
+    build_artifact(dataset, fuzzy=False)
+    assert load_prebuilt(dataset) is not None
+    assert load_prebuilt(dataset, fuzzy=True) is None
+    with open(dataset, "a", encoding="utf-8") as f:
+        f.write("\n")
+    assert load_prebuilt(dataset) is None
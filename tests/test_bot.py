@@ -0,0 +1,27 @@
+import logging
+
+from novabot.bot import create_bot
+
+
+def test_fuzzy_warns_for_retrievers_without_it(dataset, caplog):
+    with caplog.at_level(logging.WARNING, logger="novabot.bot"):
+        bot = create_bot(dataset, watch=False, retriever="segmented", session_rate=None)
+    assert "segmented retriever has no typo tolerance" in caplog.text
+    assert bot.reply("chek my ballance").source == "no_match"
+    caplog.clear()
+    with caplog.at_level(logging.WARNING, logger="novabot.bot"):
+        bot = create_bot(dataset, watch=False, session_rate=None)
+        create_bot(dataset, watch=False, retriever="segmented", fuzzy=False, session_rate=None)
+    assert not caplog.records
+    assert bot.reply("chek my ballance").source == "index"
+
+
+def test_hybrid_stage_timings_are_reported(dataset):
+    bot = create_bot(dataset, watch=False, retriever="hybrid", session_rate=None)
+    bot.reply("How do I reset my password?")
+    bot.reply_batch(["How do I open an account?", "What are your mortgage rates?"])
+    stats = bot.stats()
+    assert stats["index"]["first_stage"]["count"] == 3
+    assert stats["index"]["rerank"]["count"] + stats["index"]["rerank"]["skipped"] == 3
+    assert {"hybrid_first_stage", "hybrid_rerank"} <= set(stats["stages"])
+    assert "index" not in create_bot(dataset, watch=False, session_rate=None).stats()
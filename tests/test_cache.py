@@ -0,0 +1,59 @@
+from novabot.bot import Reply
+from novabot.cache import AnswerCache, normalize_query
+from novabot.context import ConversationContext
+
+
+def test_fuzzy_key_keeps_stop_words():
+    assert normalize_query("Where are   YOU?") == ""
+    assert normalize_query("Where are   YOU?", fuzzy=True) == "where are you"
+    assert normalize_query("How do I open a Café account?", fuzzy=True) == "how do i open a cafe account"
+
+
+def test_stop_word_queries_do_not_share_an_answer(bot):
+    first = bot.reply("where are you")
+    assert first.source == "index"
+    for query in ["who are you", "can I?"]:
+        assert bot.reply(query).source == "no_match"
+    assert bot.reply("Where are you?").source == "cache"
+
+
+def test_empty_key_is_never_cached(bot):
+    bot.index_manager.current.fuzzy = None
+    assert bot.cache_key("where are you") is None
+    bot.reply("where are you")
+    assert len(bot.cache) == 0
+
+
+def test_memory_cap_counts_answer_text():
+    cache = AnswerCache(max_bytes=1000000)
+    for i in range(50):
+        cache.put("q%d" % i, Reply("é" * 50000, 1.0, "index"))
+    assert cache.nbytes <= 1000000
+    assert len(cache) == 9
+    assert cache.evictions == 41
+    assert cache.get("q49") is not None and cache.get("q0") is None
+
+
+def test_oversized_answer_is_not_cached():
+    cache = AnswerCache(max_bytes=10000)
+    cache.put("q", Reply("x" * 100000, 1.0, "index"))
+    assert len(cache) == 0 and cache.nbytes == 0
+
+
+def test_repeat_questions_hit_the_cache_with_context(bot):
+    context = ConversationContext()
+    bot.reply("How do I reset my password?", context=context)
+    sources = [bot.reply("How do I check my balance?", context=context).source for _ in range(3)]
+    assert sources == ["index", "cache", "cache"]
+    assert len(context) == 3
+
+
+def test_weak_follow_up_is_scored_with_context(bot):
+    context = ConversationContext()
+    bot.reply("How do I reset my password?", context=context)
+    follow_up = bot.reply("and for the app?", context=context)
+    assert follow_up.source == "index"
+    # The cache keeps the answer to the message alone
+    assert bot.reply("and for the app?").source == "cache"
+    assert bot.reply("and for the app?").text == bot.fallback
+    assert bot.reply("and for the app?", context=context).source == "index"
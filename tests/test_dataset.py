@@ -0,0 +1,55 @@
+import os
+
+from novabot.dataset import CACHE_SUFFIX, load_corpus, parse_dataset
+
+DATASET_TEXT = """💸 ACCOUNT & BALANCE
+
+Q: What does plan A: cover?
+A: Plan A: covers checking. Ask "Q: which plan?" in the app to compare.
+
+Q: What are Alice's latest transactions?
+A: Here are Alice's recent transactions:
+- Purchase of $22.98 at Netflix
+- Deposit of $100.00
+🏠 LOANS, MORTGAGES, CREDIT
+Q: What are your mortgage rates?
+A: Rates start at {mortgage_rate}.
+A: Fixed terms run 15 or 30 years.
+Q: A question without an answer?
+Q: How do I apply for a loan?
+A: Online or in a branch.
+"""
+
+
+def test_answers_keep_q_and_a_in_their_text():
+    entries = list(parse_dataset(DATASET_TEXT.splitlines()))
+    assert entries[0] == ("What does plan A: cover?",
+                          'Plan A: covers checking. Ask "Q: which plan?" in the app to compare.',
+                          "💸 ACCOUNT & BALANCE")
+
+
+def test_multi_line_answers_stop_at_the_next_section():
+    entries = list(parse_dataset(DATASET_TEXT.splitlines()))
+    assert entries[1] == ("What are Alice's latest transactions?",
+                          "Here are Alice's recent transactions:\n- Purchase of $22.98 at Netflix\n"
+                          "- Deposit of $100.00", "💸 ACCOUNT & BALANCE")
+    # An A: line inside an answer is part of it
+    assert entries[2] == ("What are your mortgage rates?",
+                          "Rates start at {mortgage_rate}.\nA: Fixed terms run 15 or 30 years.",
+                          "🏠 LOANS, MORTGAGES, CREDIT")
+    assert [question for question, _, _ in entries] == [
+        "What does plan A: cover?", "What are Alice's latest transactions?", "What are your mortgage rates?",
+        "How do I apply for a loan?"]
+
+
+def test_corpus_cache_round_trip(tmp_path):
+    path = str(tmp_path / "faq.txt")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(DATASET_TEXT)
+    parsed = load_corpus(path)
+    assert os.path.exists(path + CACHE_SUFFIX)
+    cached = load_corpus(path)
+    assert list(cached.questions) == list(parsed.questions)
+    assert list(cached.answers) == list(parsed.answers)
+    assert [cached.category_names[c] for c in cached.category_ids] == [
+        "💸 ACCOUNT & BALANCE", "💸 ACCOUNT & BALANCE", "🏠 LOANS, MORTGAGES, CREDIT", "🏠 LOANS, MORTGAGES, CREDIT"]
@@ -0,0 +1,65 @@
+import time
+
+from novabot.history import ChatHistory, SpillStore, message_html
+
+
+def test_message_html_escapes_content():
+    assert message_html("user", "<script>alert('x')</script>") == (
+        "<div class='user-message'>&lt;script&gt;alert(&#x27;x&#x27;)&lt;/script&gt;</div>")
+    assert message_html("assistant", "Here:\n- a & b") == "<div class='bot-message'>Here:<br>- a &amp; b</div>"
+
+
+def test_turns_past_the_window_are_spilled(tmp_path):
+    store = SpillStore(str(tmp_path / "history.sqlite"))
+    history = ChatHistory(window=3, store=store, session="s")
+    for i in range(10):
+        history.append("user" if i % 2 == 0 else "assistant", "turn %d" % i)
+    assert len(history) == 10
+    assert history.spilled == 7
+    assert [m["content"] for m in history.messages()] == ["turn 7", "turn 8", "turn 9"]
+    assert history.html() == "".join(message_html(m["role"], m["content"]) for m in history.messages())
+    assert [content for _, content in history.older(3)] == ["turn 4", "turn 5", "turn 6"]
+    assert [content for _, content in history.older(100)] == ["turn %d" % i for i in range(7)]
+    assert history.older(0) == []
+
+
+def test_older_html_pages_back_escaped(tmp_path):
+    store = SpillStore(str(tmp_path / "history.sqlite"))
+    history = ChatHistory(window=1, store=store, session="s")
+    history.append("user", "<b>old</b>")
+    history.append("assistant", "new")
+    assert history.older_html(5) == "<div class='user-message'>&lt;b&gt;old&lt;/b&gt;</div>"
+
+
+def test_sessions_are_kept_apart_and_cleared(tmp_path):
+    store = SpillStore(str(tmp_path / "history.sqlite"))
+    first = ChatHistory(window=1, store=store, session="a")
+    second = ChatHistory(window=1, store=store, session="b")
+    for history in (first, second):
+        history.append("user", history.session)
+        history.append("user", "latest")
+    assert first.older(1) == [("user", "a")]
+    first.clear()
+    assert len(first) == 0 and first.older(1) == []
+    assert second.older(1) == [("user", "b")]
+
+
+def test_without_a_store_spilled_turns_are_dropped():
+    history = ChatHistory(window=2)
+    for i in range(5):
+        history.append("user", str(i))
+    assert len(history) == 5
+    assert history.older(3) == []
+
+
+def test_opening_a_store_deletes_only_expired_turns(tmp_path):
+    path = str(tmp_path / "history.sqlite")
+    store = SpillStore(path)
+    store.append("s", 0, "user", "old")
+    store.append("s", 1, "user", "recent")
+    store.append("t", 0, "user", "other")
+    store._db.execute("UPDATE turns SET ts = ? WHERE content = 'old'", (time.time() - 7200,))
+    store.close()
+    store = SpillStore(path, max_age=3600)
+    assert store.turns("s", 0, 10) == [("user", "recent")]
+    assert store.turns("t", 0, 10) == [("user", "other")]
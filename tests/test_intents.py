@@ -0,0 +1,51 @@
+import datetime
+
+import pytest
+
+from novabot.intents import TransactionIntents
+from novabot.transactions import TransactionStore, day_number
+
+
+@pytest.mark.parametrize("query, customer", [
+    ("How do I transfer money?", "Alice"),
+    ("How do I transfer money to Bob?", None),
+    ("Can Diana deposit a check?", None),
+    ("How do I check my balance?", "Alice"),
+    ("How can I make a deposit?", None),
+])
+def test_how_to_questions_go_to_retrieval(bot, query, customer):
+    assert bot.reply(query, customer=customer).source != "intent"
+
+
+@pytest.mark.parametrize("query, customer, expected", [
+    ("How much did Alice spend at Netflix?", None, "Alice spent"),
+    ("Bob's latest deposits", None, "Here are Bob's recent deposits"),
+    ("What's Carlos's balance?", None, "Carlos's balance"),
+    ("show my recent transfers", "Diana", "Here are Diana's recent transfers"),
+    ("what is my balance", "Evelyn", "Evelyn's balance"),
+    ("my deposits", "Alice", "Here are Alice's recent deposits"),
+])
+def test_record_questions_are_answered_from_the_store(bot, query, customer, expected):
+    reply = bot.reply(query, customer=customer)
+    assert reply.source == "intent"
+    assert reply.text.startswith(expected)
+
+
+def test_period_question_over_undated_records(bot):
+    text = bot.reply("how much did Evelyn spend at Uber last month").text
+    assert text.startswith("Evelyn spent $852.39 at Uber (1 purchase).")
+    assert "without a date is included" in text
+
+
+def test_period_question_over_dated_records():
+    today = datetime.date(2024, 5, 15)
+    store = TransactionStore.from_records([
+        ("Evelyn", "Purchase", 1000, "Uber", day_number(datetime.date(2024, 4, 20))),
+        ("Evelyn", "Purchase", 2500, "Uber", day_number(datetime.date(2024, 5, 2))),
+        ("Evelyn", "Purchase", 700, "Uber", day_number(datetime.date(2024, 3, 30))),
+    ])
+    intents = TransactionIntents(store, today=lambda: today)
+    assert intents.handle("how much did Evelyn spend at Uber last month") == (
+        "Evelyn spent $10.00 at Uber last month (1 purchase).")
+    assert intents.handle("how much did Evelyn spend at Uber last week") == (
+        "I found no purchases at Uber for Evelyn last week.")
@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from novabot.retrieval import TfidfIndex
+
+from conftest import random_corpus
+
+
+@pytest.fixture(scope="module")
+def index():
+    questions = random_corpus(3000)
+    return TfidfIndex(questions, list(range(len(questions))))
+
+
+@pytest.mark.parametrize("k", [1, 3, 10, 50])
+def test_pruned_top_k_matches_exact_product(index, k):
+    for query in random_corpus(200, seed=1):
+        _, exact_scores = index.top_k(query, k, exact=True)
+        rows, scores, _ = index.inverted.top_k(index.transform(query), k)
+        # Rows sharing no term with the query score 0 and are not returned
+        expected = exact_scores[exact_scores > 0]
+        np.testing.assert_allclose(scores, expected, rtol=1e-9, atol=1e-12)
+        exact_all = index.scores(query)
+        np.testing.assert_allclose(exact_all[rows], scores, rtol=1e-9, atol=1e-12)
+
+
+def test_fuzzy_index_takes_the_matrix_product():
+    questions = random_corpus(300)
+    index = TfidfIndex(questions, list(range(len(questions))), fuzzy=True)
+    assert index.inverted is None
+    for query in random_corpus(20, seed=1):
+        rows, scores = index.top_k(query, 3)
+        np.testing.assert_allclose(scores, np.sort(index.scores(query))[::-1][:3])
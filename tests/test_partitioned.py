@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from novabot.dataset import Corpus
+from novabot.partitioned import PartitionedIndex
+from novabot.retrieval import TfidfIndex
+
+SECTIONS = {
+    "💸 ACCOUNT & BALANCE": ["How do I check my account balance?", "How do I open a savings account?",
+                            "What are the account fees?", "Can I close my checking account online?"],
+    "🏠 LOANS, MORTGAGES, CREDIT": ["What are your mortgage rates?", "How do I apply for a personal loan?",
+                                   "What are the loan fees?", "How do I raise my credit card limit?"],
+    "📈 INVESTMENTS": ["Do you offer retirement investment plans?", "How do I buy stocks and bonds?"],
+    "🔐 SECURITY & SETTINGS": ["How do I reset my password?", "How do I turn on two-factor login?"],
+}
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    return Corpus.from_entries((q, "answer to " + q, name) for name, questions in SECTIONS.items()
+                               for q in questions)
+
+
+@pytest.fixture(scope="module")
+def index(corpus):
+    return PartitionedIndex(corpus, max_partitions=1, fuzzy=True)
+
+
+def section(index, row):
+    return next(name for name, rows in zip(index.names, index.row_ids) if row in rows)
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("current mortgage rates", "🏠 LOANS, MORTGAGES, CREDIT"),
+    ("open a savings account", "💸 ACCOUNT & BALANCE"),
+    ("investment plans for retirement", "📈 INVESTMENTS"),
+    ("forgot my password", "🔐 SECURITY & SETTINGS"),
+])
+def test_queries_are_routed_to_their_section(index, corpus, query, expected):
+    assert index.names[index.route(query)[0]] == expected
+    row, score = index.best_match(query)
+    assert section(index, row) == expected
+    # Sections share one vocabulary, so scores equal a flat index's
+    flat = TfidfIndex(corpus.questions, corpus.answers, fuzzy=True)
+    assert (row, score) == pytest.approx(flat.best_match(query, exact=True))
+
+
+def test_page_hint_boosts_its_sections(index):
+    query = "what are the fees"
+    assert index.names[index.route(query, page="Loans")[0]] == "🏠 LOANS, MORTGAGES, CREDIT"
+    assert index.names[index.route(query, page="Accounts")[0]] == "💸 ACCOUNT & BALANCE"
+    assert index.questions[index.best_match(query, page="Loans")[0]] == "What are the loan fees?"
+    assert index.questions[index.best_match(query, page="Accounts")[0]] == "What are the account fees?"
+    assert len(index.route(query, page="Unknown page")) == 1
+
+
+def test_query_without_known_words_goes_to_every_section(index):
+    query = "mortgge ratse"
+    assert not index.vectorizer.transform([query]).nnz
+    assert sorted(index.route(query)) == list(range(len(SECTIONS)))
+    assert index.questions[index.best_match(query)[0]] == "What are your mortgage rates?"
+
+
+def test_batch_matches_single_queries(index):
+    queries = ["current mortgage rates", "what are the fees", "mortgge ratse", "buy stocks"]
+    pages = ["Loans", "Accounts", None, None]
+    rows, scores = index.answer_batch(queries, 1, pages)
+    for query, page, row, score in zip(queries, pages, rows[:, 0], scores[:, 0]):
+        assert (row, score) == pytest.approx(index.best_match(query, page))
+    assert np.all(scores > 0)
@@ -0,0 +1,55 @@
+import os
+
+import pytest
+
+from novabot.reloader import IndexManager, build_tfidf_index
+
+
+def rewrite(path, old, new):
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text.replace(old, new))
+
+
+def test_changed_file_swaps_the_index(dataset):
+    manager = IndexManager(dataset)
+    swapped = []
+    manager.add_listener(swapped.append)
+    first = manager.current
+    assert not manager.check()
+    rewrite(dataset, "How do I reset my password?", "How do I reset my PIN code?")
+    assert manager.check()
+    assert manager.current is not first and swapped == [manager.current]
+    assert "How do I reset my PIN code?" in list(manager.current.questions)
+    assert not manager.check()
+
+
+def test_touched_identical_file_is_ignored(dataset):
+    manager = IndexManager(dataset)
+    first = manager.current
+    stat = os.stat(dataset)
+    os.utime(dataset, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert not manager.check()
+    assert manager.current is first
+
+
+def test_failed_build_is_retried(dataset):
+    failures = [RuntimeError("disk hiccup")]
+
+    def build(file_path):
+        if len(calls) > 0 and failures:
+            raise failures.pop()
+        calls.append(file_path)
+        return build_tfidf_index(file_path)
+
+    calls = []
+    manager = IndexManager(dataset, build=build)
+    first = manager.current
+    rewrite(dataset, "How do I reset my password?", "How do I reset my PIN code?")
+    with pytest.raises(RuntimeError):
+        manager.check()
+    assert manager.current is first
+    # The file has not changed since, but the build is tried again
+    assert manager.check()
+    assert "How do I reset my PIN code?" in list(manager.current.questions)
@@ -0,0 +1,103 @@
+import json
+
+import numpy as np
+import pytest
+
+from novabot.retrieval import TfidfIndex
+from novabot.segments import SegmentedIndex, read_changeset
+
+from conftest import random_corpus
+
+
+def changeset(questions, rng):
+    lines = []
+    for i in rng.choice(len(questions), 150, replace=False):
+        op = ("upsert", "update", "delete")[i % 3]
+        if op == "upsert":
+            lines.append({"op": op, "question": questions[i], "answer": "new %d" % i})
+        elif op == "update":
+            lines.append({"op": op, "question": questions[i], "new_question": questions[i] + " w7",
+                          "answer": "updated %d" % i})
+        else:
+            lines.append({"op": op, "question": questions[i]})
+    lines += [{"op": "upsert", "question": q, "answer": "added"} for q in random_corpus(100, seed=2)]
+    return [json.dumps(line) for line in lines]
+
+
+@pytest.fixture(scope="module")
+def indexes():
+    questions = random_corpus(1000)
+    answers = list(range(len(questions)))
+    # Thresholds high enough that apply() never compacts on its own
+    index = SegmentedIndex(questions, answers, max_segments=100, max_dead_ratio=10, max_idf_drift=10)
+    rng = np.random.default_rng(0)
+    for _ in range(3):
+        index.apply_changeset(changeset(list(index.keys), rng))
+    index.compact()
+    live = list(index.keys)
+    fresh = TfidfIndex(live, [index.answers[index.keys[q]] for q in live], pruning=False)
+    return index, fresh
+
+
+def test_compact_matches_a_fresh_index(indexes):
+    index, fresh = indexes
+    assert len(index) == len(fresh)
+    for query in random_corpus(200, seed=1):
+        rows, scores = index.top_k(query, 10)
+        expected_rows, expected = fresh.top_k(query, 10, exact=True)
+        np.testing.assert_allclose(scores, expected, atol=1e-12)
+        # Ties may come in either order; the best question must score the same in both
+        top = fresh.questions.index(index.questions[rows[0]])
+        np.testing.assert_allclose(fresh.scores(query)[top], expected[0], atol=1e-12)
+
+
+def test_deleted_entries_are_never_returned(indexes):
+    index, _ = indexes
+    rows, scores = index.answer_batch(random_corpus(50, seed=3), k=20)
+    assert index.live[rows].all()
+    assert (scores >= 0).all()
+
+
+def snapshot(index):
+    return dict(index.keys), list(index.answers), [q for q in index.keys if index.live[index.keys[q]]]
+
+
+@pytest.mark.parametrize("line", [
+    '{"op": "upsert", "question": "x"}',
+    '{"op": "update", "question": "open account", "new_question": null}',
+    '{"op": "update", "question": "open account", "new_question": ""}',
+    '{"op": "upsert", "question": "x", "answer": 5}',
+    '{"op": "update", "question": "open account", "answer": ["a"]}',
+    '{"op": "delete", "question": ""}',
+])
+def test_invalid_changeset_is_rejected_whole(line):
+    index = SegmentedIndex(["open account", "close account"], ["Use the app.", "Call us."])
+    before = snapshot(index)
+    with pytest.raises(ValueError, match="line 2"):
+        index.apply_changeset(['{"op": "delete", "question": "open account"}', line])
+    assert snapshot(index) == before
+    assert index.answer("open account") == "Use the app."
+
+
+def test_failed_change_leaves_the_index_unchanged():
+    index = SegmentedIndex(["open account", "close account"], ["Use the app.", "Call us."])
+    before = snapshot(index)
+    # Parsed changes that skipped read_changeset fail before anything is applied
+    with pytest.raises(KeyError):
+        index.apply([{"op": "delete", "question": "open account"}, {"op": "upsert", "question": "x"}])
+    assert snapshot(index) == before
+    assert len(index) == 2
+
+
+def test_changeset_ops():
+    index = SegmentedIndex(["open account", "close account"], ["Use the app.", "Call us."])
+    applied = index.apply_changeset([
+        '{"op": "upsert", "question": "lost card", "answer": "Freeze it."}',
+        '{"op": "update", "question": "open account", "new_question": "open an account online"}',
+        '{"op": "delete", "question": "close account"}',
+        '{"op": "delete", "question": "close account"}',
+    ])
+    assert applied == {"upserted": 1, "updated": 1, "deleted": 1, "missing": 1}
+    assert sorted(index.keys) == ["lost card", "open an account online"]
+    assert index.answer("open an account online") == "Use the app."
+    assert read_changeset(["", '{"op": "delete", "question": "q"}']) == [{"op": "delete", "question": "q"}]
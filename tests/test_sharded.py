@@ -0,0 +1,63 @@
+import gc
+import os
+
+import numpy as np
+import pytest
+
+from novabot.dataset import load_dataset
+from novabot.retrieval import TfidfIndex
+from novabot.sharded import ShardedIndex
+
+from conftest import DATASET
+
+# Workers are spawned, so they import novabot.sharded but never this module;
+# nothing here runs at import time.
+
+
+def workers(index):
+    _, _, (_, processes, directory), _ = index._finalizer.peek()
+    return processes, directory
+
+
+@pytest.fixture(scope="module")
+def indexes():
+    questions, answers = load_dataset(DATASET)
+    sharded = ShardedIndex(questions, answers, shards=3)
+    yield sharded, TfidfIndex(questions, answers, pruning=False)
+    sharded.close()
+
+
+def test_sharded_matches_tfidf_index(indexes):
+    sharded, flat = indexes
+    assert sharded.shards == 3
+    queries = list(flat.questions) + ["how do I chek my ballance", "mortgage", "zzz"]
+    for query in queries:
+        rows, scores = sharded.top_k(query, 5)
+        _, expected = flat.top_k(query, 5, exact=True)
+        np.testing.assert_allclose(scores, expected, atol=1e-12)
+        np.testing.assert_allclose(flat.scores(query)[rows], scores, atol=1e-12)
+        assert (sharded.match(query) is None) == (flat.match(query) is None)
+    _, scores = sharded.answer_batch(queries, k=3)
+    _, expected = flat.answer_batch(queries, k=3)
+    np.testing.assert_allclose(scores, expected, atol=1e-12)
+
+
+def test_close_stops_workers_and_removes_shards():
+    questions, answers = load_dataset(DATASET)
+    index = ShardedIndex(questions, answers, shards=2)
+    processes, directory = workers(index)
+    assert all(process.is_alive() for process in processes)
+    index.close()
+    assert not any(process.is_alive() for process in processes)
+    assert not os.path.exists(directory)
+    index.close()
+
+
+def test_garbage_collected_index_stops_workers():
+    questions, answers = load_dataset(DATASET)
+    index = ShardedIndex(questions, answers, shards=2)
+    processes, directory = workers(index)
+    del index
+    gc.collect()
+    assert not any(process.is_alive() for process in processes)
+    assert not os.path.exists(directory)
@@ -0,0 +1,111 @@
+from novabot.templates import AnswerTemplates, LocalProvider, SlotCache, Template
+
+
+class CountingProvider:
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.calls = []
+
+    def fetch(self, customers):
+        self.calls.append(sorted(customers, key=str))
+        if self.fail:
+            raise RuntimeError("backend down")
+        return {customer: {"customer_name": customer, "balance": "$%d" % len(self.calls)} for customer in customers}
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_template_renders_values_and_defaults():
+    template = Template("Hi {customer_name|there}, text {sms_shortcode}; balance {balance}.")
+    assert template.slots == {"customer_name", "sms_shortcode", "balance"}
+    assert template.render({"sms_shortcode": 29292}) == "Hi there, text 29292; balance {balance}."
+    assert template.render({"customer_name": "Ana", "sms_shortcode": "1", "balance": "$5"}) == (
+        "Hi Ana, text 1; balance $5.")
+
+
+def test_answers_without_slots_are_not_compiled():
+    templates = AnswerTemplates(CountingProvider())
+    assert templates.compile("No slots here.") is None
+    assert templates.compile("Braces { but no slot }") is None
+    assert templates.compile("Call {sms_shortcode}") is templates.compile("Call {sms_shortcode}")
+    assert templates.render_many(["Plain.", "Also plain."], ["a", "b"]) == ["Plain.", "Also plain."]
+    assert templates.values.provider.calls == []
+
+
+def test_values_are_fetched_once_per_batch_and_cached_per_customer():
+    provider = CountingProvider()
+    templates = AnswerTemplates(provider, ttl=60, clock=Clock())
+    texts = ["{customer_name}: {balance}"] * 4 + ["Plain."]
+    assert templates.render_many(texts, ["a", "b", "a", None, "c"]) == [
+        "a: $1", "b: $1", "a: $1", "{customer_name}: $1", "Plain."]
+    assert provider.calls == [[None, "a", "b"]]
+    assert templates.render("{customer_name}: {balance}", "b") == "b: $1"
+    assert templates.render("{customer_name}: {balance}", "d") == "d: $2"
+    assert provider.calls[1:] == [["d"]]
+    assert templates.stats()["hits"] == 1
+
+
+def test_values_expire_after_ttl():
+    clock = Clock()
+    provider = CountingProvider()
+    cache = SlotCache(provider, ttl=10, clock=clock)
+    assert cache.get_many(["a"])["a"]["balance"] == "$1"
+    clock.now = 9.9
+    assert cache.get_many(["a"])["a"]["balance"] == "$1"
+    clock.now = 10.0
+    assert cache.get_many(["a"])["a"]["balance"] == "$2"
+    assert cache.stats() == {"customers": 1, "hits": 1, "misses": 2, "fetches": 2, "errors": 0}
+
+
+def test_least_recent_customers_are_evicted():
+    provider = CountingProvider()
+    cache = SlotCache(provider, max_customers=2, clock=Clock())
+    cache.get_many(["a", "b"])
+    cache.get_many(["a"])
+    cache.get_many(["c"])
+    assert len(cache) == 2
+    cache.get_many(["a", "b"])
+    assert provider.calls == [["a", "b"], ["c"], ["b"]]
+
+
+def test_provider_errors_fall_back_to_defaults():
+    provider = CountingProvider(fail=True)
+    templates = AnswerTemplates(provider, clock=Clock())
+    assert templates.render("Balance: {balance|see the app}", "a") == "Balance: see the app"
+    assert templates.render("Balance: {balance|see the app}", "a") == "Balance: see the app"
+    # Nothing was cached for the failed calls
+    assert len(provider.calls) == 2
+    assert templates.stats()["errors"] == 2
+
+
+def test_local_provider_reads_the_store(bot):
+    values = LocalProvider(bot.intents.store).fetch(["Evelyn", "nobody", None])
+    assert values["Evelyn"]["customer_name"] == "Evelyn"
+    assert values["Evelyn"]["balance"] == "-$3,058.38"
+    assert "balance" not in values["nobody"] and "balance" not in values[None]
+    assert values[None]["sms_shortcode"] == "29292"
+
+
+def test_reload_updates_slot_values(bot, dataset):
+    answer = "{customer_name}, your balance is {balance}."
+    assert bot.templates.render(answer, "Evelyn") == "Evelyn, your balance is -$3,058.38."
+    with open(dataset, encoding="utf-8") as f:
+        text = f.read()
+    with open(dataset, "w", encoding="utf-8") as f:
+        f.write(text.replace("- Purchase of $852.39 at Uber\n", "- Purchase of $852.39 at Uber\n- Deposit of $1,000.00\n"))
+    assert bot.index_manager.check()
+    assert bot.templates.render(answer, "Evelyn") == "Evelyn, your balance is -$2,058.38."
+
+
+def test_bot_renders_slotted_answers(bot):
+    for customer in (None, "Evelyn"):
+        text = bot.reply("How do I check my balance?", customer=customer).text
+        assert "{sms_shortcode}" not in text and "29292" in text
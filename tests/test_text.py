@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
+
+from novabot.dataset import load_dataset
+from novabot.hybrid import BM25Scorer
+from novabot.text import Tokenizer, WordVectorizer, fold
+
+from conftest import DATASET
+
+
+@pytest.fixture(scope="module")
+def texts():
+    questions, answers = load_dataset(DATASET)
+    return [fold(t) for t in questions + answers + ["Café prices: €22.98, 3.5% APR", "naïve résumé", "a"]]
+
+
+def test_fold():
+    assert fold("Costs $22.98!") == "costs  dollar 22.98"
+    assert fold("Café déjà-vu, 50%.") == "cafe dejavu 50 percent "
+    assert fold(fold("Café €3.50 — ok?")) == fold("Café €3.50 — ok?")
+
+
+def test_word_vectorizer_matches_tfidf_vectorizer(texts):
+    ours = WordVectorizer()
+    matrix = ours.fit_transform(texts)
+    reference = TfidfVectorizer(analyzer=Tokenizer())
+    expected = reference.fit_transform(texts)
+    assert ours.vocabulary_ == reference.vocabulary_
+    np.testing.assert_allclose(ours.idf_, reference.idf_)
+    np.testing.assert_allclose(matrix.toarray(), expected.toarray(), atol=1e-12)
+    queries = [fold(q) for q in ["How do I open an account?", "unknown words only", ""]]
+    np.testing.assert_allclose(ours.transform(queries).toarray(), reference.transform(queries).toarray(), atol=1e-12)
+
+
+def test_tokenizer_counts_match_count_vectorizer(texts):
+    reference = CountVectorizer(analyzer=Tokenizer()).fit(texts)
+    counts = Tokenizer().count(texts, reference.vocabulary_, chunk=7)
+    np.testing.assert_array_equal(counts.toarray(), reference.transform(texts).toarray())
+
+
+def test_bm25_uses_the_shared_tokenizer():
+    questions, answers = ["Open an account", "Close my account"], ["Use the app.", "Call us."]
+    scorer = BM25Scorer(questions, answers)
+    tokenizer = Tokenizer()
+    assert set(scorer.vocabulary) == {term for text in questions + answers for term in tokenizer(fold(text))}
+    scores = scorer.bind("open account")(np.array([0, 1]))
+    assert scores[0] > scores[1] > 0